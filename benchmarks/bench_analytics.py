@@ -0,0 +1,74 @@
+"""
+Memoria de la analítica de gastos según el tamaño del historial.
+
+Alimenta `agregar_gastos` con páginas sintéticas (como las que devuelve
+Supabase) y mide con tracemalloc el pico de memoria de la agregación en
+streaming frente a materializar la lista completa, como hacía
+`obtener_gastos`. El pico del streaming debe quedarse plano al crecer N.
+
+Uso:
+    python benchmarks/bench_analytics.py --tamanos 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# El módulo crea el cliente de Supabase al importarse; aquí nunca se usa
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.firma")
+
+from src.services.analytics_service import agregar_gastos, resumir  # noqa: E402
+
+CATEGORIAS = ["Alimentación", "Transporte", "Educación", "Salud", "Entretenimiento", "Hogar", "Tecnología", "Ropa"]
+TAMANO_PAGINA = 1000
+
+
+def paginas(n: int, semilla: int = 11):
+    rnd = random.Random(semilla)
+    for base in range(0, n, TAMANO_PAGINA):
+        yield [
+            {"id": f"{i:012d}", "categoria": rnd.choice(CATEGORIAS), "nombre_gasto": "Gasto",
+             "monto": round(rnd.lognormvariate(5, 0.6), 2), "fecha": "2025-06-01"}
+            for i in range(base, min(n, base + TAMANO_PAGINA))
+        ]
+
+
+def medir(funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracion, pico
+
+
+def streaming(n: int):
+    filas = (fila for pagina in paginas(n) for fila in pagina)
+    return resumir(agregar_gastos(filas, 10), 5, 3.0)
+
+
+def materializado(n: int):
+    filas = [fila for pagina in paginas(n) for fila in pagina]
+    return resumir(agregar_gastos(iter(filas), 10), 5, 3.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--sin-materializar", action="store_true", help="Omite la comparación con la lista completa")
+    args = parser.parse_args()
+    for n in args.tamanos:
+        resumen, duracion, pico = medir(lambda: streaming(n))
+        linea = (f"{n:>9} gastos  streaming pico {pico / 1e6:7.2f} MB  {duracion:6.2f} s  "
+                 f"atípicos {len(resumen['atipicos']):3d}")
+        if not args.sin_materializar:
+            _, _, pico_lista = medir(lambda: materializado(n))
+            linea += f"  |  lista completa pico {pico_lista / 1e6:8.2f} MB"
+        print(linea)
@@ -0,0 +1,81 @@
+"""
+Memoria por fila del snapshot columnar frente a la lista de dicts.
+
+Mide con tracemalloc cuánto ocupan N movimientos como los devuelve
+Supabase (lista de dicts con id, fecha, monto y categoría) y como
+`ColumnasMovimientos`, y el tiempo de sumar un rango de fechas en cada
+representación.
+
+Uso:
+    python benchmarks/bench_ledger.py --filas 100000
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.columnar import ColumnasMovimientos  # noqa: E402
+
+CATEGORIAS = ["Alimentación", "Transporte", "Educación", "Salud", "Entretenimiento", "Hogar", "Tecnología", "Ropa"]
+
+
+def generar_json(n: int) -> str:
+    rnd = random.Random(5)
+    hoy = date.today()
+    return json.dumps([
+        {"id": str(uuid.UUID(int=rnd.getrandbits(128))), "fecha": (hoy - timedelta(days=rnd.randrange(730))).isoformat(),
+         "monto": round(rnd.uniform(5, 5000), 2), "categoria": rnd.choice(CATEGORIAS),
+         "actualizado_en": "2025-06-01T12:00:00.000000+00:00"}
+        for _ in range(n)
+    ])
+
+
+def medir_memoria(construir):
+    tracemalloc.start()
+    objeto = construir()
+    actual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objeto, actual
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    crudo = generar_json(args.filas)
+    filas, bytes_dicts = medir_memoria(lambda: json.loads(crudo))
+
+    def columnar():
+        columnas = ColumnasMovimientos()
+        for f in filas:
+            columnas.agregar(f["id"], f["fecha"], f["monto"], f["categoria"])
+        return columnas
+
+    columnas, bytes_columnas = medir_memoria(columnar)
+
+    inicio, fin = date.today() - timedelta(days=90), date.today()
+    t0 = time.perf_counter()
+    total_dicts = sum(f["monto"] for f in filas if str(inicio) <= f["fecha"] <= str(fin))
+    t_dicts = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    total_columnas = columnas.total_en_rango(inicio, fin) / 100
+    t_columnas = time.perf_counter() - t0
+
+    n = args.filas
+    print(f"lista de dicts : {bytes_dicts / n:7.1f} bytes/fila  suma de 90 días {t_dicts * 1000:7.2f} ms  total {total_dicts:,.2f}")
+    print(f"columnar       : {bytes_columnas / n:7.1f} bytes/fila  suma de 90 días {t_columnas * 1000:7.2f} ms  total {total_columnas:,.2f}")
+    print(f"reducción      : {bytes_dicts / bytes_columnas:.1f}x")
+
+    # Actualizar por id recorre los ids en C; las escrituras y los deltas son pocos por sincronización
+    t0 = time.perf_counter()
+    for f in filas[-100:]:
+        columnas.upsert(f["id"], f["fecha"], f["monto"] + 1, f["categoria"])
+    print(f"upsert por id  : {(time.perf_counter() - t0) * 10:7.3f} ms/fila (peor caso, ids al final)")
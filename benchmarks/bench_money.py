@@ -0,0 +1,83 @@
+"""
+Sumas de montos: floats sobre dicts frente a centavos enteros en columnas.
+
+Compara, para N movimientos con fechas repartidas en dos años:
+  - dicts   : el cálculo anterior del reporte (generador sobre dicts, suma
+              de floats y round(..., 2) al final)
+  - python  : ColumnasMovimientos sin NumPy (bucle sobre arrays de centavos)
+  - numpy   : ColumnasMovimientos con máscara y suma vectorizada
+y muestra el error de la suma en float que el round() final oculta.
+
+Uso:
+    python benchmarks/bench_money.py --filas 200000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core import columnar, money  # noqa: E402
+from src.core.columnar import ColumnasMovimientos  # noqa: E402
+
+
+def generar(n: int):
+    rnd = random.Random(3)
+    hoy = date.today()
+    return [
+        {"id": f"{i:032x}", "fecha": (hoy - timedelta(days=rnd.randrange(730))).isoformat(),
+         "monto": rnd.randrange(1, 2_000_000) / 100, "categoria": "Alimentación"}
+        for i in range(n)
+    ]
+
+
+def cronometrar(funcion, repeticiones: int):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return resultado, mejor * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    filas = generar(args.filas)
+    columnas = ColumnasMovimientos()
+    for f in filas:
+        columnas.agregar(f["id"], f["fecha"], f["monto"], f["categoria"])
+    inicio, fin = date.today() - timedelta(days=365), date.today()
+    desde, hasta = str(inicio), str(fin)
+
+    flotante, t_dicts = cronometrar(
+        lambda: round(float(sum(f["monto"] for f in filas if desde <= f["fecha"] <= hasta)), 2), args.repeticiones)
+    exacto = money.sumar_centavos(f["monto"] for f in filas if desde <= f["fecha"] <= hasta)
+    crudo = float(sum(f["monto"] for f in filas if desde <= f["fecha"] <= hasta))
+    error = Decimal(crudo) * 100 - exacto
+
+    np_original = columnar.np
+    columnar.np = None
+    python, t_python = cronometrar(lambda: columnas.total_en_rango(inicio, fin), args.repeticiones)
+    columnar.np = np_original
+    if columnar.np is not None:
+        vectorizado, t_numpy = cronometrar(lambda: columnas.total_en_rango(inicio, fin), args.repeticiones)
+    else:
+        vectorizado, t_numpy = None, None
+
+    print(f"{args.filas} movimientos, suma de los últimos 365 días")
+    print(f"dicts (float) : {t_dicts:8.2f} ms  total {flotante:,.2f}  error sin redondear {error:+.6f} centavos")
+    print(f"python (int)  : {t_python:8.2f} ms  total {money.a_monto(python):,.2f}")
+    if t_numpy is not None:
+        print(f"numpy (int)   : {t_numpy:8.2f} ms  total {money.a_monto(vectorizado):,.2f}  "
+              f"({t_dicts / t_numpy:.0f}x más rápido que dicts)")
+    else:
+        print("numpy (int)   : no instalado")
+    assert python == exacto and vectorizado in (None, exacto)
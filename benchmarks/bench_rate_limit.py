@@ -0,0 +1,31 @@
+"""
+Microbenchmark del rate limiter: costo por petición de consumir fichas en
+el almacén en memoria y en el almacén SQLite compartido.
+
+Uso:
+    python benchmarks/bench_rate_limit.py
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.rate_limit import AlmacenMemoria, AlmacenSQLite  # noqa: E402
+
+
+def medir(almacen, n: int, claves: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(n):
+        almacen.consumir(f"usuario:{i % claves}", 1, 1e12, 10)
+    return (time.perf_counter() - inicio) / n * 1e6
+
+
+if __name__ == "__main__":
+    n = 200_000
+    print(f"memoria  : {medir(AlmacenMemoria(), n, 1000):.2f} µs/petición")
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = AlmacenSQLite(os.path.join(tmp, "rl.db"))
+        print(f"sqlite   : {medir(sqlite, n // 20, 1000):.2f} µs/petición")
@@ -0,0 +1,109 @@
+"""
+Costo por petición de la capa de servicio de recursos frente a las
+consultas escritas a mano en cada ruta (como estaban antes).
+
+Mide tres cosas:
+  - construir la consulta: `supabase.table(...).select(...).eq(...)` a mano
+    frente a `ServicioRecurso.consulta()` + filtro por id, sin red;
+  - ejecutar una consulta que responde al instante: `ejecutar()` directo
+    frente a `ServicioRecurso._ejecutar()` (métricas y mapeo de errores),
+    es decir el costo propio de la capa sin el ruido de la red;
+  - la operación completa (obtener por id y listar una página) contra el
+    PostgREST falso en este mismo proceso con latencia 0, donde cualquier
+    costo agregado por la capa (métricas, mapeo de errores, hooks) quedaría
+    a la vista.
+
+Las dos variantes se alternan en cada repetición para que el ruido les
+afecte por igual; se reporta la mediana en µs.
+
+Uso:
+    python benchmarks/bench_recursos.py --repeticiones 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+PUERTO = 54981
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{PUERTO}"
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.firma")
+
+from fake_postgrest import BaseDatosFalsa, iniciar_servidor, sembrar  # noqa: E402
+from src.database.resilience import ejecutar  # noqa: E402
+from src.database.supabase_client import supabase  # noqa: E402
+from src.services.recurso_service import gastos  # noqa: E402
+
+
+class ConsultaInstantanea:
+    """Consulta ya resuelta: aísla el costo de la capa del de la red."""
+
+    def __init__(self, filas):
+        self.respuesta = type("Respuesta", (), {"data": filas})()
+
+    def execute(self):
+        return self.respuesta
+
+
+def cronometrar(funcion, repeticiones: int):
+    inicio = time.perf_counter_ns()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter_ns() - inicio) / repeticiones / 1000
+
+
+def comparar(nombre: str, a_mano, servicio, repeticiones: int, lote: int) -> None:
+    muestras_mano, muestras_servicio = [], []
+    for _ in range(repeticiones):
+        muestras_mano.append(cronometrar(a_mano, lote))
+        muestras_servicio.append(cronometrar(servicio, lote))
+    mano, capa = statistics.median(muestras_mano), statistics.median(muestras_servicio)
+    print(f"{nombre:<22} a mano {mano:9.1f} µs   servicio {capa:9.1f} µs   diferencia {capa - mano:+8.1f} µs "
+          f"({(capa - mano) / mano * 100:+5.1f} %)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--filas", type=int, default=500)
+    args = parser.parse_args()
+
+    db = BaseDatosFalsa()
+    usuario = sembrar(db, args.filas, "sin-login")
+    iniciar_servidor(PUERTO, 0, db)
+    usuario_id = usuario["id"]
+    gasto_id = ejecutar(supabase.table("gastos").select("id").eq("usuario_id", usuario_id).limit(1)).data[0]["id"]
+
+    comparar(
+        "construir consulta",
+        lambda: supabase.table("gastos").select("*").eq("id", gasto_id).eq("usuario_id", usuario_id),
+        lambda: gastos.consulta(usuario_id).eq("id", gasto_id),
+        args.repeticiones, 200,
+    )
+
+    instantanea = ConsultaInstantanea([{"id": gasto_id}])
+    comparar(
+        "ejecutar sin red",
+        lambda: ejecutar(instantanea, idempotente=True),
+        lambda: gastos._ejecutar("obtener", instantanea, idempotente=True),
+        args.repeticiones, 200,
+    )
+
+    def obtener_a_mano():
+        result = ejecutar(supabase.table("gastos").select("*").eq("id", gasto_id).eq("usuario_id", usuario_id),
+                          idempotente=True)
+        return result.data[0]
+
+    vueltas = max(args.repeticiones // 10, 20)
+    comparar("obtener por id", obtener_a_mano, lambda: gastos.obtener(usuario_id, gasto_id), vueltas, 5)
+    comparar(
+        "listar página de 50",
+        lambda: ejecutar(supabase.table("gastos").select("*").eq("usuario_id", usuario_id).order("id")
+                         .limit(50).offset(0), idempotente=True).data,
+        lambda: gastos.listar(usuario_id, 50, 0),
+        vueltas, 5,
+    )
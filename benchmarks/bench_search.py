@@ -0,0 +1,100 @@
+"""
+Latencia de la búsqueda de movimientos según el tamaño del historial.
+
+Construye en proceso el índice invertido de un usuario con N gastos e
+ingresos sintéticos y mide p50/p99 de consultas por prefijo, comparado con
+el filtrado lineal que hacían los clientes sobre la lista completa.
+
+Uso:
+    python benchmarks/bench_search.py --tamanos 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# El módulo crea el cliente de Supabase al importarse; aquí nunca se usa
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.firma")
+
+from src.services.search_service import IndiceUsuario, normalizar, tokenizar  # noqa: E402
+
+CATEGORIAS = ["Alimentación", "Transporte", "Educación", "Salud", "Entretenimiento", "Hogar", "Tecnología"]
+NOMBRES = ["Farmacia San Pablo", "Café Ñandú", "Súper Económico", "Gasolinera Pemex", "Librería Gandhi",
+           "Cine Cinépolis", "Renta departamento", "Mercado orgánico", "Óptica Visión", "Panadería La Espiga"]
+FUENTES = ["Nómina", "Freelance diseño", "Venta artículos", "Intereses bancarios", "Reembolso médico"]
+PALABRAS = ["semanal", "mensual", "urgente", "compartido", "tarjeta", "efectivo", "descuento", "promoción"]
+CONSULTAS = ["farm", "cafe", "economico nomina", "gasol", "semanal tarj", "salud", "reemb medico", "xyz"]
+
+
+def generar(n: int, semilla: int = 7):
+    rnd = random.Random(semilla)
+    filas = []
+    for i in range(n):
+        descripcion = " ".join(rnd.sample(PALABRAS, 2))
+        if rnd.random() < 0.8:
+            filas.append(("gastos", {"id": f"g{i}", "monto": rnd.randint(10, 5000), "fecha": f"2025-{rnd.randint(1, 12):02d}-01",
+                                     "nombre_gasto": rnd.choice(NOMBRES), "descripcion": descripcion,
+                                     "categoria": rnd.choice(CATEGORIAS)}))
+        else:
+            filas.append(("ingresos", {"id": f"i{i}", "monto": rnd.randint(100, 50000), "fecha": f"2025-{rnd.randint(1, 12):02d}-15",
+                                       "nombre_fuente": rnd.choice(FUENTES), "descripcion": descripcion,
+                                       "concepto": rnd.choice(["Salario", "Extra"])}))
+    return filas
+
+
+def lineal(filas, consulta):
+    terminos = tokenizar(consulta)
+    resultado = []
+    for tipo, fila in filas:
+        palabras = set()
+        for campo in ("nombre_gasto", "nombre_fuente", "descripcion", "categoria", "concepto"):
+            if fila.get(campo):
+                palabras |= set(normalizar(fila[campo]).split())
+        if all(any(p.startswith(t) for p in palabras) for t in terminos):
+            resultado.append(fila)
+    return resultado
+
+
+def percentiles(muestras):
+    muestras = sorted(muestras)
+    return statistics.median(muestras), muestras[int(len(muestras) * 0.99) - 1]
+
+
+def medir(n: int, repeticiones: int):
+    filas = generar(n)
+    inicio = time.perf_counter()
+    indice = IndiceUsuario()
+    for tipo, fila in filas:
+        indice.agregar(tipo, fila)
+    construccion = time.perf_counter() - inicio
+
+    tiempos = []
+    for _ in range(repeticiones):
+        for consulta in CONSULTAS:
+            t0 = time.perf_counter()
+            indice.buscar(tokenizar(consulta), ("gastos", "ingresos"))
+            tiempos.append((time.perf_counter() - t0) * 1000)
+    p50, p99 = percentiles(tiempos)
+
+    t0 = time.perf_counter()
+    for consulta in CONSULTAS:
+        lineal(filas, consulta)
+    lineal_ms = (time.perf_counter() - t0) * 1000 / len(CONSULTAS)
+
+    print(f"{n:>8} filas  construcción {construccion * 1000:8.1f} ms  ~{indice.bytes / 1e6:6.1f} MB  "
+          f"búsqueda p50 {p50:7.3f} ms  p99 {p99:7.3f} ms  (lineal {lineal_ms:8.2f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+    for tamano in args.tamanos:
+        medir(tamano, args.repeticiones)
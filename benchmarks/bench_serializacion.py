@@ -0,0 +1,141 @@
+"""
+Costo de armar el cuerpo de la respuesta, por fila, antes y después de la
+ruta rápida de src/core/serializacion.py.
+
+Para cada recurso se generan N filas como las devuelve PostgREST y se mide:
+  - antes:   lo que hace FastAPI con el valor que devuelve la ruta
+             (`serialize_response`: jsonable_encoder para los dicts sin
+             modelo, validación + volcado para los `response_model`) y
+             después `JSONResponse.render` (json.dumps);
+  - validado: TypeAdapter precompilado + orjson
+             (SERIALIZATION_TRUST_UPSTREAM=false; solo recursos con modelo);
+  - después: `respuesta(...)` con orjson, sin revalidar.
+Antes de medir se comprueba que los dos caminos producen el mismo JSON.
+
+El reporte es un solo objeto: se informa el costo por respuesta.
+
+Uso:
+    python benchmarks/bench_serializacion.py --filas 1000 --repeticiones 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Ningún import de este benchmark usa Supabase; se fija por si alguno crea el cliente
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.firma")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from src.core.serializacion import a_json, adaptador, filas_respuesta, respuesta  # noqa: E402
+from src.schemas.plan_gestion_schemas import PlanGestionResp  # noqa: E402
+from src.schemas.report_schemas import Periodo, ReporteRangoResp  # noqa: E402
+
+CATEGORIAS = ["Alimentación", "Transporte", "Vivienda", "Salud", "Ocio", "Educación", "Servicios"]
+
+
+def _marca(rnd) -> str:
+    return (datetime(2025, 1, 1) + timedelta(seconds=rnd.randrange(50_000_000))).isoformat() + "+00:00"
+
+
+def generar(recurso: str, n: int, semilla: int = 3) -> List[dict]:
+    rnd = random.Random(semilla)
+    usuario_id = str(uuid.UUID(int=rnd.getrandbits(128)))
+    filas = []
+    for i in range(n):
+        fecha = (date(2024, 1, 1) + timedelta(days=rnd.randrange(900))).isoformat()
+        base = {"usuario_id": usuario_id, "creado_en": _marca(rnd), "actualizado_en": _marca(rnd)}
+        if recurso == "gastos":
+            base.update(id=str(uuid.UUID(int=rnd.getrandbits(128))), categoria=rnd.choice(CATEGORIAS),
+                        nombre_gasto=f"Gasto {i}", monto=round(rnd.uniform(1, 900), 2), fecha=fecha,
+                        descripcion=rnd.choice([None, "Pago con tarjeta"]), regla_id=None)
+        elif recurso == "ingresos":
+            base.update(id=str(uuid.UUID(int=rnd.getrandbits(128))), concepto="Salario",
+                        nombre_fuente=f"Fuente {i}", monto=round(rnd.uniform(100, 5000), 2), fecha=fecha,
+                        descripcion=None, regla_id=None)
+        elif recurso == "planes_ahorro":
+            base.update(id=str(uuid.UUID(int=rnd.getrandbits(128))), nombre_plan=f"Plan {i}",
+                        monto_objetivo=round(rnd.uniform(100, 10_000), 2), fecha_inicio=fecha,
+                        fecha_fin="2027-12-31", descripcion=None)
+        else:
+            base.update(id=1000 + i, categoria=rnd.choice(CATEGORIAS), monto_limite=round(rnd.uniform(50, 900), 2),
+                        fecha_inicio=fecha, fecha_fin="2027-12-31", descripcion=None)
+        filas.append(base)
+    return filas
+
+
+def medir(funcion, repeticiones: int) -> float:
+    """Mediana en µs de `funcion()`."""
+    funcion()
+    muestras = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter_ns()
+        funcion()
+        muestras.append((time.perf_counter_ns() - inicio) / 1000)
+    return statistics.median(muestras)
+
+
+def imprimir(nombre: str, divisor: int, unidad: str, antes: float, despues: float, validado: float = None) -> None:
+    linea = f"{nombre:<16} antes {antes / divisor:9.2f}  "
+    if validado is not None:
+        linea += f"validado {validado / divisor:9.2f}  "
+    else:
+        linea += " " * 20
+    print(linea + f"después {despues / divisor:9.2f}  µs/{unidad}   x{antes / despues:5.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=1000)
+    parser.add_argument("--repeticiones", type=int, default=30)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+
+    def fastapi_antes(contenido, campo=None) -> bytes:
+        valor = loop.run_until_complete(serialize_response(field=campo, response_content=contenido))
+        return JSONResponse(valor).body
+
+    print(f"{args.filas} filas por respuesta, mediana de {args.repeticiones} repeticiones\n")
+
+    for recurso in ("gastos", "ingresos", "planes_ahorro"):
+        contenido = {"message": "Obtenidos", "data": generar(recurso, args.filas)}
+        assert json.loads(fastapi_antes(contenido)) == json.loads(respuesta(contenido).body)
+        imprimir(recurso, args.filas, "fila",
+                 medir(lambda: fastapi_antes(contenido), args.repeticiones),
+                 medir(lambda: respuesta(contenido).body, args.repeticiones))
+
+    filas = generar("plan_gestion", args.filas)
+    campo = create_response_field("respuesta", List[PlanGestionResp], mode="serialization")
+    tipo = adaptador(PlanGestionResp)
+    assert json.loads(fastapi_antes(filas, campo)) == json.loads(a_json(filas_respuesta(PlanGestionResp, filas)))
+    imprimir("plan_gestion", args.filas, "fila",
+             medir(lambda: fastapi_antes(filas, campo), args.repeticiones),
+             medir(lambda: respuesta(filas_respuesta(PlanGestionResp, filas)).body, args.repeticiones),
+             medir(lambda: respuesta(tipo.dump_python(tipo.validate_python(filas), mode="json")).body,
+                   args.repeticiones))
+
+    totales = {"total_ingresos": 5230.5, "total_gastos": 3120.25, "total_ahorro": 2110.25, "balance": 2110.25}
+    inicio, fin = date(2025, 1, 1), date(2025, 12, 31)
+    campo_reporte = create_response_field("respuesta", ReporteRangoResp, mode="serialization")
+    assert json.loads(fastapi_antes(ReporteRangoResp(periodo=Periodo(inicio=inicio, fin=fin), **totales),
+                                    campo_reporte)) == json.loads(a_json({"periodo": {"inicio": inicio, "fin": fin},
+                                                                          **totales}))
+    imprimir("reporte", 1, "resp",
+             medir(lambda: fastapi_antes(ReporteRangoResp(periodo=Periodo(inicio=inicio, fin=fin), **totales),
+                                         campo_reporte), args.repeticiones * 20),
+             medir(lambda: respuesta({"periodo": {"inicio": inicio, "fin": fin}, **totales}).body,
+                   args.repeticiones * 20))
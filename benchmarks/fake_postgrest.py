@@ -0,0 +1,306 @@
+"""
+Servidor PostgREST falso para benchmarks.
+
+Implementa el subconjunto de la API REST de Supabase que usa el backend
+(select, filtros eq/gt/gte/lt/lte/in, order, limit/offset, insert, update,
+upsert y delete) sobre tablas en memoria, con latencia configurable por
+petición para simular la red hacia Supabase.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+BENCH_EMAIL = "bench@fintrack.io"
+BENCH_PASSWORD = "benchmark-password"
+
+CATEGORIAS = ["Alimentación", "Transporte", "Vivienda", "Salud", "Ocio", "Educación", "Servicios"]
+CONCEPTOS = ["Salario", "Freelance", "Inversiones", "Regalo"]
+
+
+def _convertir(valor: str):
+    """Convierte un literal de filtro PostgREST a un valor comparable."""
+    if valor == "null":
+        return None
+    if valor in ("true", "false"):
+        return valor == "true"
+    try:
+        return int(valor)
+    except ValueError:
+        pass
+    try:
+        return float(valor)
+    except ValueError:
+        return valor
+
+
+# Tablas con id bigserial; el resto usa UUID
+TABLAS_SERIAL = ("plan_gestion", "eliminaciones", "resumen_mensual")
+# Tablas con la marca `actualizado_en` que en Supabase mantienen un DEFAULT y
+# un trigger (sql/002 y sql/003)
+TABLAS_CON_MARCA = ("gastos", "ingresos", "planes_ahorro", "plan_gestion")
+
+
+def _comparable(valor):
+    """Normaliza valores para comparar números con números y texto con texto."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return (0, valor)
+    return (1, str(valor))
+
+
+def _cumple(fila: dict, columna: str, expresion: str) -> bool:
+    operador, _, literal = expresion.partition(".")
+    actual = fila.get(columna)
+    if operador == "is":
+        return actual is None if literal == "null" else actual == _convertir(literal)
+    if operador == "in":
+        opciones = [o.strip().strip('"') for o in literal.strip("()").split(",") if o]
+        return str(actual) in opciones
+    if actual is None:
+        return False
+    esperado = _convertir(literal)
+    a, b = _comparable(actual), _comparable(esperado)
+    if operador == "eq":
+        return str(actual) == literal or a == b
+    if operador == "neq":
+        return not (str(actual) == literal or a == b)
+    if operador == "gt":
+        return a > b
+    if operador == "gte":
+        return a >= b
+    if operador == "lt":
+        return a < b
+    if operador == "lte":
+        return a <= b
+    return True
+
+
+class BaseDatosFalsa:
+    """Tablas en memoria protegidas por un candado global."""
+
+    def __init__(self):
+        self.tablas = {}
+        self.lock = threading.Lock()
+        self.secuencia = 1000
+
+    def siguiente_id(self) -> int:
+        self.secuencia += 1
+        return self.secuencia
+
+    def filtrar(self, tabla: str, filtros: list) -> list:
+        filas = self.tablas.setdefault(tabla, [])
+        return [f for f in filas if all(_cumple(f, c, e) for c, e in filtros)]
+
+
+class ManejadorPostgREST(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    db: BaseDatosFalsa = None
+    latencia: float = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    # ---------- utilidades ----------
+    def _parsear(self):
+        url = urlparse(self.path)
+        partes = url.path.strip("/").split("/")
+        tabla = partes[2] if len(partes) >= 3 and partes[0] == "rest" else None
+        params = parse_qsl(url.query, keep_blank_values=True)
+        return tabla, params
+
+    def _cuerpo(self):
+        largo = int(self.headers.get("Content-Length") or 0)
+        if not largo:
+            return None
+        return json.loads(self.rfile.read(largo))
+
+    def _responder(self, estado: int, datos):
+        cuerpo = json.dumps(datos, default=str).encode()
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _dividir(self, params):
+        filtros, opciones = [], {}
+        for clave, valor in params:
+            if clave in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                opciones[clave] = valor
+            else:
+                filtros.append((clave, valor))
+        return filtros, opciones
+
+    @staticmethod
+    def _proyectar(filas, select):
+        if not select or select.strip() == "*":
+            return filas
+        columnas = [c.strip() for c in select.split(",")]
+        return [{c: f.get(c) for c in columnas} for f in filas]
+
+    # ---------- verbos ----------
+    def do_GET(self):
+        time.sleep(self.latencia)
+        # El cliente de postgrest envía un cuerpo "{}" incluso en GET; hay que
+        # consumirlo para no corromper la conexión keep-alive.
+        self._cuerpo()
+        tabla, params = self._parsear()
+        filtros, opciones = self._dividir(params)
+        with self.db.lock:
+            filas = self.db.filtrar(tabla, filtros)
+        if "order" in opciones:
+            for criterio in reversed(opciones["order"].split(",")):
+                columna, _, direccion = criterio.partition(".")
+                filas = sorted(
+                    filas,
+                    key=lambda f: _comparable(f.get(columna) or ""),
+                    reverse=direccion.startswith("desc"),
+                )
+        inicio = int(opciones.get("offset", 0))
+        if "limit" in opciones:
+            filas = filas[inicio:inicio + int(opciones["limit"])]
+        elif inicio:
+            filas = filas[inicio:]
+        self._responder(200, self._proyectar(filas, opciones.get("select")))
+
+    def do_POST(self):
+        time.sleep(self.latencia)
+        tabla, params = self._parsear()
+        _, opciones = self._dividir(params)
+        cuerpo = self._cuerpo()
+        registros = cuerpo if isinstance(cuerpo, list) else [cuerpo]
+        prefer = self.headers.get("Prefer", "")
+        conflicto = [c for c in opciones.get("on_conflict", "").split(",") if c]
+        creados = []
+        with self.db.lock:
+            filas = self.db.tablas.setdefault(tabla, [])
+            for registro in registros:
+                registro = dict(registro)
+                if conflicto:
+                    existente = next(
+                        (f for f in filas if all(str(f.get(c)) == str(registro.get(c)) for c in conflicto)),
+                        None,
+                    )
+                    if existente is not None:
+                        if "resolution=merge-duplicates" in prefer:
+                            existente.update(registro)
+                            creados.append(existente)
+                        continue
+                if tabla == "usuarios" and any(f.get("correo") == registro.get("correo") for f in filas):
+                    self._responder(409, {"code": "23505", "message": "duplicate key value violates unique constraint"})
+                    return
+                registro.setdefault("id", self.db.siguiente_id() if tabla in TABLAS_SERIAL else str(uuid.uuid4()))
+                registro.setdefault("creado_en", datetime.utcnow().isoformat())
+                if tabla in TABLAS_CON_MARCA:
+                    registro["actualizado_en"] = datetime.utcnow().isoformat()
+                filas.append(registro)
+                creados.append(registro)
+        self._responder(201, creados)
+
+    def do_PATCH(self):
+        time.sleep(self.latencia)
+        tabla, params = self._parsear()
+        filtros, _ = self._dividir(params)
+        cambios = self._cuerpo() or {}
+        with self.db.lock:
+            filas = self.db.filtrar(tabla, filtros)
+            for fila in filas:
+                fila.update(cambios)
+                if tabla in TABLAS_CON_MARCA:
+                    fila["actualizado_en"] = datetime.utcnow().isoformat()
+        self._responder(200, filas)
+
+    def do_DELETE(self):
+        time.sleep(self.latencia)
+        self._cuerpo()
+        tabla, params = self._parsear()
+        filtros, _ = self._dividir(params)
+        with self.db.lock:
+            borradas = self.db.filtrar(tabla, filtros)
+            ids = {id(f) for f in borradas}
+            self.db.tablas[tabla] = [f for f in self.db.tablas.get(tabla, []) if id(f) not in ids]
+        self._responder(200, borradas)
+
+
+def sembrar(db: BaseDatosFalsa, filas: int, password_hash: str, usuarios: int = 1) -> dict:
+    """
+    Genera un conjunto de datos sintético: un usuario de benchmark con
+    `filas` gastos y `filas` ingresos, algunos planes, y usuarios de relleno.
+    Devuelve el registro del usuario de benchmark.
+    """
+    hoy = date.today()
+    usuario = {
+        "id": str(uuid.uuid4()),
+        "nombre": "Usuario Benchmark",
+        "correo": BENCH_EMAIL,
+        "password": password_hash,
+        "fecha_registro": datetime.utcnow().isoformat(),
+    }
+    db.tablas["usuarios"] = [usuario] + [
+        {"id": str(uuid.uuid4()), "nombre": f"Relleno {i}", "correo": f"relleno{i}@fintrack.io",
+         "password": password_hash, "fecha_registro": datetime.utcnow().isoformat()}
+        for i in range(usuarios - 1)
+    ]
+    db.tablas["gastos"] = [
+        {"id": str(uuid.uuid4()), "usuario_id": usuario["id"],
+         "categoria": CATEGORIAS[i % len(CATEGORIAS)], "nombre_gasto": f"Gasto {i}",
+         "monto": round(5 + (i * 37 % 500) + (i % 100) / 100, 2),
+         "fecha": (hoy - timedelta(days=i % 730)).isoformat(), "descripcion": None,
+         "actualizado_en": datetime.utcnow().isoformat()}
+        for i in range(filas)
+    ]
+    db.tablas["ingresos"] = [
+        {"id": str(uuid.uuid4()), "usuario_id": usuario["id"],
+         "concepto": CONCEPTOS[i % len(CONCEPTOS)], "nombre_fuente": f"Fuente {i}",
+         "monto": round(50 + (i * 53 % 2000) + (i % 100) / 100, 2),
+         "fecha": (hoy - timedelta(days=i % 730)).isoformat(), "descripcion": None,
+         "actualizado_en": datetime.utcnow().isoformat()}
+        for i in range(filas)
+    ]
+    db.tablas["planes_ahorro"] = [
+        {"id": str(uuid.uuid4()), "usuario_id": usuario["id"], "nombre_plan": f"Plan {i}",
+         "monto_objetivo": 1000.0 * (i + 1), "fecha_inicio": (hoy - timedelta(days=30 * i)).isoformat(),
+         "fecha_fin": (hoy + timedelta(days=90 + 30 * i)).isoformat(), "descripcion": None,
+         "creado_en": datetime.utcnow().isoformat(), "actualizado_en": datetime.utcnow().isoformat()}
+        for i in range(5)
+    ]
+    db.tablas["plan_gestion"] = [
+        {"id": db.siguiente_id(), "usuario_id": usuario["id"], "categoria": CATEGORIAS[i % len(CATEGORIAS)],
+         "monto_limite": 500.0 + 100 * i, "fecha_inicio": (hoy - timedelta(days=15 * i)).isoformat(),
+         "fecha_fin": (hoy + timedelta(days=60)).isoformat(), "descripcion": None,
+         "actualizado_en": datetime.utcnow().isoformat()}
+        for i in range(5)
+    ]
+    return usuario
+
+
+def iniciar_servidor(puerto: int, latencia_ms: float, db: BaseDatosFalsa) -> ThreadingHTTPServer:
+    """Arranca el servidor falso en un hilo de fondo y lo devuelve."""
+    manejador = type("Manejador", (ManejadorPostgREST,), {"db": db, "latencia": latencia_ms / 1000})
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PostgREST falso para pruebas de carga")
+    parser.add_argument("--puerto", type=int, default=54321)
+    parser.add_argument("--latencia-ms", type=float, default=5.0)
+    parser.add_argument("--filas", type=int, default=1000)
+    args = parser.parse_args()
+
+    from passlib.context import CryptContext
+
+    base = BaseDatosFalsa()
+    sembrar(base, args.filas, CryptContext(schemes=["bcrypt"]).hash(BENCH_PASSWORD))
+    srv = iniciar_servidor(args.puerto, args.latencia_ms, base)
+    print(f"🧪 PostgREST falso en http://127.0.0.1:{args.puerto} ({args.filas} filas, {args.latencia_ms} ms)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        srv.shutdown()
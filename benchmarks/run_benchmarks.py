@@ -0,0 +1,216 @@
+"""
+Suite de carga y latencia del API.
+
+Levanta un PostgREST falso (ver fake_postgrest.py), arranca la aplicación con
+uvicorn apuntando a él y ejecuta cada escenario con concurrencia fija.
+Reporta throughput y percentiles p50/p95/p99 y los compara contra una línea
+base guardada para que las regresiones de rendimiento sean visibles.
+
+Uso:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --filas 5000 --latencia-ms 10
+    python benchmarks/run_benchmarks.py --guardar-linea-base
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+import requests
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_postgrest import BENCH_EMAIL, BENCH_PASSWORD, BaseDatosFalsa, iniciar_servidor, sembrar  # noqa: E402
+
+LINEA_BASE = Path(__file__).resolve().parent / "baseline.json"
+SECRET_KEY = "benchmark-secret"
+ALGORITHM = "HS256"
+# Clave con forma de JWT para pasar la validación de create_client
+SUPABASE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.firma"
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    f = int(k)
+    c = min(f + 1, len(ordenados) - 1)
+    return ordenados[f] + (ordenados[c] - ordenados[f]) * (k - f)
+
+
+def escenarios(usuario_id: str) -> list:
+    """
+    Escenarios por router. `token` indica qué claim `sub` espera cada ruta:
+    las rutas de gastos/ingresos/plan-ahorro resuelven el usuario por correo,
+    plan-gestion y reporte usan directamente el id.
+    """
+    hoy = date.today()
+    inicio = (hoy - timedelta(days=30)).isoformat()
+    return [
+        {"nombre": "auth_login", "metodo": "POST", "ruta": "/auth/login", "token": None,
+         "json": {"correo": BENCH_EMAIL, "password": BENCH_PASSWORD}},
+        {"nombre": "gastos_listar", "metodo": "GET", "ruta": "/gastos/", "token": "correo"},
+        {"nombre": "ingresos_listar", "metodo": "GET", "ruta": "/ingresos/", "token": "correo"},
+        {"nombre": "plan_ahorro_listar", "metodo": "GET", "ruta": "/plan-ahorro/", "token": "correo"},
+        {"nombre": "plan_gestion_listar", "metodo": "GET", "ruta": "/api/plan-gestion/", "token": "id"},
+        {"nombre": "reporte_mes", "metodo": "GET", "ruta": f"/api/reporte?inicio={inicio}&fin={hoy.isoformat()}",
+         "token": "id"},
+    ]
+
+
+def ejecutar_escenario(base_url: str, escenario: dict, tokens: dict, concurrencia: int, peticiones: int) -> dict:
+    """Lanza `peticiones` solicitudes repartidas en `concurrencia` hilos."""
+    cabeceras = {}
+    if escenario["token"]:
+        cabeceras["Authorization"] = f"Bearer {tokens[escenario['token']]}"
+    por_hilo = max(1, peticiones // concurrencia)
+
+    def trabajador(_):
+        sesion = requests.Session()
+        latencias, errores = [], 0
+        for _ in range(por_hilo):
+            t0 = time.perf_counter()
+            r = sesion.request(escenario["metodo"], base_url + escenario["ruta"],
+                               headers=cabeceras, json=escenario.get("json"))
+            latencias.append((time.perf_counter() - t0) * 1000)
+            if r.status_code >= 400:
+                errores += 1
+        return latencias, errores
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+        resultados = list(pool.map(trabajador, range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    latencias = [l for lat, _ in resultados for l in lat]
+    return {
+        "peticiones": len(latencias),
+        "errores": sum(e for _, e in resultados),
+        "rps": round(len(latencias) / duracion, 1),
+        "p50_ms": round(percentil(latencias, 50), 2),
+        "p95_ms": round(percentil(latencias, 95), 2),
+        "p99_ms": round(percentil(latencias, 99), 2),
+    }
+
+
+def comparar(resultados: dict, linea_base: dict, tolerancia: float) -> list:
+    """Devuelve los escenarios cuyo p95 o throughput empeoró más que la tolerancia."""
+    regresiones = []
+    for nombre, actual in resultados.items():
+        previo = linea_base.get(nombre)
+        if not previo:
+            continue
+        if actual["p95_ms"] > previo["p95_ms"] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {previo['p95_ms']} → {actual['p95_ms']} ms")
+        if actual["rps"] < previo["rps"] * (1 - tolerancia):
+            regresiones.append(f"{nombre}: rps {previo['rps']} → {actual['rps']}")
+    return regresiones
+
+
+def esperar_puerto(puerto: int, limite: float = 30.0) -> None:
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            with socket.create_connection(("127.0.0.1", puerto), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"La aplicación no respondió en el puerto {puerto}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga del API FINTRACK")
+    parser.add_argument("--filas", type=int, default=1000, help="Gastos e ingresos sembrados")
+    parser.add_argument("--latencia-ms", type=float, default=5.0, help="Latencia simulada de Supabase")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--peticiones", type=int, default=400, help="Peticiones por escenario")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn")
+    parser.add_argument("--solo", nargs="*", help="Ejecutar solo estos escenarios")
+    parser.add_argument("--tolerancia", type=float, default=0.20, help="Regresión tolerada (0.20 = 20%%)")
+    parser.add_argument("--guardar-linea-base", action="store_true")
+    args = parser.parse_args()
+
+    from jose import jwt
+    from passlib.context import CryptContext
+
+    db = BaseDatosFalsa()
+    usuario = sembrar(db, args.filas, CryptContext(schemes=["bcrypt"]).hash(BENCH_PASSWORD))
+    puerto_db, puerto_app = puerto_libre(), puerto_libre()
+    servidor_db = iniciar_servidor(puerto_db, args.latencia_ms, db)
+
+    entorno = {
+        **os.environ,
+        "SUPABASE_URL": f"http://127.0.0.1:{puerto_db}",
+        "SUPABASE_KEY": SUPABASE_KEY,
+        "SECRET_KEY": SECRET_KEY,
+        "ALGORITHM": ALGORITHM,
+        # El rate limiter queda activo (se mide su costo) pero sin rechazar la carga sintética
+        "RATE_LIMIT_USER_CAPACITY": "1e12",
+        "RATE_LIMIT_IP_CAPACITY": "1e12",
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto_app),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL,
+    )
+    try:
+        esperar_puerto(puerto_app)
+        tokens = {
+            "correo": jwt.encode({"sub": BENCH_EMAIL}, SECRET_KEY, algorithm=ALGORITHM),
+            "id": jwt.encode({"sub": usuario["id"]}, SECRET_KEY, algorithm=ALGORITHM),
+        }
+        base_url = f"http://127.0.0.1:{puerto_app}"
+        resultados = {}
+        print(f"{'escenario':<22}{'reqs':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for esc in escenarios(usuario["id"]):
+            if args.solo and esc["nombre"] not in args.solo:
+                continue
+            # Calentamiento para no medir imports perezosos ni conexiones nuevas
+            ejecutar_escenario(base_url, esc, tokens, 1, 3)
+            r = ejecutar_escenario(base_url, esc, tokens, args.concurrencia, args.peticiones)
+            resultados[esc["nombre"]] = r
+            print(f"{esc['nombre']:<22}{r['peticiones']:>7}{r['errores']:>6}{r['rps']:>9}"
+                  f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+    finally:
+        app.terminate()
+        app.wait(timeout=10)
+        servidor_db.shutdown()
+
+    parametros = {"filas": args.filas, "latencia_ms": args.latencia_ms,
+                  "concurrencia": args.concurrencia, "workers": args.workers}
+    if args.guardar_linea_base:
+        LINEA_BASE.write_text(json.dumps({"parametros": parametros, "resultados": resultados}, indent=2) + "\n")
+        print(f"💾 Línea base guardada en {LINEA_BASE}")
+        return 0
+
+    if not LINEA_BASE.exists():
+        print("ℹ️  No hay línea base; ejecuta con --guardar-linea-base para crearla")
+        return 0
+    guardada = json.loads(LINEA_BASE.read_text())
+    if guardada.get("parametros") != parametros:
+        print(f"⚠️  Parámetros distintos a la línea base ({guardada.get('parametros')}); comparación orientativa")
+    regresiones = comparar(resultados, guardada.get("resultados", {}), args.tolerancia)
+    for linea in regresiones:
+        print(f"❌ Regresión {linea}")
+    if not regresiones:
+        print("✅ Sin regresiones respecto a la línea base")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -10,11 +10,44 @@ from src.routes.gastos_routes import router as gastos_router
 from src.routes.plan_ahorro_routes import router as plan_ahorro_router
 from src.routes.report_routes import router as report_router
 from src.routes.plan_gestion_routes import router as plan_gestion_router  # 👈 NUEVO
+from src.routes.debug_routes import router as debug_router
+from src.routes.metrics_routes import router as metrics_router
+from src.routes.search_routes import router as search_router
+from src.routes.analytics_routes import router as analytics_router
+from src.routes.sync_routes import router as sync_router
+from src.routes.forecast_routes import router as forecast_router
+from src.routes.dashboard_routes import router as dashboard_router
+from src.routes.archive_routes import router as archive_router
+from src.routes.recurrente_routes import router as recurrente_router
 
 # --- Middleware de autenticación ---
 from src.middleware.auth_middleware import verify_token
+from src.middleware.profiler_middleware import ProfilerMiddleware
+from src.middleware.deadline_middleware import DeadlineMiddleware
+from src.middleware.rate_limit_middleware import RateLimitMiddleware
+from src.middleware.idempotency_middleware import IdempotencyMiddleware
+from src.core.config import settings
+from src.services.email_index_service import indice_correos
+from src.services.purge_service import purgas
+from src.services.archive_service import archivador
+from src.services.recurrente_service import recurrentes
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precarga del índice de correos sin bloquear el arranque
+    if settings.EMAIL_INDEX_ENABLED:
+        indice_correos.precargar_en_segundo_plano()
+    # Reanuda las purgas de usuarios que quedaron a medias
+    purgas.iniciar()
+    # Archivado periódico de movimientos viejos (desactivado por defecto)
+    if settings.ARCHIVE_ENABLED:
+        archivador.iniciar()
+    # Movimientos recurrentes: recupera lo vencido al arrancar y luego materializa periódicamente
+    if settings.RECURRING_ENABLED:
+        recurrentes.iniciar()
+    yield
 
-app = FastAPI(title="API Gestión de Gastos", version="2.0.0")
+app = FastAPI(title="API Gestión de Gastos", version="2.0.0", lifespan=lifespan)
 
 origins = [
     "http://127.0.0.1:5501",
@@ -22,6 +55,14 @@ origins = [
     "http://localhost:3000",   # 👈 agrega aquí tu frontend si usas React, Next.js, etc.
 ]
 
+# Idempotency-Key en las creaciones (el más interno: las repeticiones también pasan por el rate limit)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(IdempotencyMiddleware)
+
+# Rate limiting por usuario e IP (dentro de CORS para que los 429 lleven sus cabeceras)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,        # Dominios permitidos
@@ -30,6 +71,13 @@ app.add_middleware(
     allow_headers=["*"],          # Permitir todos los encabezados
 )
 
+# Presupuesto de tiempo por petición para las llamadas a Supabase
+app.add_middleware(DeadlineMiddleware)
+
+# Profiler de muestreo: solo se monta si está habilitado (costo cero si no)
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
 print("📦 Registrando routers...")
 
 app.include_router(usuarios_router)
@@ -39,6 +87,16 @@ app.include_router(gastos_router)
 app.include_router(plan_ahorro_router)
 app.include_router(report_router)
 app.include_router(plan_gestion_router)  # 👈 Nuevo módulo: Plan de Gestión de Gastos
+app.include_router(search_router)
+app.include_router(analytics_router)
+app.include_router(sync_router)
+app.include_router(forecast_router)
+app.include_router(dashboard_router)
+app.include_router(archive_router)
+app.include_router(recurrente_router)
+app.include_router(metrics_router)
+if settings.PROFILER_ENABLED:
+    app.include_router(debug_router)
 
 print("✅ Routers registrados correctamente")
 
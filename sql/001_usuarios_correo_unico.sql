@@ -0,0 +1,3 @@
+-- El registro confía en esta restricción como verificación definitiva de
+-- correos duplicados (el índice en memoria solo omite consultas previas).
+CREATE UNIQUE INDEX IF NOT EXISTS usuarios_correo_key ON usuarios (correo);
@@ -0,0 +1,23 @@
+-- Marca de última modificación en gastos e ingresos. El snapshot columnar
+-- del ledger (src/services/ledger_service.py) la usa como watermark para
+-- pedir solo las filas que cambiaron desde la última sincronización.
+ALTER TABLE gastos ADD COLUMN IF NOT EXISTS actualizado_en timestamptz NOT NULL DEFAULT now();
+ALTER TABLE ingresos ADD COLUMN IF NOT EXISTS actualizado_en timestamptz NOT NULL DEFAULT now();
+
+CREATE OR REPLACE FUNCTION marcar_actualizado_en() RETURNS trigger AS $$
+BEGIN
+    NEW.actualizado_en := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS gastos_actualizado_en ON gastos;
+CREATE TRIGGER gastos_actualizado_en BEFORE UPDATE ON gastos
+    FOR EACH ROW EXECUTE FUNCTION marcar_actualizado_en();
+
+DROP TRIGGER IF EXISTS ingresos_actualizado_en ON ingresos;
+CREATE TRIGGER ingresos_actualizado_en BEFORE UPDATE ON ingresos
+    FOR EACH ROW EXECUTE FUNCTION marcar_actualizado_en();
+
+CREATE INDEX IF NOT EXISTS gastos_usuario_actualizado_idx ON gastos (usuario_id, actualizado_en);
+CREATE INDEX IF NOT EXISTS ingresos_usuario_actualizado_idx ON ingresos (usuario_id, actualizado_en);
@@ -0,0 +1,29 @@
+-- Soporte de GET /sync: marca de modificación en los planes y lápidas de
+-- los registros borrados. Requiere 002 (función marcar_actualizado_en).
+ALTER TABLE planes_ahorro ADD COLUMN IF NOT EXISTS actualizado_en timestamptz NOT NULL DEFAULT now();
+ALTER TABLE plan_gestion ADD COLUMN IF NOT EXISTS actualizado_en timestamptz NOT NULL DEFAULT now();
+
+DROP TRIGGER IF EXISTS planes_ahorro_actualizado_en ON planes_ahorro;
+CREATE TRIGGER planes_ahorro_actualizado_en BEFORE UPDATE ON planes_ahorro
+    FOR EACH ROW EXECUTE FUNCTION marcar_actualizado_en();
+
+DROP TRIGGER IF EXISTS plan_gestion_actualizado_en ON plan_gestion;
+CREATE TRIGGER plan_gestion_actualizado_en BEFORE UPDATE ON plan_gestion
+    FOR EACH ROW EXECUTE FUNCTION marcar_actualizado_en();
+
+CREATE INDEX IF NOT EXISTS planes_ahorro_usuario_actualizado_idx ON planes_ahorro (usuario_id, actualizado_en);
+CREATE INDEX IF NOT EXISTS plan_gestion_usuario_actualizado_idx ON plan_gestion (usuario_id, actualizado_en);
+
+-- Una fila por registro borrado. Los clientes con un cursor más viejo que
+-- SYNC_TOMBSTONE_RETENTION_DAYS hacen una sincronización completa, así que
+-- las lápidas anteriores se pueden purgar:
+--   DELETE FROM eliminaciones WHERE creado_en < now() - interval '30 days';
+CREATE TABLE IF NOT EXISTS eliminaciones (
+    id bigserial PRIMARY KEY,
+    usuario_id uuid NOT NULL,
+    tabla text NOT NULL,
+    registro_id text NOT NULL,
+    creado_en timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS eliminaciones_usuario_id_idx ON eliminaciones (usuario_id, id);
@@ -0,0 +1,17 @@
+-- Archivo de movimientos viejos (src/services/archive_service.py): un
+-- resumen por usuario, tabla y mes archivado. El detalle de esos meses ya
+-- no está en gastos/ingresos sino en los archivos de ARCHIVE_DIR.
+CREATE TABLE IF NOT EXISTS resumen_mensual (
+    id bigserial PRIMARY KEY,
+    usuario_id uuid NOT NULL,
+    tabla text NOT NULL,
+    mes date NOT NULL,
+    total_centavos bigint NOT NULL,
+    cantidad integer NOT NULL,
+    actualizado_en timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (usuario_id, tabla, mes)
+);
+
+-- El archivado busca por usuario y fecha de corte
+CREATE INDEX IF NOT EXISTS gastos_usuario_fecha_idx ON gastos (usuario_id, fecha);
+CREATE INDEX IF NOT EXISTS ingresos_usuario_fecha_idx ON ingresos (usuario_id, fecha);
@@ -0,0 +1,39 @@
+-- Movimientos recurrentes (src/services/recurrente_service.py): cada regla
+-- genera un gasto o ingreso por ocurrencia. `proxima_fecha` es la próxima
+-- ocurrencia sin materializar (NULL cuando la regla ya terminó).
+CREATE TABLE IF NOT EXISTS reglas_recurrentes (
+    id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+    usuario_id uuid NOT NULL REFERENCES usuarios (id) ON DELETE CASCADE,
+    tipo text NOT NULL CHECK (tipo IN ('gastos', 'ingresos')),
+    categoria text NOT NULL,  -- categoría del gasto o concepto del ingreso
+    nombre text NOT NULL,  -- nombre_gasto o nombre_fuente
+    monto numeric(14, 2) NOT NULL CHECK (monto > 0),
+    descripcion text,
+    frecuencia text NOT NULL CHECK (frecuencia IN ('diaria', 'semanal', 'mensual', 'anual')),
+    intervalo integer NOT NULL DEFAULT 1 CHECK (intervalo > 0),
+    fecha_inicio date NOT NULL,
+    fecha_fin date,
+    proxima_fecha date,
+    activa boolean NOT NULL DEFAULT true,
+    creado_en timestamptz NOT NULL DEFAULT now(),
+    actualizado_en timestamptz NOT NULL DEFAULT now()
+);
+
+DROP TRIGGER IF EXISTS reglas_recurrentes_actualizado_en ON reglas_recurrentes;
+CREATE TRIGGER reglas_recurrentes_actualizado_en BEFORE UPDATE ON reglas_recurrentes
+    FOR EACH ROW EXECUTE FUNCTION marcar_actualizado_en();
+
+-- El materializador busca las reglas activas con ocurrencias vencidas
+CREATE INDEX IF NOT EXISTS reglas_recurrentes_pendientes_idx ON reglas_recurrentes (proxima_fecha, id)
+    WHERE activa;
+CREATE INDEX IF NOT EXISTS reglas_recurrentes_usuario_idx ON reglas_recurrentes (usuario_id);
+
+-- Cada ocurrencia se inserta una sola vez: los lotes usan
+-- ON CONFLICT (regla_id, fecha) DO NOTHING. Los movimientos cargados a mano
+-- tienen regla_id NULL y no chocan entre sí.
+ALTER TABLE gastos ADD COLUMN IF NOT EXISTS regla_id uuid REFERENCES reglas_recurrentes (id) ON DELETE SET NULL;
+ALTER TABLE ingresos ADD COLUMN IF NOT EXISTS regla_id uuid REFERENCES reglas_recurrentes (id) ON DELETE SET NULL;
+ALTER TABLE gastos DROP CONSTRAINT IF EXISTS gastos_regla_fecha_unica;
+ALTER TABLE gastos ADD CONSTRAINT gastos_regla_fecha_unica UNIQUE (regla_id, fecha);
+ALTER TABLE ingresos DROP CONSTRAINT IF EXISTS ingresos_regla_fecha_unica;
+ALTER TABLE ingresos ADD CONSTRAINT ingresos_regla_fecha_unica UNIQUE (regla_id, fecha);
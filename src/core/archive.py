@@ -0,0 +1,227 @@
+"""
+Archivos columnar comprimidos para movimientos archivados.
+
+Un archivo guarda los movimientos de un usuario, una tabla y un año,
+ordenados por fecha. Formato:
+
+    b"FTAR" | uint32 largo de la cabecera | cabecera JSON | columnas
+
+Cada columna se comprime con zlib por separado. `dia` (array int32 de días
+epoch) y `centavos` (array int64) van en binario little-endian; el resto de
+columnas (id, nombre, descripción, categoría...) como listas JSON. La
+cabecera lleva el número de filas, el rango de días y el offset y largo de
+cada columna. La lectura mapea el archivo con mmap y solo descomprime las
+columnas que se piden: un total por rango lee `dia` y `centavos` y nunca
+toca los textos.
+
+Los archivos viven en un almacén: por defecto un directorio local
+(ARCHIVE_DIR). Otro backend, como un bucket de objetos que descarga a una
+caché local, se agrega con `registrar_almacen(nombre, fabrica)` y se elige
+con ARCHIVE_BACKEND.
+"""
+import bisect
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.columnar import dia_epoch, fecha_de_dia
+from src.core.config import settings
+from src.core.money import a_centavos, a_monto, sumar_columna
+
+MAGIC = b"FTAR"
+VERSION = 1
+_NUMERICAS = {"dia": "i", "centavos": "q"}
+
+
+def _a_bytes(columna: array) -> bytes:
+    if sys.byteorder != "little":
+        columna = array(columna.typecode, columna)
+        columna.byteswap()
+    return columna.tobytes()
+
+
+def _de_bytes(tipo: str, datos: bytes) -> array:
+    columna = array(tipo)
+    columna.frombytes(datos)
+    if sys.byteorder != "little":
+        columna.byteswap()
+    return columna
+
+
+def codificar(filas: List[dict]) -> bytes:
+    """Serializa filas de gastos o ingresos (con `fecha` y `monto`) al formato de archivo."""
+    filas = sorted(filas, key=lambda f: (str(f["fecha"])[:10], str(f["id"])))
+    nombres = sorted({c for f in filas for c in f} - {"fecha", "monto"})
+    columnas = {
+        "dia": _a_bytes(array("i", (dia_epoch(f["fecha"]) for f in filas))),
+        "centavos": _a_bytes(array("q", (a_centavos(f.get("monto")) for f in filas))),
+    }
+    for nombre in nombres:
+        columnas[nombre] = json.dumps([f.get(nombre) for f in filas], default=str).encode()
+
+    cuerpo, indice, offset = [], {}, 0
+    for nombre, datos in columnas.items():
+        comprimido = zlib.compress(datos, 6)
+        indice[nombre] = {"tipo": _NUMERICAS.get(nombre, "json"), "offset": offset, "largo": len(comprimido)}
+        cuerpo.append(comprimido)
+        offset += len(comprimido)
+    cabecera = json.dumps({
+        "version": VERSION,
+        "filas": len(filas),
+        "desde": dia_epoch(filas[0]["fecha"]) if filas else None,
+        "hasta": dia_epoch(filas[-1]["fecha"]) if filas else None,
+        "columnas": indice,
+    }).encode()
+    return MAGIC + struct.pack("<I", len(cabecera)) + cabecera + b"".join(cuerpo)
+
+
+class ArchivoMovimientos:
+    """Lectura de un archivo mapeado en memoria; las columnas numéricas se descomprimen una vez."""
+
+    def __init__(self, ruta: str):
+        with open(ruta, "rb") as f:
+            self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mapa[:4] != MAGIC:
+            raise ValueError(f"{ruta} no es un archivo de movimientos")
+        largo = struct.unpack_from("<I", self._mapa, 4)[0]
+        self.cabecera = json.loads(self._mapa[8:8 + largo])
+        self._inicio = 8 + largo
+        self.filas = self.cabecera["filas"]
+        self._numericas: Dict[str, array] = {}
+        self._lock = threading.Lock()
+
+    def _crudo(self, nombre: str) -> Optional[bytes]:
+        columna = self.cabecera["columnas"].get(nombre)
+        if columna is None:
+            return None
+        inicio = self._inicio + columna["offset"]
+        return zlib.decompress(self._mapa[inicio:inicio + columna["largo"]])
+
+    def _numerica(self, nombre: str) -> array:
+        with self._lock:
+            if nombre not in self._numericas:
+                self._numericas[nombre] = _de_bytes(_NUMERICAS[nombre], self._crudo(nombre))
+            return self._numericas[nombre]
+
+    def _rango(self, inicio: Optional[date], fin: Optional[date]):
+        dias = self._numerica("dia")
+        desde = bisect.bisect_left(dias, dia_epoch(inicio)) if inicio else 0
+        hasta = bisect.bisect_right(dias, dia_epoch(fin)) if fin else len(dias)
+        return desde, hasta
+
+    def total_en_rango(self, inicio: date, fin: date) -> int:
+        """Total en centavos de las filas con fecha en [inicio, fin]."""
+        desde, hasta = self._rango(inicio, fin)
+        return sumar_columna(self._numerica("centavos")[desde:hasta])
+
+    def leer(self, inicio: Optional[date] = None, fin: Optional[date] = None) -> List[dict]:
+        """Filas completas con fecha en [inicio, fin], en orden de fecha."""
+        desde, hasta = self._rango(inicio, fin)
+        if desde >= hasta:
+            return []
+        dias, centavos = self._numerica("dia"), self._numerica("centavos")
+        textos = {n: json.loads(self._crudo(n))[desde:hasta]
+                  for n, c in self.cabecera["columnas"].items() if c["tipo"] == "json"}
+        filas = []
+        for i in range(hasta - desde):
+            fila = {n: valores[i] for n, valores in textos.items()}
+            fila["fecha"] = fecha_de_dia(dias[desde + i]).isoformat()
+            fila["monto"] = a_monto(centavos[desde + i])
+            filas.append(fila)
+        return filas
+
+
+class AlmacenLocal:
+    """Archivos en un directorio del disco; las escrituras son atómicas (temporal + rename)."""
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+
+    def ruta_local(self, nombre: str) -> Optional[str]:
+        ruta = os.path.join(self.raiz, nombre)
+        return ruta if os.path.exists(ruta) else None
+
+    def escribir(self, nombre: str, datos: bytes) -> None:
+        ruta = os.path.join(self.raiz, nombre)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+
+    def eliminar(self, nombre: str) -> None:
+        try:
+            os.remove(os.path.join(self.raiz, nombre))
+        except FileNotFoundError:
+            pass
+
+    def eliminar_prefijo(self, prefijo: str) -> None:
+        shutil.rmtree(os.path.join(self.raiz, prefijo), ignore_errors=True)
+
+
+_fabricas: Dict[str, Callable[[], Any]] = {"local": lambda: AlmacenLocal(settings.ARCHIVE_DIR)}
+_almacen = None
+_abiertos: "OrderedDict[str, tuple]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def registrar_almacen(nombre: str, fabrica: Callable[[], Any]) -> None:
+    """
+    Agrega un backend de almacenamiento. `fabrica()` devuelve un objeto con
+    ruta_local(nombre), escribir(nombre, datos), eliminar(nombre) y
+    eliminar_prefijo(prefijo).
+    """
+    _fabricas[nombre] = fabrica
+
+
+def almacen():
+    global _almacen
+    with _lock:
+        if _almacen is None:
+            if settings.ARCHIVE_BACKEND not in _fabricas:
+                raise RuntimeError(f"Backend de archivo desconocido: {settings.ARCHIVE_BACKEND}")
+            _almacen = _fabricas[settings.ARCHIVE_BACKEND]()
+        return _almacen
+
+
+def abrir(nombre: str) -> Optional[ArchivoMovimientos]:
+    """
+    Archivo abierto (reutilizado mientras no cambie en disco), o None si no
+    existe. Se mantienen a lo sumo ARCHIVE_OPEN_FILES abiertos; los
+    desalojados se cierran cuando nadie más los usa.
+    """
+    ruta = almacen().ruta_local(nombre)
+    if ruta is None:
+        return None
+    estado = os.stat(ruta)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    with _lock:
+        entrada = _abiertos.get(nombre)
+        if entrada is not None and entrada[0] == firma:
+            _abiertos.move_to_end(nombre)
+            return entrada[1]
+    archivo = ArchivoMovimientos(ruta)
+    with _lock:
+        _abiertos[nombre] = (firma, archivo)
+        _abiertos.move_to_end(nombre)
+        while len(_abiertos) > settings.ARCHIVE_OPEN_FILES:
+            _abiertos.popitem(last=False)
+    return archivo
+
+
+def olvidar(prefijo: str) -> None:
+    """Descarta los archivos abiertos cuyo nombre empieza con `prefijo`."""
+    with _lock:
+        for nombre in [n for n in _abiertos if n.startswith(prefijo)]:
+            del _abiertos[nombre]
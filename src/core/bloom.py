@@ -0,0 +1,50 @@
+"""
+Filtro de Bloom con contadores (counting Bloom filter).
+
+Responde "seguro que no está" o "puede estar" usando unos pocos bytes por
+elemento. Cada posición es un contador de 8 bits en lugar de un bit, lo que
+permite eliminar elementos; los contadores saturan en 255 y una vez
+saturados no se decrementan (solo se pierde precisión, nunca se producen
+falsos negativos).
+"""
+import hashlib
+import math
+import threading
+
+
+class FiltroBloomContador:
+    def __init__(self, capacidad: int, tasa_falsos_positivos: float = 0.01):
+        self.m = max(64, int(-capacidad * math.log(tasa_falsos_positivos) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / capacidad * math.log(2)))
+        self._contadores = bytearray(self.m)
+        self._lock = threading.Lock()
+        self.elementos = 0
+
+    def _posiciones(self, valor: str):
+        digest = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.m for i in range(self.k)]
+
+    def agregar(self, valor: str) -> None:
+        posiciones = self._posiciones(valor)
+        with self._lock:
+            for p in posiciones:
+                if self._contadores[p] < 255:
+                    self._contadores[p] += 1
+            self.elementos += 1
+
+    def eliminar(self, valor: str) -> None:
+        posiciones = self._posiciones(valor)
+        with self._lock:
+            # Solo se decrementa si el elemento podía estar, para no romper otros
+            if not all(self._contadores[p] for p in posiciones):
+                return
+            for p in posiciones:
+                if self._contadores[p] < 255:
+                    self._contadores[p] -= 1
+            self.elementos = max(0, self.elementos - 1)
+
+    def __contains__(self, valor: str) -> bool:
+        contadores = self._contadores
+        return all(contadores[p] for p in self._posiciones(valor))
@@ -0,0 +1,202 @@
+"""
+Caché por worker (L1) con bus de invalidación entre workers.
+
+Cada dato cacheado depende de una o más claves del bus, por ejemplo
+("movimientos", usuario_id). El bus guarda un contador de versión por clave
+y las escrituras lo incrementan con `bus.publicar(...)`. Un worker sirve su
+copia local solo si las versiones que leyó al cargarla siguen iguales, así
+una escritura hecha en cualquier worker invalida las copias de todos sin
+esperar a un TTL.
+
+Backends:
+  - "mmap":    tabla de versiones en un archivo mapeado en memoria
+               (CACHE_BUS_PATH) que comparten los workers del mismo host.
+               Leer una versión es leer 8 bytes, sin syscalls; publicar toma
+               un flock del archivo. Cada clave se mapea por hash a una de
+               CACHE_BUS_SLOTS celdas: una colisión solo provoca una
+               invalidación de más, nunca una de menos.
+  - "memoria": contadores del proceso; para pruebas y para un solo worker.
+  - otros:     `registrar_backend(nombre, fabrica)` antes del primer uso
+               (por ejemplo un bus de red para varios hosts) y
+               CACHE_BUS_BACKEND=nombre.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock, se usa el bus en memoria
+    fcntl = None
+
+from src.core.config import settings
+from src.core.metrics import registro
+
+logger = logging.getLogger(__name__)
+
+# Espacios de claves publicados por las rutas de escritura
+MOVIMIENTOS = "movimientos"  # clave: usuario_id (gastos e ingresos)
+USUARIO = "usuario"  # clave: correo
+ARCHIVO = "archivo"  # clave: usuario_id (movimientos movidos al archivo)
+
+_publicaciones = registro.contador("cache_bus_publicaciones_total", "Invalidaciones publicadas en el bus")
+_aciertos = registro.contador("cache_l1_aciertos_total", "Lecturas servidas por la caché local del worker")
+_fallos = registro.contador("cache_l1_fallos_total", "Lecturas que cargaron el dato (ausente, caducado o invalidado)")
+
+Dependencias = Iterable[Tuple[str, Hashable]]
+
+
+class BusMemoria:
+    """Versiones en un dict del proceso: no cruza workers."""
+
+    def __init__(self):
+        self._versiones: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, espacio: str, clave) -> int:
+        return self._versiones.get((espacio, str(clave)), 0)
+
+    def publicar(self, espacio: str, clave) -> int:
+        with self._lock:
+            version = self._versiones.get((espacio, str(clave)), 0) + 1
+            self._versiones[(espacio, str(clave))] = version
+        return version
+
+
+class BusMmap:
+    """Tabla de versiones `uint64` en un archivo compartido por los workers del host."""
+
+    def __init__(self, ruta: str, celdas: int):
+        if fcntl is None:
+            raise RuntimeError("El bus mmap requiere fcntl (Unix)")
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        self._celdas = celdas
+        self._fd = os.open(ruta, os.O_RDWR | os.O_CREAT, 0o600)
+        tamano = celdas * 8
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < tamano:
+                os.ftruncate(self._fd, tamano)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mapa = mmap.mmap(self._fd, tamano)
+        self._lock = threading.Lock()
+
+    def _posicion(self, espacio: str, clave) -> int:
+        resumen = hashlib.blake2b(f"{espacio}\0{clave}".encode(), digest_size=8).digest()
+        return int.from_bytes(resumen, "little") % self._celdas * 8
+
+    def version(self, espacio: str, clave) -> int:
+        return struct.unpack_from("<Q", self._mapa, self._posicion(espacio, clave))[0]
+
+    def publicar(self, espacio: str, clave) -> int:
+        posicion = self._posicion(espacio, clave)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                version = struct.unpack_from("<Q", self._mapa, posicion)[0] + 1
+                struct.pack_into("<Q", self._mapa, posicion, version)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return version
+
+
+def _bus_mmap():
+    if fcntl is None:
+        logger.warning("Bus de invalidación mmap no disponible en esta plataforma; se usa uno en memoria")
+        return BusMemoria()
+    return BusMmap(settings.CACHE_BUS_PATH, settings.CACHE_BUS_SLOTS)
+
+
+_fabricas: Dict[str, Callable[[], Any]] = {"memoria": BusMemoria, "mmap": _bus_mmap}
+
+
+def registrar_backend(nombre: str, fabrica: Callable[[], Any]) -> None:
+    """Agrega un backend del bus; `fabrica()` devuelve un objeto con version() y publicar()."""
+    _fabricas[nombre] = fabrica
+
+
+class _Bus:
+    """Fachada del bus: crea el backend configurado en el primer uso."""
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    nombre = settings.CACHE_BUS_BACKEND
+                    if nombre not in _fabricas:
+                        raise RuntimeError(f"Backend de bus de caché desconocido: {nombre}")
+                    self._backend = _fabricas[nombre]()
+        return self._backend
+
+    def usar(self, backend) -> None:
+        """Reemplaza el backend (pruebas, o uno creado a mano)."""
+        with self._lock:
+            self._backend = backend
+
+    def version(self, espacio: str, clave) -> int:
+        return self.backend.version(espacio, clave)
+
+    def versiones(self, dependencias: Dependencias) -> Tuple[int, ...]:
+        backend = self.backend
+        return tuple(backend.version(espacio, clave) for espacio, clave in dependencias)
+
+    def publicar(self, espacio: str, clave) -> int:
+        """Invalida `clave` en todos los workers; devuelve la nueva versión."""
+        _publicaciones.inc(espacio=espacio)
+        return self.backend.publicar(espacio, clave)
+
+
+bus = _Bus()
+
+
+class CacheL1:
+    """
+    Caché LRU local al worker cuyas entradas valen mientras no cambien las
+    versiones de sus dependencias en el bus (y, opcionalmente, un TTL).
+    """
+
+    def __init__(self, nombre: str, max_entradas: int, ttl: Optional[float] = None):
+        self.nombre = nombre
+        self._max = max_entradas
+        self._ttl = ttl
+        # clave -> (valor, versiones de las dependencias al cargar, instante)
+        self._entradas: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: Hashable, cargar: Callable[[], Any], dependencias: Dependencias) -> Any:
+        dependencias = tuple(dependencias)
+        # Las versiones se leen antes de cargar: una escritura durante la carga deja la entrada vieja
+        versiones = bus.versiones(dependencias)
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[1] == versiones and (
+                    self._ttl is None or time.monotonic() - entrada[2] < self._ttl):
+                self._entradas.move_to_end(clave)
+                _aciertos.inc(cache=self.nombre)
+                return entrada[0]
+        _fallos.inc(cache=self.nombre)
+        valor = cargar()
+        with self._lock:
+            self._entradas[clave] = (valor, versiones, time.monotonic())
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def descartar(self, clave: Hashable) -> None:
+        with self._lock:
+            self._entradas.pop(clave, None)
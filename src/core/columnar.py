@@ -0,0 +1,177 @@
+"""
+Columnas compactas para movimientos (gastos o ingresos).
+
+Cada fila ocupa ~30 bytes repartidos en arrays tipados: id de 16 bytes en
+un bytearray, fecha como día epoch (`array('i')`), monto en centavos
+(`array('q')`) y categoría/concepto como código de diccionario
+(`array('H')`). Una lista de dicts equivalente cuesta cientos de bytes por
+fila. Eliminar mueve la última fila al hueco (swap-remove), así que el
+orden de las filas no tiene significado. Con NumPy los filtros por fecha y
+las sumas operan sobre vistas de los arrays, sin copiarlos.
+"""
+import hashlib
+import uuid
+from array import array
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from src.core.money import a_centavos, np, sumar_columna
+
+_EPOCH = date(1970, 1, 1).toordinal()
+_TAM_ID = 16
+
+
+def dia_epoch(valor) -> int:
+    if isinstance(valor, date):
+        return valor.toordinal() - _EPOCH
+    return date.fromisoformat(str(valor)[:10]).toordinal() - _EPOCH
+
+
+def fecha_de_dia(dia: int) -> date:
+    return date.fromordinal(dia + _EPOCH)
+
+
+def clave_id(valor) -> bytes:
+    """16 bytes por id: el UUID crudo o, si el id no es UUID, un hash estable."""
+    try:
+        return uuid.UUID(str(valor)).bytes
+    except ValueError:
+        return hashlib.md5(str(valor).encode()).digest()
+
+
+class ColumnasMovimientos:
+    def __init__(self):
+        self.ids = bytearray()
+        self.dias = array("i")
+        self.centavos = array("q")
+        self.codigos = array("H")
+        self.categorias: List[str] = []
+        self._codigo_de: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.dias)
+
+    @property
+    def bytes(self) -> int:
+        return (len(self.ids) + self.dias.itemsize * len(self.dias) + self.centavos.itemsize * len(self.centavos)
+                + self.codigos.itemsize * len(self.codigos) + sum(60 + len(c) for c in self.categorias))
+
+    def _codigo(self, categoria: Optional[str]) -> int:
+        categoria = categoria or ""
+        codigo = self._codigo_de.get(categoria)
+        if codigo is None:
+            codigo = self._codigo_de[categoria] = len(self.categorias)
+            self.categorias.append(categoria)
+        return codigo
+
+    def _posicion(self, clave: bytes) -> int:
+        # bytearray.find recorre en C; solo valen coincidencias alineadas a 16 bytes
+        inicio = 0
+        while True:
+            i = self.ids.find(clave, inicio)
+            if i < 0 or i % _TAM_ID == 0:
+                return -1 if i < 0 else i // _TAM_ID
+            inicio = i + 1
+
+    def agregar(self, id_fila, fecha, monto, categoria: Optional[str]) -> None:
+        """Añade sin buscar el id; solo para cargas completas, donde no hay repetidos."""
+        self.ids += clave_id(id_fila)
+        self.dias.append(dia_epoch(fecha))
+        self.centavos.append(a_centavos(monto))
+        self.codigos.append(self._codigo(categoria))
+
+    def _escribir(self, i: int, clave: bytes, dia: int, centavos: int, codigo: int) -> bool:
+        if i < 0:
+            self.ids += clave
+            self.dias.append(dia)
+            self.centavos.append(centavos)
+            self.codigos.append(codigo)
+            return True
+        if (self.dias[i], self.centavos[i], self.codigos[i]) == (dia, centavos, codigo):
+            return False
+        self.dias[i], self.centavos[i], self.codigos[i] = dia, centavos, codigo
+        return True
+
+    def upsert(self, id_fila, fecha, monto, categoria: Optional[str]) -> bool:
+        """Inserta o reemplaza la fila; devuelve False si ya estaba igual."""
+        clave = clave_id(id_fila)
+        return self._escribir(self._posicion(clave), clave, dia_epoch(fecha), a_centavos(monto), self._codigo(categoria))
+
+    def upsert_varios(self, filas: List[tuple]) -> int:
+        """
+        upsert de muchas filas (id, fecha, monto, categoría); devuelve cuántas
+        cambiaron. Con lotes grandes arma un índice temporal de posiciones en
+        lugar de recorrer los ids una vez por fila.
+        """
+        if len(filas) <= 32:
+            return sum(self.upsert(*f) for f in filas)
+        posiciones = {bytes(self.ids[i:i + _TAM_ID]): i // _TAM_ID for i in range(0, len(self.ids), _TAM_ID)}
+        cambios = 0
+        for id_fila, fecha, monto, categoria in filas:
+            clave = clave_id(id_fila)
+            i = posiciones.get(clave, -1)
+            if i < 0:
+                posiciones[clave] = len(self.dias)
+            cambios += self._escribir(i, clave, dia_epoch(fecha), a_centavos(monto), self._codigo(categoria))
+        return cambios
+
+    def quitar(self, id_fila) -> bool:
+        i = self._posicion(clave_id(id_fila))
+        if i < 0:
+            return False
+        ultimo = len(self.dias) - 1
+        if i != ultimo:
+            self.ids[i * _TAM_ID:(i + 1) * _TAM_ID] = self.ids[ultimo * _TAM_ID:]
+            self.dias[i], self.centavos[i], self.codigos[i] = self.dias[ultimo], self.centavos[ultimo], self.codigos[ultimo]
+        del self.ids[ultimo * _TAM_ID:]
+        self.dias.pop()
+        self.centavos.pop()
+        self.codigos.pop()
+        return True
+
+    def _mascara(self, desde: int, hasta: int):
+        dias = np.frombuffer(self.dias, dtype=np.int32)
+        return (dias >= desde) & (dias <= hasta)
+
+    def total_en_rango(self, inicio: date, fin: date) -> int:
+        """Suma en centavos de los movimientos con fecha en [inicio, fin]."""
+        desde, hasta = dia_epoch(inicio), dia_epoch(fin)
+        if np is not None:
+            return sumar_columna(self.centavos, self._mascara(desde, hasta))
+        return sum(c for d, c in zip(self.dias, self.centavos) if desde <= d <= hasta)
+
+    def totales_por_categoria(self, inicio: date, fin: date) -> Dict[str, int]:
+        desde, hasta = dia_epoch(inicio), dia_epoch(fin)
+        if np is not None:
+            mascara = self._mascara(desde, hasta)
+            acumulado = np.zeros(len(self.categorias), dtype=np.int64)
+            np.add.at(acumulado, np.frombuffer(self.codigos, dtype=np.uint16)[mascara],
+                      np.frombuffer(self.centavos, dtype=np.int64)[mascara])
+            acumulado = acumulado.tolist()
+        else:
+            acumulado = [0] * len(self.categorias)
+            for d, c, k in zip(self.dias, self.centavos, self.codigos):
+                if desde <= d <= hasta:
+                    acumulado[k] += c
+        return {self.categorias[k]: total for k, total in enumerate(acumulado) if total}
+
+    def serie_diaria(self, desde: int, dias: int) -> List[int]:
+        """Total en centavos de cada día en [desde, desde + dias) (días epoch)."""
+        if np is not None:
+            indices = np.frombuffer(self.dias, dtype=np.int32).astype(np.int64) - desde
+            dentro = (indices >= 0) & (indices < dias)
+            serie = np.zeros(dias, dtype=np.int64)
+            np.add.at(serie, indices[dentro], np.frombuffer(self.centavos, dtype=np.int64)[dentro])
+            return serie.tolist()
+        serie = [0] * dias
+        for d, c in zip(self.dias, self.centavos):
+            if 0 <= d - desde < dias:
+                serie[d - desde] += c
+        return serie
+
+    def primer_dia(self) -> Optional[int]:
+        return min(self.dias) if self.dias else None
+
+    def filas(self) -> List[Tuple[int, int, str]]:
+        """(día epoch, centavos, categoría) de cada movimiento."""
+        return [(d, c, self.categorias[k]) for d, c, k in zip(self.dias, self.centavos, self.codigos)]
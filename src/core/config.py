@@ -10,4 +10,133 @@ class Settings:
     ALGORITHM = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60))
 
+    # --- Llamadas a Supabase: presupuestos de tiempo, hedging y circuit breaker ---
+    SUPABASE_TIMEOUT_SECONDS = float(os.getenv("SUPABASE_TIMEOUT_SECONDS", 10))
+    REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", 15))
+    SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", 32))
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_MIN_DELAY_MS = float(os.getenv("HEDGE_MIN_DELAY_MS", 50))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+    CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", 30))
+    CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", 15))
+
+    # --- Rate limiting (token bucket por usuario y por IP) ---
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memoria")  # memoria | sqlite
+    RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "/tmp/fintrack_rate_limit.db")
+    RATE_LIMIT_USER_CAPACITY = float(os.getenv("RATE_LIMIT_USER_CAPACITY", 60))
+    RATE_LIMIT_USER_REFILL = float(os.getenv("RATE_LIMIT_USER_REFILL", 5))
+    RATE_LIMIT_IP_CAPACITY = float(os.getenv("RATE_LIMIT_IP_CAPACITY", 120))
+    RATE_LIMIT_IP_REFILL = float(os.getenv("RATE_LIMIT_IP_REFILL", 10))
+    RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() == "true"
+
+    # --- Índice de correos (filtro de Bloom) para el registro ---
+    EMAIL_INDEX_ENABLED = os.getenv("EMAIL_INDEX_ENABLED", "true").lower() == "true"
+    EMAIL_INDEX_CAPACITY = int(os.getenv("EMAIL_INDEX_CAPACITY", 200_000))
+    EMAIL_INDEX_FP_RATE = float(os.getenv("EMAIL_INDEX_FP_RATE", 0.01))
+    EMAIL_INDEX_PAGE_SIZE = int(os.getenv("EMAIL_INDEX_PAGE_SIZE", 1000))
+
+    # --- Purga en segundo plano de los datos de usuarios eliminados ---
+    PURGE_JOURNAL_PATH = os.getenv("PURGE_JOURNAL_PATH", "data/purgas.jsonl")
+    PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", 500))
+    PURGE_THROTTLE_SECONDS = float(os.getenv("PURGE_THROTTLE_SECONDS", 0.2))
+    PURGE_MAX_RETRIES = int(os.getenv("PURGE_MAX_RETRIES", 5))
+    PURGE_LOCK_PATH = os.getenv("PURGE_LOCK_PATH", "/tmp/fintrack_purgas.lock")
+    PURGE_POLL_SECONDS = float(os.getenv("PURGE_POLL_SECONDS", 2))
+    PURGE_COMPACT_SECONDS = float(os.getenv("PURGE_COMPACT_SECONDS", 600))
+    # Los trabajos terminados se olvidan (su estado da 404) tras este plazo
+    PURGE_RETENTION_HOURS = float(os.getenv("PURGE_RETENTION_HOURS", 7 * 24))
+
+    # --- Índice en memoria de planes activos por fecha ---
+    PLAN_INDEX_MAX_USERS = int(os.getenv("PLAN_INDEX_MAX_USERS", 10_000))
+    PLAN_INDEX_TTL_SECONDS = float(os.getenv("PLAN_INDEX_TTL_SECONDS", 300))
+
+    # --- Búsqueda de texto sobre gastos e ingresos (índice invertido en memoria) ---
+    SEARCH_INDEX_MAX_BYTES = int(os.getenv("SEARCH_INDEX_MAX_BYTES", 64 * 1024 * 1024))
+    SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", 600))
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", 1000))
+
+    # --- Analítica de gastos (agregación en streaming) ---
+    ANALYTICS_PAGE_SIZE = int(os.getenv("ANALYTICS_PAGE_SIZE", 1000))
+    ANALYTICS_MIN_SAMPLES = int(os.getenv("ANALYTICS_MIN_SAMPLES", 5))
+
+    # --- Snapshot columnar del ledger por usuario (reportes) ---
+    LEDGER_SNAPSHOT_ENABLED = os.getenv("LEDGER_SNAPSHOT_ENABLED", "true").lower() == "true"
+    LEDGER_SNAPSHOT_MAX_BYTES = int(os.getenv("LEDGER_SNAPSHOT_MAX_BYTES", 64 * 1024 * 1024))
+    LEDGER_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("LEDGER_SNAPSHOT_REFRESH_SECONDS", 5))
+    LEDGER_SNAPSHOT_FULL_RELOAD_SECONDS = float(os.getenv("LEDGER_SNAPSHOT_FULL_RELOAD_SECONDS", 900))
+    LEDGER_SNAPSHOT_OVERLAP_SECONDS = float(os.getenv("LEDGER_SNAPSHOT_OVERLAP_SECONDS", 5))
+    LEDGER_PAGE_SIZE = int(os.getenv("LEDGER_PAGE_SIZE", 1000))
+
+    # --- Sincronización incremental para clientes (/sync) ---
+    SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", 5))
+    SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", 1000))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+
+    # --- Pronóstico de flujo de caja (/api/pronostico) ---
+    FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", 730))
+    FORECAST_LEVEL_WINDOW_DAYS = int(os.getenv("FORECAST_LEVEL_WINDOW_DAYS", 30))
+    FORECAST_DEFAULT_HORIZON_DAYS = int(os.getenv("FORECAST_DEFAULT_HORIZON_DAYS", 90))
+    FORECAST_MAX_HORIZON_DAYS = int(os.getenv("FORECAST_MAX_HORIZON_DAYS", 1825))
+    FORECAST_CACHE_MAX_USERS = int(os.getenv("FORECAST_CACHE_MAX_USERS", 5000))
+
+    # --- Caché L1 por worker y bus de invalidación entre workers ---
+    CACHE_BUS_BACKEND = os.getenv("CACHE_BUS_BACKEND", "mmap")  # mmap | memoria | backend registrado
+    CACHE_BUS_PATH = os.getenv("CACHE_BUS_PATH", "/tmp/fintrack_cache_bus.bin")
+    CACHE_BUS_SLOTS = int(os.getenv("CACHE_BUS_SLOTS", 65536))
+    USER_ID_CACHE_MAX_ENTRIES = int(os.getenv("USER_ID_CACHE_MAX_ENTRIES", 50_000))
+    USER_ID_CACHE_TTL_SECONDS = float(os.getenv("USER_ID_CACHE_TTL_SECONDS", 3600))
+
+    # --- Idempotency-Key en las creaciones (POST de gastos, ingresos y planes) ---
+    IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "memoria")  # memoria | sqlite
+    IDEMPOTENCY_SQLITE_PATH = os.getenv("IDEMPOTENCY_SQLITE_PATH", "/tmp/fintrack_idempotencia.db")
+    IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+    IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+    IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 10))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 100_000))
+
+    # --- Dashboard agregado (/dashboard) ---
+    DASHBOARD_RECENT_LIMIT = int(os.getenv("DASHBOARD_RECENT_LIMIT", 10))
+    DASHBOARD_SECTION_TIMEOUT_SECONDS = float(os.getenv("DASHBOARD_SECTION_TIMEOUT_SECONDS", 5))
+
+    # --- Archivo de movimientos viejos (resúmenes mensuales + archivos columnar) ---
+    ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 1095))
+    ARCHIVE_BACKEND = os.getenv("ARCHIVE_BACKEND", "local")
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "data/archivo")
+    ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", 24))
+    ARCHIVE_LOCK_PATH = os.getenv("ARCHIVE_LOCK_PATH", "/tmp/fintrack_archivo.lock")
+    ARCHIVE_PAGE_SIZE = int(os.getenv("ARCHIVE_PAGE_SIZE", 1000))
+    ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", 200))
+    ARCHIVE_THROTTLE_SECONDS = float(os.getenv("ARCHIVE_THROTTLE_SECONDS", 0.05))
+    # Filas modificadas en los últimos segundos no se archivan en esa pasada
+    ARCHIVE_OVERLAP_SECONDS = float(os.getenv("ARCHIVE_OVERLAP_SECONDS", 5))
+    ARCHIVE_OPEN_FILES = int(os.getenv("ARCHIVE_OPEN_FILES", 64))
+    ARCHIVE_SUMMARY_CACHE_TTL_SECONDS = float(os.getenv("ARCHIVE_SUMMARY_CACHE_TTL_SECONDS", 3600))
+
+    # --- Capa de servicio de recursos (gastos, ingresos y planes) ---
+    RESOURCE_PAGE_SIZE = int(os.getenv("RESOURCE_PAGE_SIZE", 1000))
+    RESOURCE_MAX_LIMIT = int(os.getenv("RESOURCE_MAX_LIMIT", 1000))
+
+    # --- Movimientos recurrentes (materialización por lotes) ---
+    RECURRING_ENABLED = os.getenv("RECURRING_ENABLED", "true").lower() == "true"
+    RECURRING_INTERVAL_MINUTES = float(os.getenv("RECURRING_INTERVAL_MINUTES", 60))
+    RECURRING_LOCK_PATH = os.getenv("RECURRING_LOCK_PATH", "/tmp/fintrack_recurrentes.lock")
+    RECURRING_PAGE_SIZE = int(os.getenv("RECURRING_PAGE_SIZE", 1000))
+    RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", 500))
+
+    # --- Serialización de respuestas (src/core/serializacion.py) ---
+    # false: las filas de Supabase se validan contra el response_model antes de responder
+    SERIALIZATION_TRUST_UPSTREAM = os.getenv("SERIALIZATION_TRUST_UPSTREAM", "true").lower() == "true"
+
+    # --- Profiler de muestreo (desactivado por defecto) ---
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+    PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", 0))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", 5))
+    PROFILER_MIN_INTERVAL_SECONDS = float(os.getenv("PROFILER_MIN_INTERVAL_SECONDS", 10))
+    PROFILER_DIR = os.getenv("PROFILER_DIR", "profiles")
+    PROFILER_MAX_FILES = int(os.getenv("PROFILER_MAX_FILES", 50))
+
 settings = Settings()
@@ -0,0 +1,162 @@
+"""
+Almacén de claves de idempotencia (cabecera Idempotency-Key).
+
+Cada clave pasa por dos estados: "en curso" (una petición la reservó y se
+está ejecutando) y "completa" (se guardó su respuesta). La reserva tiene
+un plazo (IDEMPOTENCY_LOCK_SECONDS): si el worker que la tomó muere, otra
+petición con la misma clave puede ejecutarse tras ese plazo. Las
+respuestas guardadas caducan tras IDEMPOTENCY_TTL_SECONDS y el almacén
+nunca guarda más de IDEMPOTENCY_MAX_KEYS claves (se descartan las más
+viejas). Como en el rate limit, el almacén por defecto vive en memoria del
+worker y con IDEMPOTENCY_BACKEND=sqlite se comparte entre los workers del
+host a través de un archivo SQLite.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+# Resultados de reservar()
+NUEVA = "nueva"  # la clave quedó reservada para esta petición
+EN_CURSO = "en_curso"  # otra petición con la clave se está ejecutando
+COMPLETA = "completa"  # hay respuesta guardada
+CONFLICTO = "conflicto"  # la clave se usó con otro cuerpo u otra ruta
+
+# (status, cabeceras, cuerpo)
+Respuesta = Tuple[int, List[Tuple[bytes, bytes]], bytes]
+
+
+def serializar(respuesta: Respuesta) -> str:
+    status, cabeceras, cuerpo = respuesta
+    return json.dumps({
+        "s": status,
+        "h": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in cabeceras],
+        "b": cuerpo.decode("latin-1"),
+    })
+
+
+def deserializar(texto: str) -> Respuesta:
+    datos = json.loads(texto)
+    return (datos["s"], [(k.encode("latin-1"), v.encode("latin-1")) for k, v in datos["h"]],
+            datos["b"].encode("latin-1"))
+
+
+class AlmacenIdempotenciaMemoria:
+    """Claves en un OrderedDict del proceso, en orden de llegada."""
+
+    bloqueante = False
+
+    def __init__(self, max_claves: int):
+        # clave -> [huella, respuesta serializada o None, vence]
+        self._claves: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_claves = max_claves
+
+    def reservar(self, clave: str, huella: str, plazo: float) -> Tuple[str, Optional[Respuesta]]:
+        ahora = time.time()
+        with self._lock:
+            entrada = self._claves.get(clave)
+            if entrada is not None and entrada[2] > ahora:
+                if entrada[0] != huella:
+                    return CONFLICTO, None
+                if entrada[1] is None:
+                    return EN_CURSO, None
+                return COMPLETA, deserializar(entrada[1])
+            self._claves.pop(clave, None)
+            self._claves[clave] = [huella, None, ahora + plazo]
+            while len(self._claves) > self._max_claves:
+                self._claves.popitem(last=False)
+        return NUEVA, None
+
+    def completar(self, clave: str, huella: str, respuesta: Respuesta, ttl: float) -> None:
+        with self._lock:
+            self._claves[clave] = [huella, serializar(respuesta), time.time() + ttl]
+
+    def liberar(self, clave: str, huella: str) -> None:
+        with self._lock:
+            entrada = self._claves.get(clave)
+            if entrada is not None and entrada[0] == huella and entrada[1] is None:
+                del self._claves[clave]
+
+
+class AlmacenIdempotenciaSQLite:
+    """Claves compartidas entre workers del mismo host mediante un archivo SQLite."""
+
+    bloqueante = True  # hace I/O: no se llama desde el event loop
+
+    def __init__(self, ruta: str, max_claves: int):
+        self._conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False, timeout=1.0)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS idempotencia ("
+            "clave TEXT PRIMARY KEY, huella TEXT NOT NULL, respuesta TEXT, vence REAL NOT NULL, creada REAL NOT NULL)"
+        )
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idempotencia_creada ON idempotencia (creada)")
+        self._lock = threading.Lock()
+        self._max_claves = max_claves
+        self._escrituras = 0
+
+    def _transaccion(self, funcion):
+        with self._lock:
+            cur = self._conexion.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = funcion(cur)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return resultado
+
+    def _recortar(self, cur, ahora: float) -> None:
+        # Cada cierto número de reservas: se borran las vencidas y el exceso más viejo
+        self._escrituras += 1
+        if self._escrituras % 100:
+            return
+        cur.execute("DELETE FROM idempotencia WHERE vence <= ?", (ahora,))
+        cur.execute(
+            "DELETE FROM idempotencia WHERE clave IN (SELECT clave FROM idempotencia ORDER BY creada DESC "
+            "LIMIT -1 OFFSET ?)", (self._max_claves,)
+        )
+
+    def reservar(self, clave: str, huella: str, plazo: float) -> Tuple[str, Optional[Respuesta]]:
+        ahora = time.time()
+
+        def operacion(cur):
+            fila = cur.execute("SELECT huella, respuesta, vence FROM idempotencia WHERE clave = ?", (clave,)).fetchone()
+            if fila is not None and fila[2] > ahora:
+                if fila[0] != huella:
+                    return CONFLICTO, None
+                if fila[1] is None:
+                    return EN_CURSO, None
+                return COMPLETA, deserializar(fila[1])
+            cur.execute(
+                "INSERT INTO idempotencia (clave, huella, respuesta, vence, creada) VALUES (?, ?, NULL, ?, ?) "
+                "ON CONFLICT(clave) DO UPDATE SET huella = excluded.huella, respuesta = NULL, "
+                "vence = excluded.vence, creada = excluded.creada",
+                (clave, huella, ahora + plazo, ahora),
+            )
+            self._recortar(cur, ahora)
+            return NUEVA, None
+
+        return self._transaccion(operacion)
+
+    def completar(self, clave: str, huella: str, respuesta: Respuesta, ttl: float) -> None:
+        self._transaccion(lambda cur: cur.execute(
+            "UPDATE idempotencia SET respuesta = ?, vence = ? WHERE clave = ? AND huella = ?",
+            (serializar(respuesta), time.time() + ttl, clave, huella),
+        ))
+
+    def liberar(self, clave: str, huella: str) -> None:
+        self._transaccion(lambda cur: cur.execute(
+            "DELETE FROM idempotencia WHERE clave = ? AND huella = ? AND respuesta IS NULL", (clave, huella)
+        ))
+
+
+def crear_almacen_idempotencia(backend: str, ruta_sqlite: str, max_claves: int):
+    if backend == "sqlite":
+        return AlmacenIdempotenciaSQLite(ruta_sqlite, max_claves)
+    return AlmacenIdempotenciaMemoria(max_claves)
@@ -0,0 +1,54 @@
+"""
+Árbol de intervalos estático.
+
+Los intervalos se ordenan por inicio y se recorren como un árbol binario
+balanceado implícito sobre el arreglo (la raíz de cada rango es su punto
+medio). Cada nodo guarda el fin máximo de su subárbol, lo que permite
+descartar ramas completas: una consulta de "intervalos que contienen el
+punto x" cuesta O(log n + k).
+"""
+from typing import Any, List, Tuple
+
+
+class ArbolIntervalos:
+    def __init__(self, intervalos: List[Tuple[Any, Any, Any]]):
+        """`intervalos` es una lista de (inicio, fin, valor) con extremos inclusivos."""
+        self._items = sorted(intervalos, key=lambda t: t[0])
+        self._max_fin = [None] * len(self._items)
+        self._construir(0, len(self._items))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def valores(self) -> List[Any]:
+        return [valor for _, _, valor in self._items]
+
+    def _construir(self, lo: int, hi: int):
+        if lo >= hi:
+            return None
+        medio = (lo + hi) // 2
+        maximo = self._items[medio][1]
+        for sub in (self._construir(lo, medio), self._construir(medio + 1, hi)):
+            if sub is not None and sub > maximo:
+                maximo = sub
+        self._max_fin[medio] = maximo
+        return maximo
+
+    def contienen(self, punto) -> List[Any]:
+        """Valores de los intervalos con inicio <= punto <= fin."""
+        encontrados = []
+        pendientes = [(0, len(self._items))]
+        while pendientes:
+            lo, hi = pendientes.pop()
+            if lo >= hi:
+                continue
+            medio = (lo + hi) // 2
+            if self._max_fin[medio] < punto:
+                continue  # ningún intervalo de este subárbol llega hasta el punto
+            pendientes.append((lo, medio))
+            inicio, fin, valor = self._items[medio]
+            if inicio <= punto:
+                if punto <= fin:
+                    encontrados.append(valor)
+                pendientes.append((medio + 1, hi))
+        return encontrados
@@ -0,0 +1,83 @@
+"""
+Registro mínimo de métricas en proceso con exposición en formato de texto
+de Prometheus (GET /metrics).
+"""
+import threading
+from typing import Callable, Dict, Tuple
+
+
+class Contador:
+    """Contador monótono con etiquetas opcionales."""
+
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._valores: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, cantidad: float = 1, **etiquetas) -> None:
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def valor(self, **etiquetas) -> float:
+        return self._valores.get(tuple(sorted(etiquetas.items())), 0)
+
+    def muestras(self):
+        with self._lock:
+            return list(self._valores.items())
+
+
+class Medidor(Contador):
+    """Valor instantáneo: se fija con `set` o se calcula con una función."""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre: str, ayuda: str, funcion: Callable[[], Dict[Tuple, float]] = None):
+        super().__init__(nombre, ayuda)
+        self._funcion = funcion
+
+    def set(self, valor: float, **etiquetas) -> None:
+        with self._lock:
+            self._valores[tuple(sorted(etiquetas.items()))] = valor
+
+    def muestras(self):
+        if self._funcion is not None:
+            return list(self._funcion().items())
+        return super().muestras()
+
+
+class Registro:
+    def __init__(self):
+        self._metricas: Dict[str, Contador] = {}
+        self._lock = threading.Lock()
+
+    def _obtener(self, clase, nombre: str, ayuda: str, **kwargs):
+        with self._lock:
+            if nombre not in self._metricas:
+                self._metricas[nombre] = clase(nombre, ayuda, **kwargs)
+            return self._metricas[nombre]
+
+    def contador(self, nombre: str, ayuda: str) -> Contador:
+        return self._obtener(Contador, nombre, ayuda)
+
+    def medidor(self, nombre: str, ayuda: str, funcion=None) -> Medidor:
+        return self._obtener(Medidor, nombre, ayuda, funcion=funcion)
+
+    def exportar(self) -> str:
+        lineas = []
+        for metrica in list(self._metricas.values()):
+            lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+            for etiquetas, valor in metrica.muestras():
+                if etiquetas:
+                    texto = ",".join(f'{k}="{v}"' for k, v in etiquetas)
+                    lineas.append(f"{metrica.nombre}{{{texto}}} {valor}")
+                else:
+                    lineas.append(f"{metrica.nombre} {valor}")
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
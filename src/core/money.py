@@ -0,0 +1,76 @@
+"""
+Montos como centavos enteros.
+
+La API sigue recibiendo y devolviendo números con dos decimales, pero cada
+monto se redondea una sola vez al entrar (Decimal, ROUND_HALF_UP, a partir
+de su representación decimal y no del binario del float) y las sumas se
+hacen en centavos `int`, que son exactas. Solo al responder se vuelve a
+float dividiendo entre 100. Con NumPy instalado las sumas sobre columnas
+`array('q')` se vectorizan sin copiar; sin NumPy se usa `sum()`.
+"""
+import math
+from array import array
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Annotated, Iterable, Optional
+
+from pydantic import BeforeValidator
+
+try:
+    import numpy as np
+except ImportError:  # dependencia opcional: solo acelera las sumas
+    np = None
+
+_CENTAVO = Decimal("0.01")
+
+
+def a_decimal(valor) -> Decimal:
+    if isinstance(valor, bool):
+        raise ValueError("El monto debe ser un número")
+    if isinstance(valor, float) and not math.isfinite(valor):
+        raise ValueError("El monto debe ser un número finito")
+    try:
+        numero = valor if isinstance(valor, Decimal) else Decimal(str(valor))
+    except InvalidOperation:
+        raise ValueError("El monto debe ser un número")
+    if not numero.is_finite():
+        raise ValueError("El monto debe ser un número finito")
+    return numero.quantize(_CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def a_centavos(valor) -> int:
+    """12.345 -> 1235, "7.1" -> 710, None -> 0."""
+    if valor is None:
+        return 0
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor * 100
+    return int(a_decimal(valor) * 100)
+
+
+def a_monto(centavos: int) -> float:
+    """Centavos a float para la respuesta (el float más cercano a los dos decimales)."""
+    return float(Decimal(centavos) / 100)
+
+
+def sumar_centavos(valores: Iterable) -> int:
+    """Suma exacta, en centavos, de montos tal como vienen de Supabase."""
+    return sum(a_centavos(v) for v in valores)
+
+
+def sumar_columna(centavos: array, mascara=None) -> int:
+    """Suma de una columna `array('q')` de centavos, vectorizada si hay NumPy."""
+    if np is not None:
+        vista = np.frombuffer(centavos, dtype=np.int64)
+        return int(vista[mascara].sum() if mascara is not None else vista.sum())
+    if mascara is None:
+        return sum(centavos)
+    return sum(c for c, incluir in zip(centavos, mascara) if incluir)
+
+
+def _normalizar_monto(valor) -> Optional[float]:
+    if valor is None:
+        return None
+    return float(a_decimal(valor))
+
+
+# Tipo para los modelos: acepta número o texto y lo deja redondeado al centavo
+Monto = Annotated[float, BeforeValidator(_normalizar_monto)]
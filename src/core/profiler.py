@@ -0,0 +1,173 @@
+"""
+Profiler de muestreo de bajo costo para diagnosticar peticiones lentas.
+
+Un hilo toma instantáneas periódicas de las pilas de todos los hilos con
+sys._current_frames() mientras dura la petición perfilada y las acumula en
+formato "collapsed" (una pila por línea, marcos separados por ';' y el
+número de muestras al final), que speedscope y flamegraph.pl importan tal cual.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from src.core.config import settings
+
+# Funciones hoja que indican un hilo ocioso (esperando trabajo o E/S del loop)
+_HOJAS_OCIOSAS = {"wait", "select", "poll", "accept", "get", "_wait_for_tstate_lock"}
+
+
+class Muestreador:
+    """Toma muestras de pila cada `intervalo` segundos hasta que se detiene."""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self.pilas: Counter = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name="profiler-muestreador", daemon=True)
+
+    def iniciar(self) -> None:
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._hilo.join()
+
+    def _bucle(self) -> None:
+        propio = threading.get_ident()
+        nombres = {}
+        while not self._detener.wait(self.intervalo):
+            for ident, marco in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                if marco.f_code.co_name in _HOJAS_OCIOSAS:
+                    continue
+                pila = []
+                while marco is not None:
+                    codigo = marco.f_code
+                    clave = (codigo.co_filename, codigo.co_name)
+                    nombre = nombres.get(clave)
+                    if nombre is None:
+                        nombre = f"{codigo.co_name} ({os.path.basename(codigo.co_filename)})"
+                        nombres[clave] = nombre
+                    pila.append(nombre)
+                    marco = marco.f_back
+                pila.reverse()
+                self.pilas[";".join(pila)] += 1
+            self.muestras += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{pila} {n}\n" for pila, n in self.pilas.most_common())
+
+
+class GestorPerfiles:
+    """
+    Decide qué peticiones se perfilan, limita la frecuencia y guarda los
+    resultados en disco. Solo existe un perfil en curso a la vez porque el
+    muestreo abarca todo el proceso.
+    """
+
+    def __init__(self):
+        self.directorio = settings.PROFILER_DIR
+        self._lock = threading.Lock()
+        self._ocupado = False
+        self._ultimo = 0.0
+        # sub del JWT -> número de peticiones pendientes de perfilar
+        self.objetivos: Dict[str, int] = {}
+
+    def armar_objetivo(self, sub: str, peticiones: int) -> None:
+        """Programa el perfilado de las próximas `peticiones` de un usuario."""
+        with self._lock:
+            if peticiones > 0:
+                self.objetivos[sub] = peticiones
+            else:
+                self.objetivos.pop(sub, None)
+
+    def consumir_objetivo(self, sub: Optional[str]) -> bool:
+        if not sub:
+            return False
+        with self._lock:
+            restantes = self.objetivos.get(sub)
+            if not restantes:
+                return False
+            if restantes <= 1:
+                del self.objetivos[sub]
+            else:
+                self.objetivos[sub] = restantes - 1
+            return True
+
+    def muestreo_aleatorio(self) -> bool:
+        return settings.PROFILER_SAMPLE_RATE > 0 and random.random() < settings.PROFILER_SAMPLE_RATE
+
+    def adquirir(self) -> bool:
+        """Reserva el profiler si está libre y se respeta el intervalo mínimo."""
+        with self._lock:
+            ahora = time.monotonic()
+            if self._ocupado:
+                return False
+            if ahora - self._ultimo < settings.PROFILER_MIN_INTERVAL_SECONDS:
+                return False
+            self._ocupado = True
+            self._ultimo = ahora
+            return True
+
+    def liberar(self) -> None:
+        with self._lock:
+            self._ocupado = False
+
+    @staticmethod
+    def nuevo_id() -> str:
+        return f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+    def guardar(self, perfil_id: str, muestreador: Muestreador, metodo: str, ruta: str, duracion_ms: float) -> None:
+        """Escribe el perfil en disco con un encabezado de contexto."""
+        os.makedirs(self.directorio, exist_ok=True)
+        encabezado = (
+            f"# {metodo} {ruta} duracion_ms={duracion_ms:.1f} muestras={muestreador.muestras} "
+            f"intervalo_ms={muestreador.intervalo * 1000:.1f}\n"
+        )
+        with open(self._ruta(perfil_id), "w", encoding="utf-8") as f:
+            f.write(encabezado)
+            f.write(muestreador.collapsed())
+        self._podar()
+
+    def listar(self) -> List[dict]:
+        if not os.path.isdir(self.directorio):
+            return []
+        perfiles = []
+        for nombre in sorted(os.listdir(self.directorio), reverse=True):
+            if not nombre.endswith(".collapsed"):
+                continue
+            with open(os.path.join(self.directorio, nombre), encoding="utf-8") as f:
+                encabezado = f.readline().lstrip("# ").strip()
+            perfiles.append({"id": nombre[: -len(".collapsed")], "resumen": encabezado})
+        return perfiles
+
+    def leer(self, perfil_id: str) -> Optional[str]:
+        # El id se genera internamente; se rechaza cualquier separador de ruta.
+        if os.sep in perfil_id or "/" in perfil_id or perfil_id.startswith("."):
+            return None
+        ruta = self._ruta(perfil_id)
+        if not os.path.isfile(ruta):
+            return None
+        with open(ruta, encoding="utf-8") as f:
+            return "".join(l for l in f if not l.startswith("#"))
+
+    def _ruta(self, perfil_id: str) -> str:
+        return os.path.join(self.directorio, f"{perfil_id}.collapsed")
+
+    def _podar(self) -> None:
+        archivos = sorted(
+            (n for n in os.listdir(self.directorio) if n.endswith(".collapsed")),
+            reverse=True,
+        )
+        for nombre in archivos[settings.PROFILER_MAX_FILES:]:
+            os.remove(os.path.join(self.directorio, nombre))
+
+
+gestor_perfiles = GestorPerfiles()
@@ -0,0 +1,120 @@
+"""
+Token buckets para el rate limiting.
+
+Cada clave (usuario o IP) tiene un cubo de `capacidad` fichas que se
+recarga a `recarga` fichas por segundo; cada petición consume fichas según
+el costo de su clase de ruta. `consumir_todos` cobra de varios cubos a la
+vez (IP y usuario) solo si todos tienen fichas. El almacén por defecto vive
+en memoria del worker; con RATE_LIMIT_BACKEND=sqlite los cubos se
+comparten entre todos los workers del host a través de un archivo SQLite.
+Los almacenes con `bloqueante = True` hacen I/O y no deben llamarse desde
+el event loop.
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+# (clave, costo, capacidad, recarga)
+Cubo = Tuple[str, float, float, float]
+# (permitido, fichas_restantes, segundos_hasta_poder_reintentar)
+Resultado = Tuple[bool, float, float]
+
+
+def _recargar(tokens: float, ultimo: float, ahora: float, capacidad: float, recarga: float) -> float:
+    return min(capacidad, tokens + (ahora - ultimo) * recarga)
+
+
+def _cobrar(cubos: Sequence[Cubo], disponibles: List[float]) -> Tuple[List[float], List[Resultado]]:
+    """Fichas que quedan en cada cubo y su resultado; si alguno no alcanza no se cobra ninguno."""
+    todos = all(tokens >= cubo[1] for cubo, tokens in zip(cubos, disponibles))
+    restantes, resultados = [], []
+    for (_, costo, _, recarga), tokens in zip(cubos, disponibles):
+        permitido = tokens >= costo
+        restantes.append(tokens - costo if todos else tokens)
+        resultados.append((permitido, restantes[-1], 0.0 if permitido else (costo - tokens) / recarga))
+    return restantes, resultados
+
+
+class AlmacenMemoria:
+    """
+    Cubos en un dict del proceso en orden de uso. Al pasar de `max_claves`
+    se descarta el cubo usado hace más tiempo, que es el que más se
+    recargó; descartar un cubo equivale a dejarlo lleno.
+    """
+
+    def __init__(self, max_claves: int = 100_000):
+        self._cubos: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_claves = max_claves
+
+    bloqueante = False
+
+    def consumir(self, clave: str, costo: float, capacidad: float, recarga: float) -> Resultado:
+        """Devuelve (permitido, fichas_restantes, segundos_hasta_poder_reintentar)."""
+        return self.consumir_todos([(clave, costo, capacidad, recarga)])[0]
+
+    def consumir_todos(self, cubos: Sequence[Cubo]) -> List[Resultado]:
+        """Cobra de todos los cubos solo si todos tienen fichas; devuelve el resultado de cada uno."""
+        ahora = time.monotonic()
+        with self._lock:
+            disponibles = []
+            for clave, _, capacidad, recarga in cubos:
+                cubo = self._cubos.get(clave)
+                disponibles.append(capacidad if cubo is None
+                                   else _recargar(cubo[0], cubo[1], ahora, capacidad, recarga))
+            restantes, resultados = _cobrar(cubos, disponibles)
+            for (clave, *_), tokens in zip(cubos, restantes):
+                self._cubos[clave] = (tokens, ahora)
+                self._cubos.move_to_end(clave)
+            while len(self._cubos) > self._max_claves:
+                self._cubos.popitem(last=False)
+        return resultados
+
+
+class AlmacenSQLite:
+    """Cubos compartidos entre workers del mismo host mediante un archivo SQLite."""
+
+    def __init__(self, ruta: str):
+        self._conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False, timeout=1.0)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=OFF")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS cubos (clave TEXT PRIMARY KEY, tokens REAL NOT NULL, ultimo REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    bloqueante = True
+
+    def consumir(self, clave: str, costo: float, capacidad: float, recarga: float) -> Resultado:
+        return self.consumir_todos([(clave, costo, capacidad, recarga)])[0]
+
+    def consumir_todos(self, cubos: Sequence[Cubo]) -> List[Resultado]:
+        ahora = time.time()
+        with self._lock:
+            cur = self._conexion.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                disponibles = []
+                for clave, _, capacidad, recarga in cubos:
+                    fila = cur.execute("SELECT tokens, ultimo FROM cubos WHERE clave = ?", (clave,)).fetchone()
+                    disponibles.append(capacidad if fila is None
+                                       else _recargar(fila[0], fila[1], ahora, capacidad, recarga))
+                restantes, resultados = _cobrar(cubos, disponibles)
+                cur.executemany(
+                    "INSERT INTO cubos (clave, tokens, ultimo) VALUES (?, ?, ?) "
+                    "ON CONFLICT(clave) DO UPDATE SET tokens = excluded.tokens, ultimo = excluded.ultimo",
+                    [(clave, tokens, ahora) for (clave, *_), tokens in zip(cubos, restantes)],
+                )
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return resultados
+
+
+def crear_almacen(backend: str, ruta_sqlite: str):
+    if backend == "sqlite":
+        return AlmacenSQLite(ruta_sqlite)
+    return AlmacenMemoria()
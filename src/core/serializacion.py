@@ -0,0 +1,72 @@
+"""
+Serialización rápida de respuestas.
+
+Cuando una ruta devuelve un dict, FastAPI lo pasa por `jsonable_encoder`
+(o por la validación del `response_model`) fila por fila y después por
+`json.dumps`; el costo crece con el largo de la lista. Las filas que
+vienen de PostgREST ya son JSON nativo, así que las rutas de listados las
+devuelven con `respuesta(...)`:
+  - `RespuestaJSON` serializa con orjson, directo a bytes;
+  - devolver una Response hace que FastAPI no revalide ni recodifique; el
+    `response_model` del decorador se mantiene para la documentación;
+  - `filas_respuesta(modelo, filas)` deja en cada fila solo los campos del
+    modelo, como haría el `response_model`, sin validarlos. Con
+    SERIALIZATION_TRUST_UPSTREAM=false se validan con un TypeAdapter
+    construido una sola vez por modelo.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from src.core.config import settings
+
+
+def _por_defecto(valor: Any):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    if isinstance(valor, (set, frozenset, tuple)):
+        return list(valor)
+    raise TypeError(f"{type(valor).__name__} no es serializable a JSON")
+
+
+def a_json(contenido: Any) -> bytes:
+    # orjson ya serializa date/datetime en ISO 8601 y los dicts con claves no str
+    return orjson.dumps(contenido, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse que renderiza con orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
+
+
+def respuesta(contenido: Any, status_code: int = 200) -> RespuestaJSON:
+    """Respuesta ya serializada: FastAPI la envía tal cual, sin pasar por el response_model."""
+    return RespuestaJSON(contenido, status_code=status_code)
+
+
+@lru_cache(maxsize=None)
+def adaptador(modelo: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter de List[modelo], construido una vez por modelo."""
+    return TypeAdapter(List[modelo])
+
+
+@lru_cache(maxsize=None)
+def _campos(modelo: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(modelo.model_fields)
+
+
+def filas_respuesta(modelo: Type[BaseModel], filas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas con la forma de `modelo`: proyectadas si vienen de Supabase, validadas si no se confía en ellas."""
+    if not settings.SERIALIZATION_TRUST_UPSTREAM:
+        tipo = adaptador(modelo)
+        return tipo.dump_python(tipo.validate_python(filas), mode="json")
+    campos = _campos(modelo)
+    return [{c: fila.get(c) for c in campos} for fila in filas]
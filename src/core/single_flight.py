@@ -0,0 +1,93 @@
+"""
+Coalescencia "single-flight" de lecturas idénticas concurrentes.
+
+Si varias peticiones piden lo mismo al mismo tiempo (mismo usuario, misma
+operación, mismos parámetros), solo la primera consulta a Supabase; las
+demás esperan y reciben el mismo resultado (o la misma excepción). La
+espera respeta el presupuesto de la petición que espera: si se agota antes
+de que termine la llamada compartida se responde 504, igual que en
+`src.database.resilience.llamar`.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from fastapi import HTTPException
+
+from src.core.metrics import registro
+from src.database.resilience import tiempo_restante
+
+_llamadas = registro.contador(
+    "singleflight_llamadas_total", "Lecturas que pasaron por la capa single-flight"
+)
+_compartidas = registro.contador(
+    "singleflight_compartidas_total", "Lecturas resueltas con el resultado de otra llamada en curso"
+)
+_vencidas = registro.contador(
+    "singleflight_esperas_vencidas_total", "Esperas por una llamada en curso que agotaron el presupuesto"
+)
+
+
+def _ratio():
+    resultado = {}
+    for etiquetas, total in _llamadas.muestras():
+        if total:
+            resultado[etiquetas] = _compartidas.valor(**dict(etiquetas)) / total
+    return resultado
+
+
+registro.medidor(
+    "singleflight_ratio_coalescencia", "Fracción de lecturas que compartieron una llamada en curso", _ratio
+)
+
+
+class _Llamada:
+    __slots__ = ("evento", "resultado", "error")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_curso: Dict[Hashable, _Llamada] = {}
+
+    def ejecutar(self, operacion: str, clave: Hashable, funcion: Callable[[], Any]) -> Any:
+        """
+        Ejecuta `funcion` una sola vez por (operacion, clave) entre las
+        llamadas concurrentes. El resultado se comparte: quien lo reciba no
+        debe mutarlo.
+        """
+        clave_completa = (operacion, clave)
+        with self._lock:
+            llamada = self._en_curso.get(clave_completa)
+            lider = llamada is None
+            if lider:
+                llamada = _Llamada()
+                self._en_curso[clave_completa] = llamada
+
+        _llamadas.inc(operacion=operacion)
+        if not lider:
+            _compartidas.inc(operacion=operacion)
+            if not llamada.evento.wait(timeout=max(0.0, tiempo_restante())):
+                _vencidas.inc(operacion=operacion)
+                raise HTTPException(status_code=504, detail="Tiempo de espera agotado con Supabase")
+            if llamada.error is not None:
+                raise llamada.error
+            return llamada.resultado
+
+        try:
+            llamada.resultado = funcion()
+            return llamada.resultado
+        except BaseException as e:
+            llamada.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave_completa]
+            llamada.evento.set()
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,80 @@
+"""
+Recorrido por páginas con paginación por llave y filtros incrementales.
+
+Pide páginas ordenadas por `id` usando `id > último visto` en lugar de
+OFFSET, así cada página cuesta lo mismo aunque la tabla sea grande y una
+fila insertada o borrada a mitad del recorrido no desplaza a las demás.
+Los deltas por `actualizado_en` usan un watermark que nunca pasa del
+momento de la lectura menos un margen (ver `marca_segura`).
+"""
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Optional
+
+from src.database.resilience import ejecutar
+
+
+def recorrer(construir: Callable[[], object], tamano: int, columna: str = "id") -> Iterator[dict]:
+    """
+    Itera todas las filas de la consulta que devuelve `construir()` (un
+    builder de postgrest nuevo en cada llamada, ya filtrado).
+    """
+    ultimo = None
+    while True:
+        query = construir()
+        if ultimo is not None:
+            query = query.gt(columna, ultimo)
+        pagina = ejecutar(query.order(columna).limit(tamano), idempotente=True).data or []
+        yield from pagina
+        if len(pagina) < tamano:
+            return
+        ultimo = pagina[-1][columna]
+
+
+def _instante(marca: str) -> datetime:
+    instante = datetime.fromisoformat(marca)
+    # Las marcas sin zona son UTC (timestamp sin tz, utcnow)
+    return instante if instante.tzinfo else instante.replace(tzinfo=timezone.utc)
+
+
+def posterior(marca: Optional[str], otra: Optional[str]) -> bool:
+    """True si `marca` es más reciente que `otra` (None es anterior a todo)."""
+    if marca is None or otra is None:
+        return marca is not None
+    try:
+        return _instante(marca) > _instante(otra)
+    except ValueError:
+        return marca > otra
+
+
+def mas_reciente(marca: Optional[str], otra: Optional[str]) -> Optional[str]:
+    """La más reciente de dos marcas."""
+    return otra if posterior(otra, marca) else marca
+
+
+def marca_segura(maxima: Optional[str], lectura: float, margen: float) -> str:
+    """
+    Watermark para el próximo delta: la marca más reciente vista (`maxima`),
+    pero nunca posterior a `lectura - margen`, donde `lectura` es el
+    time.time() tomado antes de leer. Una fila con marca anterior a la
+    lectura puede confirmarse después (transacción larga, desfase de
+    relojes); se asume que eso no pasa de `margen` segundos, así que todo lo
+    que tenga marca <= lectura - margen ya estaba visible al leer y lo
+    posterior se vuelve a pedir. El llamador debe tolerar filas repetidas.
+    """
+    limite = datetime.fromtimestamp(lectura - margen, timezone.utc)
+    if maxima is None:
+        return limite.isoformat()
+    try:
+        instante = datetime.fromisoformat(maxima)
+    except ValueError:
+        return maxima
+    if instante.tzinfo is None:
+        limite = limite.replace(tzinfo=None)
+    else:
+        limite = limite.astimezone(instante.tzinfo)
+    return maxima if instante <= limite else limite.isoformat()
+
+
+def desde_marca(query, marca: str, columna: str = "actualizado_en"):
+    """Filtra las filas modificadas después de `marca`, un watermark de `marca_segura`."""
+    return query.gt(columna, marca)
@@ -0,0 +1,285 @@
+"""
+Ejecución protegida de llamadas a Supabase.
+
+Toda llamada al upstream pasa por `ejecutar` (consultas de postgrest) o
+`llamar` (cualquier función), que aplican:
+
+- Presupuesto por petición: DeadlineMiddleware fija una fecha límite y cada
+  llamada espera como máximo el tiempo restante (y nunca más de
+  SUPABASE_TIMEOUT_SECONDS). Al agotarse se responde 504 y el hilo de la
+  petición queda libre aunque la llamada siga en curso en el pool.
+- Hedging de lecturas idempotentes: si la respuesta tarda más que el p95
+  observado, se lanza una segunda copia y gana la primera que termine.
+- Circuit breaker: tras CIRCUIT_FAILURE_THRESHOLD fallos dentro de
+  CIRCUIT_WINDOW_SECONDS se rechazan las llamadas con 503 durante
+  CIRCUIT_COOLDOWN_SECONDS, y luego se deja pasar una llamada de prueba.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+import httpx
+import requests
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from src.core.config import settings
+from src.core.metrics import registro
+
+logger = logging.getLogger(__name__)
+
+_fecha_limite: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("fecha_limite", default=None)
+
+_pool = ThreadPoolExecutor(max_workers=settings.SUPABASE_POOL_SIZE, thread_name_prefix="supabase")
+
+_llamadas = registro.contador("supabase_llamadas_total", "Llamadas a Supabase por resultado")
+_hedges = registro.contador("supabase_hedge_lanzados_total", "Lecturas duplicadas lanzadas por hedging")
+_hedges_ganados = registro.contador("supabase_hedge_ganados_total", "Lecturas en las que ganó la copia de hedging")
+_aperturas = registro.contador("supabase_circuito_aperturas_total", "Veces que se abrió el circuit breaker")
+
+
+# ---------- PRESUPUESTO POR PETICIÓN ----------
+@contextmanager
+def presupuesto(segundos: float):
+    """
+    Fija la fecha límite para todas las llamadas hechas dentro del bloque.
+    Un bloque anidado solo puede acortar la fecha límite que ya había.
+    """
+    limite = time.monotonic() + segundos
+    exterior = _fecha_limite.get()
+    token = _fecha_limite.set(limite if exterior is None else min(limite, exterior))
+    try:
+        yield
+    finally:
+        _fecha_limite.reset(token)
+
+
+def tiempo_restante() -> float:
+    """Segundos disponibles para la próxima llamada al upstream."""
+    limite = _fecha_limite.get()
+    if limite is None:
+        return settings.SUPABASE_TIMEOUT_SECONDS
+    return min(limite - time.monotonic(), settings.SUPABASE_TIMEOUT_SECONDS)
+
+
+# ---------- CIRCUIT BREAKER ----------
+class CircuitBreaker:
+    CERRADO, SEMIABIERTO, ABIERTO = 0, 1, 2
+
+    def __init__(self, umbral: int, ventana: float, enfriamiento: float):
+        self.umbral = umbral
+        self.ventana = ventana
+        self.enfriamiento = enfriamiento
+        self.estado = self.CERRADO
+        self._fallos = deque()
+        self._abierto_desde = 0.0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            if self.estado == self.ABIERTO:
+                if time.monotonic() - self._abierto_desde < self.enfriamiento:
+                    return False
+                self.estado = self.SEMIABIERTO
+            # Semiabierto: solo una llamada de prueba a la vez
+            if self._prueba_en_curso:
+                return False
+            self._prueba_en_curso = True
+            return True
+
+    def registrar_exito(self) -> None:
+        with self._lock:
+            self._prueba_en_curso = False
+            if self.estado != self.CERRADO:
+                logger.info("Circuit breaker de Supabase cerrado")
+            self.estado = self.CERRADO
+            self._fallos.clear()
+
+    def registrar_fallo(self) -> None:
+        ahora = time.monotonic()
+        with self._lock:
+            self._prueba_en_curso = False
+            if self.estado == self.SEMIABIERTO:
+                self._abrir(ahora)
+                return
+            self._fallos.append(ahora)
+            while self._fallos and ahora - self._fallos[0] > self.ventana:
+                self._fallos.popleft()
+            if self.estado == self.CERRADO and len(self._fallos) >= self.umbral:
+                self._abrir(ahora)
+
+    def segundos_para_reintento(self) -> int:
+        return max(1, int(self.enfriamiento - (time.monotonic() - self._abierto_desde)) + 1)
+
+    def _abrir(self, ahora: float) -> None:
+        self.estado = self.ABIERTO
+        self._abierto_desde = ahora
+        self._fallos.clear()
+        _aperturas.inc()
+        logger.warning("Circuit breaker de Supabase abierto durante %.0f s", self.enfriamiento)
+
+
+breaker = CircuitBreaker(
+    settings.CIRCUIT_FAILURE_THRESHOLD,
+    settings.CIRCUIT_WINDOW_SECONDS,
+    settings.CIRCUIT_COOLDOWN_SECONDS,
+)
+registro.medidor(
+    "supabase_circuito_estado",
+    "Estado del circuit breaker (0 cerrado, 1 semiabierto, 2 abierto)",
+    lambda: {(): breaker.estado},
+)
+
+
+# ---------- LATENCIAS PARA EL HEDGING ----------
+class HistorialLatencias:
+    """Ventana deslizante de latencias con p95 recalculado cada pocas muestras."""
+
+    def __init__(self, tamano: int = 256, cada: int = 16):
+        self._muestras = deque(maxlen=tamano)
+        self._cada = cada
+        self._pendientes = 0
+        self.p95 = None
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos: float) -> None:
+        with self._lock:
+            self._muestras.append(segundos)
+            self._pendientes += 1
+            if self._pendientes >= self._cada and len(self._muestras) >= 20:
+                ordenadas = sorted(self._muestras)
+                self.p95 = ordenadas[int(len(ordenadas) * 0.95) - 1]
+                self._pendientes = 0
+
+    def retardo_hedge(self) -> Optional[float]:
+        if self.p95 is None:
+            return None
+        return max(self.p95, settings.HEDGE_MIN_DELAY_MS / 1000)
+
+
+latencias = HistorialLatencias()
+registro.medidor(
+    "supabase_hedge_retardo_ms",
+    "Retardo actual antes de lanzar una lectura de hedging (p95 observado)",
+    lambda: {(): round((latencias.retardo_hedge() or 0) * 1000, 2)},
+)
+
+
+# ---------- EJECUCIÓN ----------
+# Clases de SQLSTATE que indican un problema del servidor y no de la petición:
+# 08 conexión, 53 recursos insuficientes, 57 intervención del operador
+# (cancelación por statement_timeout, apagado), 58 error del sistema, XX interno.
+SQLSTATE_UPSTREAM = ("08", "53", "57", "58", "XX")
+
+
+def _es_fallo_upstream(error: BaseException) -> bool:
+    """
+    Errores de red y errores de servidor cuentan para el breaker. El `code`
+    de un APIError es un SQLSTATE de Postgres (23505, 22P02...) o un código
+    PGRSTxxx de PostgREST; solo cuando la respuesta no trae JSON postgrest
+    pone ahí el estado HTTP.
+    """
+    if isinstance(error, (httpx.TransportError, requests.RequestException)):
+        return True
+    if not isinstance(error, APIError):
+        return False
+    codigo = str(error.code or "")
+    if len(codigo) == 3 and codigo.isdigit():  # estado HTTP (respuesta sin JSON)
+        return int(codigo) >= 500
+    if codigo.startswith("PGRST"):
+        # PGRST0xx: PostgREST sin conexión a la base; PGRST5xx: error interno
+        return codigo[5:6] in ("0", "5")
+    return len(codigo) == 5 and codigo[:2] in SQLSTATE_UPSTREAM
+
+
+def _cronometrar(funcion: Callable[[], Any]) -> Callable[[], Any]:
+    def envoltura():
+        inicio = time.monotonic()
+        resultado = funcion()
+        latencias.registrar(time.monotonic() - inicio)
+        return resultado
+    return envoltura
+
+
+def llamar(funcion: Callable[[], Any], idempotente: bool = False) -> Any:
+    """
+    Ejecuta `funcion` (una llamada bloqueante al upstream) bajo el
+    presupuesto de la petición y el circuit breaker. Solo las llamadas
+    idempotentes se duplican por hedging.
+    """
+    restante = tiempo_restante()
+    if restante <= 0:
+        _llamadas.inc(resultado="sin_presupuesto")
+        raise HTTPException(status_code=504, detail="Tiempo de espera agotado con Supabase")
+
+    if not breaker.permitir():
+        _llamadas.inc(resultado="rechazada")
+        raise HTTPException(
+            status_code=503,
+            detail="Servicio de datos no disponible temporalmente",
+            headers={"Retry-After": str(breaker.segundos_para_reintento())},
+        )
+
+    limite = time.monotonic() + restante
+    tarea = _cronometrar(funcion)
+    futuros = [_pool.submit(tarea)]
+    retardo = latencias.retardo_hedge() if idempotente and settings.HEDGE_ENABLED else None
+
+    try:
+        if retardo is not None and retardo < restante:
+            hechos, _ = wait(futuros, timeout=retardo)
+            if not hechos:
+                _hedges.inc()
+                futuros.append(_pool.submit(tarea))
+        resultado = _primero_valido(futuros, limite)
+    except TimeoutError:
+        _llamadas.inc(resultado="timeout")
+        breaker.registrar_fallo()
+        raise HTTPException(status_code=504, detail="Tiempo de espera agotado con Supabase")
+    except Exception as e:
+        if _es_fallo_upstream(e):
+            _llamadas.inc(resultado="error")
+            breaker.registrar_fallo()
+            logger.warning("Fallo al llamar a Supabase: %s", e)
+            raise HTTPException(status_code=503, detail="Error de conexión con Supabase")
+        # Errores de la petición (p. ej. restricciones de PostgREST): el upstream responde bien
+        _llamadas.inc(resultado="ok")
+        breaker.registrar_exito()
+        raise
+
+    _llamadas.inc(resultado="ok")
+    breaker.registrar_exito()
+    return resultado
+
+
+def _primero_valido(futuros: list, limite: float) -> Any:
+    """Devuelve el primer resultado exitoso; si todos fallan, propaga el último error."""
+    pendientes = set(futuros)
+    error = None
+    while pendientes:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            raise TimeoutError
+        hechos, pendientes = wait(pendientes, timeout=restante, return_when=FIRST_COMPLETED)
+        if not hechos:
+            raise TimeoutError
+        for futuro in hechos:
+            if futuro.exception() is None:
+                if len(futuros) > 1 and futuro is futuros[1]:
+                    _hedges_ganados.inc()
+                return futuro.result()
+            error = futuro.exception()
+    raise error
+
+
+def ejecutar(consulta, idempotente: bool = False):
+    """Atajo para `llamar` con una consulta de postgrest ya construida."""
+    return llamar(consulta.execute, idempotente=idempotente)
@@ -1,4 +1,11 @@
 from supabase import create_client
+from supabase.lib.client_options import ClientOptions
 from src.core.config import settings
 
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+# El timeout del cliente libera los hilos del pool aunque la petición que
+# los lanzó ya haya respondido por agotar su presupuesto.
+supabase = create_client(
+    settings.SUPABASE_URL,
+    settings.SUPABASE_KEY,
+    options=ClientOptions(postgrest_client_timeout=settings.SUPABASE_TIMEOUT_SECONDS),
+)
@@ -4,6 +4,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 import os
 from dotenv import load_dotenv
+from src.services.usuario_service import id_de_sub
 
 # Cargar variables de entorno (.env)
 load_dotenv()
@@ -25,3 +26,14 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
+
+
+def usuario_actual(payload: dict = Depends(verify_token)) -> str:
+    """
+    Id del usuario autenticado, venga el `sub` del token como id o como
+    correo. Responde 404 si el correo no corresponde a ningún usuario.
+    """
+    usuario_id = id_de_sub(payload.get("sub"))
+    if not usuario_id:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return usuario_id
@@ -0,0 +1,22 @@
+# src/middleware/deadline_middleware.py
+from src.core.config import settings
+from src.database.resilience import presupuesto
+
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI que asigna a cada petición un presupuesto de
+    REQUEST_BUDGET_SECONDS. Las llamadas a Supabase hechas durante la
+    petición (incluidas las que corren en el threadpool, que heredan el
+    contexto) comparten esa fecha límite.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with presupuesto(settings.REQUEST_BUDGET_SECONDS):
+            await self.app(scope, receive, send)
@@ -0,0 +1,164 @@
+# src/middleware/idempotency_middleware.py
+import asyncio
+import hashlib
+import json
+import time
+
+import anyio
+from jose import jwt, JWTError
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.core.idempotency import COMPLETA, CONFLICTO, EN_CURSO, crear_almacen_idempotencia
+from src.core.metrics import registro
+
+# Creaciones que los clientes móviles reintentan; se comparan sin la barra final
+RUTAS_IDEMPOTENTES = ("/gastos", "/ingresos", "/plan-ahorro", "/api/plan-gestion", "/recurrentes")
+MAX_LONGITUD_CLAVE = 255
+# Respuestas que dependen del momento y no del contenido: el reintento debe poder ejecutarse
+NO_GUARDAR = {401, 403, 408, 409, 425, 429}
+
+_peticiones = registro.contador("idempotencia_peticiones_total", "Peticiones con Idempotency-Key por resultado")
+
+
+def _sub_verificado(cabeceras: dict):
+    """
+    `sub` del token con la firma verificada: las claves se guardan por
+    usuario y un token falsificado no debe poder leer respuestas ajenas.
+    """
+    autorizacion = cabeceras.get(b"authorization")
+    if not autorizacion or not autorizacion[:7].lower() == b"bearer ":
+        return None
+    try:
+        return jwt.decode(autorizacion[7:].decode("latin-1"), settings.SECRET_KEY,
+                          algorithms=[settings.ALGORITHM]).get("sub")
+    except (JWTError, ValueError):
+        return None
+
+
+async def _responder(send, status: int, cabeceras, cuerpo: bytes) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": cabeceras})
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+async def _error(send, status: int, detalle: str) -> None:
+    cuerpo = json.dumps({"detail": detalle}).encode()
+    await _responder(send, status, [(b"content-type", b"application/json"),
+                                    (b"content-length", str(len(cuerpo)).encode())], cuerpo)
+
+
+class IdempotencyMiddleware:
+    """
+    Middleware ASGI para la cabecera Idempotency-Key en las creaciones.
+
+    La primera petición con una clave reserva la clave, se ejecuta y su
+    respuesta (si no es 5xx) se guarda. Las repeticiones con la misma clave,
+    el mismo usuario y el mismo cuerpo reciben la respuesta guardada con
+    `Idempotent-Replayed: true` sin tocar Supabase. Si la original sigue en
+    curso, la repetición espera hasta IDEMPOTENCY_WAIT_SECONDS a que termine
+    (409 si no termina). La misma clave con otro cuerpo responde 422. Con
+    el almacén SQLite cada operación corre fuera del event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.almacen = crear_almacen_idempotencia(
+            settings.IDEMPOTENCY_BACKEND, settings.IDEMPOTENCY_SQLITE_PATH, settings.IDEMPOTENCY_MAX_KEYS
+        )
+
+    async def _en_almacen(self, operacion: str, *args):
+        """Llama a una operación del almacén; las del almacén SQLite, fuera del event loop."""
+        funcion = getattr(self.almacen, operacion)
+        if self.almacen.bloqueante:
+            return await run_in_threadpool(funcion, *args)
+        return funcion(*args)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "POST"
+                or scope["path"].rstrip("/") not in RUTAS_IDEMPOTENTES):
+            await self.app(scope, receive, send)
+            return
+        cabeceras = dict(scope["headers"])
+        clave = cabeceras.get(b"idempotency-key")
+        if clave is None:
+            await self.app(scope, receive, send)
+            return
+        if not clave or len(clave) > MAX_LONGITUD_CLAVE:
+            await _error(send, 400, f"Idempotency-Key debe tener entre 1 y {MAX_LONGITUD_CLAVE} caracteres")
+            return
+        sub = _sub_verificado(cabeceras)
+        if sub is None:
+            # Sin usuario válido la ruta responderá 401; no hay nada que guardar
+            await self.app(scope, receive, send)
+            return
+
+        # El cuerpo se lee completo para calcular la huella y se vuelve a entregar a la app
+        partes = []
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "http.disconnect":
+                return
+            partes.append(mensaje.get("body", b""))
+            if not mensaje.get("more_body"):
+                break
+        cuerpo = b"".join(partes)
+        huella = hashlib.sha256(scope["path"].rstrip("/").encode() + b"\0" + cuerpo).hexdigest()
+        clave_almacen = f"{sub}:{clave.decode('latin-1')}"
+
+        limite = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        espera = 0.02
+        while True:
+            estado, respuesta = await self._en_almacen("reservar", clave_almacen, huella,
+                                                       settings.IDEMPOTENCY_LOCK_SECONDS)
+            if estado == COMPLETA:
+                _peticiones.inc(resultado="repetida")
+                status, cabeceras_guardadas, cuerpo_guardado = respuesta
+                await _responder(send, status, cabeceras_guardadas + [(b"idempotent-replayed", b"true")],
+                                 cuerpo_guardado)
+                return
+            if estado == CONFLICTO:
+                _peticiones.inc(resultado="conflicto")
+                await _error(send, 422, "Idempotency-Key ya usada con otra solicitud")
+                return
+            if estado != EN_CURSO:
+                break
+            if time.monotonic() >= limite:
+                _peticiones.inc(resultado="en_curso")
+                await _error(send, 409, "Hay una solicitud con la misma Idempotency-Key en curso")
+                return
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 0.25)
+
+        _peticiones.inc(resultado="nueva")
+        entregado = False
+
+        async def recibir():
+            nonlocal entregado
+            if not entregado:
+                entregado = True
+                return {"type": "http.request", "body": cuerpo, "more_body": False}
+            return await receive()
+
+        inicio, fragmentos = None, []
+
+        async def enviar(mensaje):
+            nonlocal inicio
+            if mensaje["type"] == "http.response.start":
+                inicio = mensaje
+            elif mensaje["type"] == "http.response.body":
+                fragmentos.append(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, recibir, enviar)
+        except BaseException:
+            # También si la petición se cancela: la clave no puede quedar reservada
+            with anyio.CancelScope(shield=True):
+                await self._en_almacen("liberar", clave_almacen, huella)
+            raise
+        if inicio is None or inicio["status"] >= 500 or inicio["status"] in NO_GUARDAR:
+            await self._en_almacen("liberar", clave_almacen, huella)
+            return
+        await self._en_almacen("completar", clave_almacen, huella,
+                               (inicio["status"], list(inicio.get("headers", [])), b"".join(fragmentos)),
+                               settings.IDEMPOTENCY_TTL_SECONDS)
@@ -0,0 +1,81 @@
+# src/middleware/profiler_middleware.py
+import hmac
+import time
+
+from jose import jwt, JWTError
+
+from src.core.config import settings
+from src.core.profiler import Muestreador, gestor_perfiles
+
+CABECERA_PERFIL = b"x-debug-profile"
+
+
+def token_admin_valido(valor) -> bool:
+    """Compara el token de depuración en tiempo constante."""
+    if not settings.PROFILER_TOKEN or not valor:
+        return False
+    if isinstance(valor, bytes):
+        valor = valor.decode("latin-1")
+    return hmac.compare_digest(valor, settings.PROFILER_TOKEN)
+
+
+def _sub_del_token(cabeceras: dict):
+    autorizacion = cabeceras.get(b"authorization", b"").decode("latin-1")
+    if not autorizacion.lower().startswith("bearer "):
+        return None
+    try:
+        return jwt.decode(autorizacion[7:], settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+class ProfilerMiddleware:
+    """
+    Middleware ASGI que perfila una petición cuando:
+    - trae la cabecera `X-Debug-Profile: <PROFILER_TOKEN>`, o
+    - pertenece a un usuario armado desde /debug/profiler/objetivos, o
+    - cae en la fracción PROFILER_SAMPLE_RATE de muestreo aleatorio.
+
+    Solo se registra en main.py si PROFILER_ENABLED=true, de modo que con la
+    función desactivada no existe ningún costo por petición.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/debug"):
+            await self.app(scope, receive, send)
+            return
+
+        cabeceras = dict(scope["headers"])
+        solicitado = token_admin_valido(cabeceras.get(CABECERA_PERFIL))
+        if not solicitado and gestor_perfiles.objetivos:
+            solicitado = gestor_perfiles.consumir_objetivo(_sub_del_token(cabeceras))
+        if not solicitado and not gestor_perfiles.muestreo_aleatorio():
+            await self.app(scope, receive, send)
+            return
+        if not gestor_perfiles.adquirir():
+            await self.app(scope, receive, send)
+            return
+
+        muestreador = Muestreador(settings.PROFILER_INTERVAL_MS / 1000)
+        perfil_id = gestor_perfiles.nuevo_id()
+
+        async def send_con_perfil(mensaje):
+            if mensaje["type"] == "http.response.start":
+                mensaje["headers"] = list(mensaje.get("headers", [])) + [(b"x-profile-id", perfil_id.encode())]
+            await send(mensaje)
+
+        inicio = time.perf_counter()
+        muestreador.iniciar()
+        try:
+            await self.app(scope, receive, send_con_perfil)
+        finally:
+            muestreador.detener()
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            try:
+                gestor_perfiles.guardar(perfil_id, muestreador, scope["method"], scope["path"], duracion_ms)
+                print(f"🔬 Perfil {perfil_id} guardado ({scope['method']} {scope['path']}, {duracion_ms:.0f} ms)")
+            finally:
+                gestor_perfiles.liberar()
@@ -0,0 +1,118 @@
+# src/middleware/rate_limit_middleware.py
+import json
+import math
+
+from jose import jwt, JWTError
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.core.metrics import registro
+from src.core.rate_limit import crear_almacen
+
+# Fichas que consume cada clase de ruta: login/registro pagan bcrypt y los
+# reportes, la búsqueda, la analítica y el pronóstico recorren el historial completo
+# (el dashboard reúne varias consultas, entre ellas el reporte del mes).
+COSTOS = {
+    "auth": 10,
+    "reporte": 5,
+    "escritura": 2,
+    "lectura": 1,
+}
+
+RUTAS_AUTH = ("/auth/login", "/auth/register")
+RUTAS_COSTOSAS = ("/api/reporte", "/api/buscar", "/api/analitica", "/api/pronostico", "/dashboard", "/api/archivo")
+RUTAS_EXENTAS = ("/metrics", "/docs", "/openapi.json", "/redoc")
+
+_rechazos = registro.contador("rate_limit_rechazos_total", "Peticiones rechazadas con 429 por clase de ruta")
+
+
+def clasificar(metodo: str, ruta: str) -> str:
+    if ruta in RUTAS_AUTH or (metodo == "POST" and ruta.startswith("/usuarios")):
+        return "auth"
+    if ruta.startswith(RUTAS_COSTOSAS):
+        return "reporte"
+    if metodo != "GET":
+        return "escritura"
+    return "lectura"
+
+
+def _ip_cliente(scope, cabeceras: dict) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        reenviado = cabeceras.get(b"x-forwarded-for")
+        if reenviado:
+            return reenviado.split(b",")[0].strip().decode("latin-1")
+    cliente = scope.get("client")
+    return cliente[0] if cliente else "desconocido"
+
+
+def _sub_verificado(cabeceras: dict):
+    """
+    `sub` del token con la firma verificada. Con un `sub` sin verificar
+    cualquiera podría falsificar un token con el id o el correo de otro
+    usuario y vaciar su cubo; los tokens inválidos solo cuentan contra el
+    cubo de su IP.
+    """
+    autorizacion = cabeceras.get(b"authorization")
+    if not autorizacion or not autorizacion[:7].lower() == b"bearer ":
+        return None
+    try:
+        return jwt.decode(autorizacion[7:].decode("latin-1"), settings.SECRET_KEY,
+                          algorithms=[settings.ALGORITHM]).get("sub")
+    except (JWTError, ValueError):
+        return None
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de admisión: aplica un token bucket por IP y otro por
+    usuario (claim `sub`); la petición pasa, y consume de ambos, solo si
+    ambos tienen fichas. Responde 429 con Retry-After y las cabeceras
+    RateLimit-* del cubo que la rechazó cuando no. El almacén SQLite se
+    consulta fuera del event loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.almacen = crear_almacen(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_SQLITE_PATH)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(RUTAS_EXENTAS):
+            await self.app(scope, receive, send)
+            return
+
+        cabeceras = dict(scope["headers"])
+        clase = clasificar(scope["method"], scope["path"])
+        costo = COSTOS[clase]
+
+        cubos = [(f"ip:{_ip_cliente(scope, cabeceras)}", costo,
+                  settings.RATE_LIMIT_IP_CAPACITY, settings.RATE_LIMIT_IP_REFILL)]
+        sub = _sub_verificado(cabeceras)
+        if sub:
+            cubos.append((f"usuario:{sub}", costo,
+                          settings.RATE_LIMIT_USER_CAPACITY, settings.RATE_LIMIT_USER_REFILL))
+        # Se cobra de los dos cubos o de ninguno: un rechazo del cubo del
+        # usuario no gasta las fichas de su IP
+        if self.almacen.bloqueante:
+            resultados = await run_in_threadpool(self.almacen.consumir_todos, cubos)
+        else:
+            resultados = self.almacen.consumir_todos(cubos)
+        rechazos = [(espera, cubo[2]) for cubo, (permitido, _, espera) in zip(cubos, resultados) if not permitido]
+        if not rechazos:
+            await self.app(scope, receive, send)
+            return
+
+        espera, limite = max(rechazos)
+        _rechazos.inc(clase=clase)
+        cuerpo = json.dumps({"detail": "Demasiadas solicitudes, intenta de nuevo más tarde"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(cuerpo)).encode()),
+                (b"retry-after", str(max(1, math.ceil(espera))).encode()),
+                (b"ratelimit-limit", str(int(limite)).encode()),
+                (b"ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
@@ -1,16 +1,17 @@
 from pydantic import BaseModel
 from typing import Optional
+from src.core.money import Monto
 
 class Gasto(BaseModel):
     categoria: str
     nombre_gasto: str
-    monto: float
+    monto: Monto
     fecha: str
     descripcion: Optional[str] = None
 
 class GastoUpdate(BaseModel):
     categoria: Optional[str] = None
     nombre_gasto: Optional[str] = None
-    monto: Optional[float] = None
+    monto: Optional[Monto] = None
     fecha: Optional[str] = None
     descripcion: Optional[str] = None
\ No newline at end of file
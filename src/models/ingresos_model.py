@@ -1,16 +1,17 @@
 from pydantic import BaseModel
 from typing import Optional
+from src.core.money import Monto
 
 class Ingreso(BaseModel):
     concepto: str
     nombre_fuente: str
-    monto: float
+    monto: Monto
     fecha: str
     descripcion: Optional[str] = None
 
 class IngresoUpdate(BaseModel):
     concepto: Optional[str] = None
     nombre_fuente: Optional[str] = None
-    monto: Optional[float] = None
+    monto: Optional[Monto] = None
     fecha: Optional[str] = None
     descripcion: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date
+from src.core.money import Monto
+
+class ReglaRecurrente(BaseModel):
+    tipo: str = Field(..., description="gastos o ingresos")
+    categoria: str = Field(..., min_length=1, description="Categoría del gasto o concepto del ingreso")
+    nombre: str = Field(..., min_length=1, max_length=255, description="Nombre del gasto o de la fuente del ingreso")
+    monto: Monto = Field(..., gt=0)
+    descripcion: Optional[str] = Field(None, max_length=500)
+    frecuencia: str = Field(..., description="diaria, semanal, mensual o anual")
+    intervalo: int = Field(1, ge=1, le=366, description="Cada cuántas unidades de la frecuencia (2 + semanal = quincenal)")
+    fecha_inicio: date
+    fecha_fin: Optional[date] = None
+    activa: bool = True
+
+class ReglaRecurrenteUpdate(BaseModel):
+    categoria: Optional[str] = Field(None, min_length=1)
+    nombre: Optional[str] = Field(None, min_length=1, max_length=255)
+    monto: Optional[Monto] = Field(None, gt=0)
+    descripcion: Optional[str] = Field(None, max_length=500)
+    frecuencia: Optional[str] = None
+    intervalo: Optional[int] = Field(None, ge=1, le=366)
+    fecha_inicio: Optional[date] = None
+    fecha_fin: Optional[date] = None
+    activa: Optional[bool] = None
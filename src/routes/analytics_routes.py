@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from datetime import date
+from typing import Optional
+from src.schemas.analytics_schemas import AnaliticaGastosResp
+from src.services.analytics_service import analizar_gastos
+from src.middleware.auth_middleware import usuario_actual
+
+router = APIRouter(prefix="/api", tags=["analitica"])
+
+@router.get("/analitica/gastos", response_model=AnaliticaGastosResp)
+def analitica_gastos(
+    inicio: Optional[date] = Query(None, description="Fecha de inicio (YYYY-MM-DD)"),
+    fin: Optional[date] = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
+    top: int = Query(5, ge=1, le=50, description="Cantidad de categorías a devolver"),
+    umbral_z: float = Query(3.0, gt=0, description="z-score a partir del cual un gasto es atípico"),
+    max_atipicos: int = Query(10, ge=0, le=100),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """
+    Retorna las categorías con mayor gasto del usuario y los gastos
+    inusualmente grandes respecto a su categoría, en el rango indicado.
+    """
+    if inicio and fin and fin < inicio:
+        raise HTTPException(status_code=400, detail="La fecha fin no puede ser menor que la fecha inicio.")
+
+    try:
+        data = analizar_gastos(usuario_id, inicio, fin, top, umbral_z, max_atipicos)
+        return AnaliticaGastosResp(inicio=inicio, fin=fin, **data)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generando analítica: {e}")
@@ -0,0 +1,33 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from src.middleware.auth_middleware import usuario_actual
+from src.services.archive_service import TABLAS_ARCHIVO, leer_archivado
+from src.core.serializacion import respuesta
+
+router = APIRouter(prefix="/api", tags=["archivo"])
+
+
+@router.get("/archivo/{tipo}")
+def movimientos_archivados(
+    tipo: str,
+    inicio: date = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    fin: date = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+    limite: int = Query(200, ge=1, le=5000),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """
+    Gastos o ingresos ya archivados (fuera de las tablas activas) con fecha
+    en el rango, del más reciente al más antiguo. Se leen bajo demanda de
+    los archivos comprimidos del usuario.
+    """
+    if tipo not in TABLAS_ARCHIVO:
+        raise HTTPException(status_code=400, detail=f"Tipo inválido. Use uno de: {', '.join(TABLAS_ARCHIVO)}")
+    if fin < inicio:
+        raise HTTPException(status_code=400, detail="La fecha fin no puede ser menor que la fecha inicio.")
+
+    data = leer_archivado(usuario_id, tipo, inicio, fin, limite)
+    return respuesta({
+        "message": "Movimientos archivados",
+        "total": len(data),
+        "data": data
+    })
@@ -7,6 +7,8 @@ import os
 import requests
 from dotenv import load_dotenv
 from src.auth.utils import hash_password, verify_password, create_access_token
+from src.database.resilience import llamar, tiempo_restante
+from src.services.email_index_service import indice_correos
 
 # Cargar variables del entorno
 load_dotenv()
@@ -37,9 +39,16 @@ class LoginIn(BaseModel):
     password: str
 
 # ---------- FUNCIONES AUXILIARES ----------
+def _verificar_upstream(res: requests.Response) -> requests.Response:
+    """Convierte los 5xx de Supabase en error para que cuenten en el circuit breaker."""
+    if res.status_code >= 500:
+        res.raise_for_status()
+    return res
+
 def get_user_by_email(email: str):
     url = f"{SUPABASE_URL}/rest/v1/{USERS_TABLE}?correo=eq.{email}"
-    res = requests.get(url, headers=headers)
+    timeout = tiempo_restante()
+    res = llamar(lambda: _verificar_upstream(requests.get(url, headers=headers, timeout=timeout)), idempotente=True)
     if res.status_code != 200:
         raise HTTPException(status_code=500, detail="Error al conectar con Supabase")
     data = res.json()
@@ -55,7 +64,13 @@ def insert_user(nombre: str, correo: str, hashed_password: str):
     }
     headers_with_prefer = headers.copy()
     headers_with_prefer["Prefer"] = "return=representation"
-    res = requests.post(url, headers=headers_with_prefer, json=payload)
+    timeout = tiempo_restante()
+    res = llamar(lambda: _verificar_upstream(
+        requests.post(url, headers=headers_with_prefer, json=payload, timeout=timeout)
+    ))
+    if res.status_code == 409:
+        # Violación de la restricción UNIQUE de correo: es la verificación definitiva
+        raise HTTPException(status_code=400, detail="El usuario ya existe")
     if res.status_code not in (200, 201):
         raise HTTPException(status_code=res.status_code, detail="Error al registrar usuario")
     return res.json()
@@ -63,12 +78,16 @@ def insert_user(nombre: str, correo: str, hashed_password: str):
 # ---------- ENDPOINTS ----------
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 def register(payload: RegisterIn):
-    existing = get_user_by_email(payload.correo)
-    if existing:
-        raise HTTPException(status_code=400, detail="El usuario ya existe")
+    # Si el índice garantiza que el correo es nuevo se omite la consulta previa
+    if indice_correos.puede_existir(payload.correo):
+        existing = get_user_by_email(payload.correo)
+        indice_correos.confirmar_consulta(existing is not None)
+        if existing:
+            raise HTTPException(status_code=400, detail="El usuario ya existe")
 
     hashed_pw = hash_password(payload.password)
     insert_user(payload.nombre, payload.correo, hashed_pw)
+    indice_correos.agregar(payload.correo)
     return {"msg": "Usuario registrado correctamente"}
 
 @router.post("/login")
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from src.middleware.auth_middleware import usuario_actual
+from src.services.dashboard_service import armar_dashboard
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/")
+async def obtener_dashboard(usuario_id: str = Depends(usuario_actual)):
+    """
+    Todo lo que necesita la pantalla de inicio en una sola llamada: perfil,
+    últimos gastos e ingresos, reporte del mes en curso y planes de ahorro
+    y de gestión. Cada sección trae `estado` ("ok" o "error"), `duracion_ms`
+    y `data` o `error`; una sección con error no hace fallar a las demás.
+    """
+    return {
+        "message": "Dashboard obtenido",
+        "data": await armar_dashboard(usuario_id)
+    }
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import Optional
+from src.core.profiler import gestor_perfiles
+from src.middleware.profiler_middleware import token_admin_valido
+
+router = APIRouter(prefix="/debug", tags=["Depuración"])
+
+
+def verificar_admin(x_debug_token: Optional[str] = Header(None)):
+    """Exige la cabecera X-Debug-Token con el valor de PROFILER_TOKEN."""
+    if not token_admin_valido(x_debug_token):
+        raise HTTPException(status_code=403, detail="Token de depuración inválido")
+
+
+class ObjetivoPerfil(BaseModel):
+    sub: str = Field(..., description="Claim `sub` del JWT del usuario a perfilar")
+    peticiones: int = Field(1, ge=0, le=20, description="Peticiones a perfilar (0 para cancelar)")
+
+
+@router.post("/profiler/objetivos", dependencies=[Depends(verificar_admin)])
+def armar_objetivo(objetivo: ObjetivoPerfil):
+    """Perfila las próximas peticiones del usuario indicado."""
+    gestor_perfiles.armar_objetivo(objetivo.sub, objetivo.peticiones)
+    return {"message": "Objetivo de perfilado actualizado", "objetivos": gestor_perfiles.objetivos}
+
+
+@router.get("/profiles", dependencies=[Depends(verificar_admin)])
+def listar_perfiles():
+    """Lista los perfiles guardados, del más reciente al más antiguo."""
+    return {"data": gestor_perfiles.listar()}
+
+
+@router.get("/profiles/{perfil_id}", response_class=PlainTextResponse, dependencies=[Depends(verificar_admin)])
+def descargar_perfil(perfil_id: str):
+    """
+    Descarga un perfil en formato collapsed, importable en speedscope
+    (https://www.speedscope.app) o flamegraph.pl.
+    """
+    contenido = gestor_perfiles.leer(perfil_id)
+    if contenido is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return PlainTextResponse(
+        contenido,
+        headers={"Content-Disposition": f'attachment; filename="{perfil_id}.collapsed"'},
+    )
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Optional
+from src.core.config import settings
+from src.services.forecast_service import pronosticos
+from src.middleware.auth_middleware import usuario_actual
+
+router = APIRouter(prefix="/api", tags=["pronostico"])
+
+@router.get("/pronostico")
+def pronostico_flujo(
+    horizonte_dias: Optional[int] = Query(
+        None, ge=1, le=settings.FORECAST_MAX_HORIZON_DAYS,
+        description=f"Días a proyectar (por defecto {settings.FORECAST_DEFAULT_HORIZON_DAYS})",
+    ),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """
+    Proyecta el flujo neto (ingresos - gastos) del usuario a partir de su
+    historial y estima, para cada plan de ahorro, cuánto habrá ahorrado en
+    su fecha de fin y si alcanza el monto objetivo.
+    """
+    try:
+        return pronosticos.pronosticar(usuario_id, horizonte_dias)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generando pronóstico: {e}")
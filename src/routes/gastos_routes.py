@@ -1,111 +1,55 @@
-from fastapi import APIRouter, HTTPException, Depends
-from src.database.supabase_client import supabase
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from src.core.config import settings
+from src.core.serializacion import respuesta
 from src.models.gastos_model import Gasto, GastoUpdate
-from src.middleware.auth_middleware import verify_token
+from src.middleware.auth_middleware import usuario_actual
+from src.services.recurso_service import gastos
 
 router = APIRouter(prefix="/gastos", tags=["gastos"])
 
 @router.post("/", status_code=201)
-def crear_gasto(gasto: Gasto, payload: dict = Depends(verify_token)):
+def crear_gasto(gasto: Gasto, usuario_id: str = Depends(usuario_actual)):
     """Crea un nuevo gasto para el usuario autenticado"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    
-    data = {
-        "usuario_id": usuario_id,
-        "categoria": gasto.categoria,
-        "nombre_gasto": gasto.nombre_gasto,
-        "monto": gasto.monto,
-        "fecha": gasto.fecha,
-        "descripcion": gasto.descripcion
-    }
-    
-    result = supabase.table("gastos").insert(data).execute()
-    return {
+    return respuesta({
         "message": "Gasto creado con éxito",
-        "data": result.data[0]
-    }
+        "data": gastos.crear(usuario_id, gasto.dict())
+    }, status_code=201)
 
 @router.get("/")
-def obtener_gastos(payload: dict = Depends(verify_token)):
-    """Obtiene todos los gastos del usuario autenticado"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    result = supabase.table("gastos").select("*").eq("usuario_id", usuario_id).execute()
-    
-    return {
+def obtener_gastos(
+    limite: Optional[int] = Query(None, ge=1, le=settings.RESOURCE_MAX_LIMIT, description="Sin límite devuelve todos"),
+    offset: int = Query(0, ge=0),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """Obtiene los gastos del usuario autenticado (todos, o una página con `limite`/`offset`)"""
+    return respuesta({
         "message": "Gastos obtenidos",
-        "data": result.data
-    }
+        "data": gastos.listar(usuario_id, limite, offset)
+    })
 
 @router.get("/{id}")
-def obtener_gasto(id: str, payload: dict = Depends(verify_token)):
+def obtener_gasto(id: str, usuario_id: str = Depends(usuario_actual)):
     """Obtiene un gasto específico"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    result = supabase.table("gastos").select("*").eq("id", id).eq("usuario_id", usuario_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Gasto no encontrado")
-    
-    return {
+    return respuesta({
         "message": "Gasto encontrado",
-        "data": result.data[0]
-    }
+        "data": gastos.obtener(usuario_id, id)
+    })
 
 @router.put("/{id}")
-def actualizar_gasto(id: str, gasto: GastoUpdate, payload: dict = Depends(verify_token)):
+def actualizar_gasto(id: str, gasto: GastoUpdate, usuario_id: str = Depends(usuario_actual)):
     """Actualiza un gasto existente"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
     update_data = {k: v for k, v in gasto.dict().items() if v is not None}
-    
-    result = supabase.table("gastos").update(update_data).eq("id", id).eq("usuario_id", usuario_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Gasto no encontrado")
-    
-    return {
+    return respuesta({
         "message": "Gasto actualizado con éxito",
-        "data": result.data[0]
-    }
+        "data": gastos.actualizar(usuario_id, id, update_data)
+    })
 
 @router.delete("/{id}")
-def eliminar_gasto(id: str, payload: dict = Depends(verify_token)):
+def eliminar_gasto(id: str, usuario_id: str = Depends(usuario_actual)):
     """Elimina un gasto"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    result = supabase.table("gastos").delete().eq("id", id).eq("usuario_id", usuario_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Gasto no encontrado")
-    
-    return {
+    gastos.eliminar(usuario_id, id)
+    return respuesta({
         "message": "Gasto eliminado con éxito",
         "id": id
-    }
\ No newline at end of file
+    })
@@ -1,111 +1,55 @@
-from fastapi import APIRouter, HTTPException, Depends
-from src.database.supabase_client import supabase
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from src.core.config import settings
+from src.core.serializacion import respuesta
 from src.models.ingresos_model import Ingreso, IngresoUpdate
-from src.middleware.auth_middleware import verify_token
+from src.middleware.auth_middleware import usuario_actual
+from src.services.recurso_service import ingresos
 
 router = APIRouter(prefix="/ingresos", tags=["ingresos"])
 
 @router.post("/", status_code=201)
-def crear_ingreso(ingreso: Ingreso, payload: dict = Depends(verify_token)):
+def crear_ingreso(ingreso: Ingreso, usuario_id: str = Depends(usuario_actual)):
     """Crea un nuevo ingreso para el usuario autenticado"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    
-    data = {
-        "usuario_id": usuario_id,
-        "concepto": ingreso.concepto,
-        "nombre_fuente": ingreso.nombre_fuente,
-        "monto": ingreso.monto,
-        "fecha": ingreso.fecha,
-        "descripcion": ingreso.descripcion
-    }
-    
-    result = supabase.table("ingresos").insert(data).execute()
-    return {
+    return respuesta({
         "message": "Ingreso creado con éxito",
-        "data": result.data[0]
-    }
+        "data": ingresos.crear(usuario_id, ingreso.dict())
+    }, status_code=201)
 
 @router.get("/")
-def obtener_ingresos(payload: dict = Depends(verify_token)):
-    """Obtiene todos los ingresos del usuario autenticado"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    result = supabase.table("ingresos").select("*").eq("usuario_id", usuario_id).execute()
-    
-    return {
+def obtener_ingresos(
+    limite: Optional[int] = Query(None, ge=1, le=settings.RESOURCE_MAX_LIMIT, description="Sin límite devuelve todos"),
+    offset: int = Query(0, ge=0),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """Obtiene los ingresos del usuario autenticado (todos, o una página con `limite`/`offset`)"""
+    return respuesta({
         "message": "Ingresos obtenidos",
-        "data": result.data
-    }
+        "data": ingresos.listar(usuario_id, limite, offset)
+    })
 
 @router.get("/{id}")
-def obtener_ingreso(id: str, payload: dict = Depends(verify_token)):
+def obtener_ingreso(id: str, usuario_id: str = Depends(usuario_actual)):
     """Obtiene un ingreso específico"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    result = supabase.table("ingresos").select("*").eq("id", id).eq("usuario_id", usuario_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Ingreso no encontrado")
-    
-    return {
+    return respuesta({
         "message": "Ingreso encontrado",
-        "data": result.data[0]
-    }
+        "data": ingresos.obtener(usuario_id, id)
+    })
 
 @router.put("/{id}")
-def actualizar_ingreso(id: str, ingreso: IngresoUpdate, payload: dict = Depends(verify_token)):
+def actualizar_ingreso(id: str, ingreso: IngresoUpdate, usuario_id: str = Depends(usuario_actual)):
     """Actualiza un ingreso existente"""
-    user_email = payload["up"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
     update_data = {k: v for k, v in ingreso.dict().items() if v is not None}
-    
-    result = supabase.table("ingresos").update(update_data).eq("id", id).eq("usuario_id", usuario_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Ingreso no encontrado")
-    
-    return {
+    return respuesta({
         "message": "Ingreso actualizado con éxito",
-        "data": result.data[0]
-    }
+        "data": ingresos.actualizar(usuario_id, id, update_data)
+    })
 
 @router.delete("/{id}")
-def eliminar_ingreso(id: str, payload: dict = Depends(verify_token)):
+def eliminar_ingreso(id: str, usuario_id: str = Depends(usuario_actual)):
     """Elimina un ingreso"""
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    usuario_id = user_result.data[0]["id"]
-    result = supabase.table("ingresos").delete().eq("id", id).eq("usuario_id", usuario_id).execute()
-    
-    if not result.data:
-        raise HTTPException(status_code=404, detail="Ingreso no encontrado")
-    
-    return {
+    ingresos.eliminar(usuario_id, id)
+    return respuesta({
         "message": "Ingreso eliminado con éxito",
         "id": id
-    }
\ No newline at end of file
+    })
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.core.metrics import registro
+
+router = APIRouter(tags=["Métricas"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metricas():
+    """Métricas internas en formato de texto de Prometheus."""
+    return PlainTextResponse(registro.exportar(), media_type="text/plain; version=0.0.4")
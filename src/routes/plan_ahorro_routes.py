@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends
-from datetime import datetime
-from src.database.supabase_client import supabase
+from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import datetime, date
+from typing import Optional
+from src.core.config import settings
+from src.core.serializacion import respuesta
 from src.models.plan_ahorro_model import PlanAhorro, PlanAhorroUpdate
-from src.middleware.auth_middleware import verify_token
+from src.middleware.auth_middleware import usuario_actual
+from src.services.plan_index_service import indice_planes_ahorro
+from src.services.recurso_service import planes_ahorro
 
 router = APIRouter(prefix="/plan-ahorro", tags=["plan-ahorro"])
 
@@ -30,32 +34,10 @@ def validar_fechas(fecha_inicio: str, fecha_fin: str) -> None:
         )
 
 
-def obtener_usuario_id(payload: dict) -> str:
-    """
-    Obtiene el usuario_id del usuario autenticado usando su correo
-    
-    Args:
-        payload: Diccionario con el payload del token JWT
-        
-    Returns:
-        str: El UUID del usuario
-        
-    Raises:
-        HTTPException: Si el usuario no existe
-    """
-    user_email = payload["sub"]
-    user_result = supabase.table("usuarios").select("id").eq("correo", user_email).execute()
-    
-    if not user_result.data:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    
-    return user_result.data[0]["id"]
-
-
 # ---------- ENDPOINTS ----------
 
 @router.post("/", status_code=201)
-def crear_plan_ahorro(plan: PlanAhorro, payload: dict = Depends(verify_token)):
+def crear_plan_ahorro(plan: PlanAhorro, usuario_id: str = Depends(usuario_actual)):
     """
     Crea un nuevo plan de ahorro para el usuario autenticado
     
@@ -72,11 +54,6 @@ def crear_plan_ahorro(plan: PlanAhorro, payload: dict = Depends(verify_token)):
     - Status 404: Usuario no encontrado
     - Status 500: Error en la base de datos
     """
-    try:
-        usuario_id = obtener_usuario_id(payload)
-    except HTTPException:
-        raise
-    
     # Validar fechas
     validar_fechas(plan.fecha_inicio, plan.fecha_fin)
     
@@ -87,68 +64,55 @@ def crear_plan_ahorro(plan: PlanAhorro, payload: dict = Depends(verify_token)):
             detail="El monto objetivo debe ser mayor a 0"
         )
     
-    # Preparar datos para insertar
     data = {
-        "usuario_id": usuario_id,
         "nombre_plan": plan.nombre_plan,
         "monto_objetivo": plan.monto_objetivo,
         "fecha_inicio": plan.fecha_inicio,
         "fecha_fin": plan.fecha_fin,
         "descripcion": plan.descripcion,
     }
-    
-    # Insertar en BD
-    try:
-        result = supabase.table("planes_ahorro").insert(data).execute()
-        
-        if not result.data:
-            raise HTTPException(
-                status_code=500,
-                detail="Error al crear el plan de ahorro en la base de datos"
-            )
-        
-        return {
-            "message": "Plan de ahorro creado exitosamente",
-            "data": result.data[0]
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al insertar en la base de datos: {str(e)}"
-        )
+    return respuesta({
+        "message": "Plan de ahorro creado exitosamente",
+        "data": planes_ahorro.crear(usuario_id, data)
+    }, status_code=201)
 
 
 @router.get("/")
-def obtener_planes_ahorro(payload: dict = Depends(verify_token)):
+def obtener_planes_ahorro(
+    activo_en: Optional[date] = Query(None, description="Solo planes vigentes en esta fecha (YYYY-MM-DD)"),
+    limite: Optional[int] = Query(None, ge=1, le=settings.RESOURCE_MAX_LIMIT, description="Sin límite devuelve todos"),
+    offset: int = Query(0, ge=0),
+    usuario_id: str = Depends(usuario_actual)
+):
     """
     Obtiene todos los planes de ahorro del usuario autenticado
     
+    **Parámetros:**
+    - **activo_en**: Opcional, filtra los planes cuya ventana incluye la fecha
+    - **limite** / **offset**: Opcional, pagina el listado completo
+    
     **Respuesta:**
     - Lista de planes de ahorro ordenados por fecha de creación
     - Status 404: Usuario no encontrado
     """
-    try:
-        usuario_id = obtener_usuario_id(payload)
-    except HTTPException:
-        raise
-    
-    try:
-        result = supabase.table("planes_ahorro").select("*").eq("usuario_id", usuario_id).order("creado_en", desc=True).execute()
-        
-        return {
+    if activo_en is not None:
+        planes = indice_planes_ahorro.consultar(usuario_id, activo_en)
+        return respuesta({
             "message": "Planes de ahorro obtenidos exitosamente",
-            "count": len(result.data),
-            "data": result.data
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al obtener planes de ahorro: {str(e)}"
-        )
+            "count": len(planes),
+            "data": planes
+        })
+    
+    planes = planes_ahorro.listar(usuario_id, limite, offset)
+    return respuesta({
+        "message": "Planes de ahorro obtenidos exitosamente",
+        "count": len(planes),
+        "data": planes
+    })
 
 
 @router.get("/{plan_id}")
-def obtener_plan_ahorro(plan_id: str, payload: dict = Depends(verify_token)):
+def obtener_plan_ahorro(plan_id: str, usuario_id: str = Depends(usuario_actual)):
     """
     Obtiene un plan de ahorro específico
     
@@ -159,32 +123,14 @@ def obtener_plan_ahorro(plan_id: str, payload: dict = Depends(verify_token)):
     - Status 200: Plan encontrado
     - Status 404: Plan no encontrado
     """
-    try:
-        usuario_id = obtener_usuario_id(payload)
-    except HTTPException:
-        raise
-    
-    try:
-        result = supabase.table("planes_ahorro").select("*").eq("id", plan_id).eq("usuario_id", usuario_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Plan de ahorro no encontrado")
-        
-        return {
-            "message": "Plan de ahorro encontrado",
-            "data": result.data[0]
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al obtener el plan: {str(e)}"
-        )
+    return respuesta({
+        "message": "Plan de ahorro encontrado",
+        "data": planes_ahorro.obtener(usuario_id, plan_id)
+    })
 
 
 @router.put("/{plan_id}")
-def actualizar_plan_ahorro(plan_id: str, plan: PlanAhorroUpdate, payload: dict = Depends(verify_token)):
+def actualizar_plan_ahorro(plan_id: str, plan: PlanAhorroUpdate, usuario_id: str = Depends(usuario_actual)):
     """
     Actualiza un plan de ahorro existente
     
@@ -197,11 +143,6 @@ def actualizar_plan_ahorro(plan_id: str, plan: PlanAhorroUpdate, payload: dict =
     - Status 400: No hay datos para actualizar o fechas inválidas
     - Status 404: Plan no encontrado
     """
-    try:
-        usuario_id = obtener_usuario_id(payload)
-    except HTTPException:
-        raise
-    
     # Validar fechas si se proporcionan ambas
     if plan.fecha_inicio and plan.fecha_fin:
         validar_fechas(plan.fecha_inicio, plan.fecha_fin)
@@ -215,31 +156,14 @@ def actualizar_plan_ahorro(plan_id: str, plan: PlanAhorroUpdate, payload: dict =
     
     # Filtrar solo los campos que se van a actualizar (no None)
     update_data = {k: v for k, v in plan.dict().items() if v is not None}
-    
-    if not update_data:
-        raise HTTPException(status_code=400, detail="No hay datos para actualizar")
-    
-    try:
-        result = supabase.table("planes_ahorro").update(update_data).eq("id", plan_id).eq("usuario_id", usuario_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Plan de ahorro no encontrado")
-        
-        return {
-            "message": "Plan de ahorro actualizado exitosamente",
-            "data": result.data[0]
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al actualizar el plan: {str(e)}"
-        )
+    return respuesta({
+        "message": "Plan de ahorro actualizado exitosamente",
+        "data": planes_ahorro.actualizar(usuario_id, plan_id, update_data)
+    })
 
 
 @router.delete("/{plan_id}")
-def eliminar_plan_ahorro(plan_id: str, payload: dict = Depends(verify_token)):
+def eliminar_plan_ahorro(plan_id: str, usuario_id: str = Depends(usuario_actual)):
     """
     Elimina un plan de ahorro
     
@@ -250,25 +174,8 @@ def eliminar_plan_ahorro(plan_id: str, payload: dict = Depends(verify_token)):
     - Status 200: Plan eliminado exitosamente
     - Status 404: Plan no encontrado
     """
-    try:
-        usuario_id = obtener_usuario_id(payload)
-    except HTTPException:
-        raise
-    
-    try:
-        result = supabase.table("planes_ahorro").delete().eq("id", plan_id).eq("usuario_id", usuario_id).execute()
-        
-        if not result.data:
-            raise HTTPException(status_code=404, detail="Plan de ahorro no encontrado")
-        
-        return {
-            "message": "Plan de ahorro eliminado exitosamente",
-            "id": plan_id
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error al eliminar el plan: {str(e)}"
-        )
\ No newline at end of file
+    planes_ahorro.eliminar(usuario_id, plan_id)
+    return respuesta({
+        "message": "Plan de ahorro eliminado exitosamente",
+        "id": plan_id
+    })
@@ -1,14 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, Query
+from datetime import date
+from typing import List, Optional
 from src.schemas.plan_gestion_schemas import PlanGestionCreate, PlanGestionResp
-from src.services.plan_gestion_service import (
-    crear_plan,
-    obtener_planes,
-    obtener_plan_por_id,
-    actualizar_plan,
-    eliminar_plan,
-)
-from src.middleware.auth_middleware import verify_token
+from src.core.config import settings
+from src.core.serializacion import filas_respuesta, respuesta
+from src.services.plan_index_service import indice_plan_gestion
+from src.services.recurso_service import planes_gestion
+from src.middleware.auth_middleware import usuario_actual
 
 # Inicializa el router
 router = APIRouter(
@@ -21,70 +19,66 @@ router = APIRouter(
 # 🟩 Crear un nuevo plan de gestión
 # --------------------------------------------
 @router.post("/", response_model=PlanGestionResp)
-def crear_plan_endpoint(plan: PlanGestionCreate, payload: dict = Depends(verify_token)):
+def crear_plan_endpoint(plan: PlanGestionCreate, usuario_id: str = Depends(usuario_actual)):
     """
     Crea un nuevo plan de gestión de gasto asociado al usuario autenticado.
     """
-    usuario_id = payload.get("sub")
-    nuevo_plan = crear_plan(usuario_id, plan.dict())
-    if not nuevo_plan:
-        raise HTTPException(status_code=400, detail="No se pudo crear el plan de gestión.")
-    return nuevo_plan
+    return respuesta(filas_respuesta(PlanGestionResp, [planes_gestion.crear(usuario_id, plan.dict())])[0])
 
 
 # --------------------------------------------
 # 🟦 Obtener todos los planes del usuario
 # --------------------------------------------
 @router.get("/", response_model=List[PlanGestionResp])
-def obtener_planes_endpoint(payload: dict = Depends(verify_token)):
+def obtener_planes_endpoint(
+    activo_en: Optional[date] = Query(None, description="Solo planes vigentes en esta fecha (YYYY-MM-DD)"),
+    categoria: Optional[str] = Query(None, description="Solo planes de esta categoría"),
+    limite: Optional[int] = Query(None, ge=1, le=settings.RESOURCE_MAX_LIMIT, description="Sin límite devuelve todos"),
+    offset: int = Query(0, ge=0),
+    usuario_id: str = Depends(usuario_actual)
+):
     """
     Obtiene todos los planes de gestión creados por el usuario autenticado.
+    Con `activo_en` y/o `categoria` responde desde el índice en memoria;
+    `limite` y `offset` paginan el listado completo. Las filas salen de
+    Supabase o del índice y se envían sin revalidarlas contra el modelo.
     """
-    usuario_id = payload.get("sub")
-    planes = obtener_planes(usuario_id)
-    return planes
+    if activo_en is not None or categoria is not None:
+        planes = indice_plan_gestion.consultar(usuario_id, activo_en, categoria)
+    else:
+        planes = planes_gestion.listar(usuario_id, limite, offset)
+    return respuesta(filas_respuesta(PlanGestionResp, planes))
 
 
 # --------------------------------------------
 # 🟨 Obtener un plan específico por ID
 # --------------------------------------------
 @router.get("/{plan_id}", response_model=PlanGestionResp)
-def obtener_plan_por_id_endpoint(plan_id: int, payload: dict = Depends(verify_token)):
+def obtener_plan_por_id_endpoint(plan_id: int, usuario_id: str = Depends(usuario_actual)):
     """
     Obtiene la información de un plan de gestión específico.
     """
-    usuario_id = payload.get("sub")
-    plan = obtener_plan_por_id(plan_id, usuario_id)
-    if not plan:
-        raise HTTPException(status_code=404, detail="Plan no encontrado o sin permisos.")
-    return plan
+    return respuesta(filas_respuesta(PlanGestionResp, [planes_gestion.obtener(usuario_id, plan_id)])[0])
 
 
 # --------------------------------------------
 # 🟧 Actualizar un plan existente
 # --------------------------------------------
 @router.put("/{plan_id}", response_model=PlanGestionResp)
-def actualizar_plan_endpoint(plan_id: int, plan: PlanGestionCreate, payload: dict = Depends(verify_token)):
+def actualizar_plan_endpoint(plan_id: int, plan: PlanGestionCreate, usuario_id: str = Depends(usuario_actual)):
     """
     Actualiza un plan de gestión existente (solo si pertenece al usuario autenticado).
     """
-    usuario_id = payload.get("sub")
-    actualizado = actualizar_plan(plan_id, usuario_id, plan.dict())
-    if not actualizado:
-        raise HTTPException(status_code=404, detail="No se pudo actualizar el plan (no encontrado o sin permisos).")
-    return actualizado
+    return respuesta(filas_respuesta(PlanGestionResp, [planes_gestion.actualizar(usuario_id, plan_id, plan.dict())])[0])
 
 
 # --------------------------------------------
 # 🟥 Eliminar un plan existente
 # --------------------------------------------
 @router.delete("/{plan_id}")
-def eliminar_plan_endpoint(plan_id: int, payload: dict = Depends(verify_token)):
+def eliminar_plan_endpoint(plan_id: int, usuario_id: str = Depends(usuario_actual)):
     """
     Elimina un plan de gestión de gastos (solo si pertenece al usuario autenticado).
     """
-    usuario_id = payload.get("sub")
-    eliminado = eliminar_plan(plan_id, usuario_id)
-    if not eliminado:
-        raise HTTPException(status_code=404, detail="Plan no encontrado o sin permisos para eliminarlo.")
+    planes_gestion.eliminar(usuario_id, plan_id)
     return {"mensaje": "🗑️ Plan eliminado correctamente."}
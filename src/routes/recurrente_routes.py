@@ -0,0 +1,96 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from src.core.config import settings
+from src.core.serializacion import respuesta
+from src.models.recurrente_model import ReglaRecurrente, ReglaRecurrenteUpdate
+from src.middleware.auth_middleware import usuario_actual
+from src.services.recurrente_service import FRECUENCIAS, TIPOS, materializar, primera_desde
+from src.services.recurso_service import reglas_recurrentes
+
+router = APIRouter(prefix="/recurrentes", tags=["recurrentes"])
+
+# Cambiar cualquiera de estos campos reprograma la regla desde hoy
+CAMPOS_CALENDARIO = ("frecuencia", "intervalo", "fecha_inicio", "fecha_fin", "activa")
+
+
+def validar_regla(regla: dict) -> None:
+    if regla["tipo"] not in TIPOS:
+        raise HTTPException(status_code=400, detail=f"Tipo inválido. Use uno de: {', '.join(TIPOS)}")
+    if regla["frecuencia"] not in FRECUENCIAS:
+        raise HTTPException(status_code=400, detail=f"Frecuencia inválida. Use una de: {', '.join(FRECUENCIAS)}")
+    if regla.get("fecha_fin") and str(regla["fecha_fin"]) < str(regla["fecha_inicio"]):
+        raise HTTPException(status_code=400, detail="La fecha de fin no puede ser anterior a la fecha de inicio")
+
+
+@router.post("/", status_code=201)
+def crear_regla(regla: ReglaRecurrente, usuario_id: str = Depends(usuario_actual)):
+    """
+    Crea una regla recurrente. Las ocurrencias desde fecha_inicio hasta hoy
+    se generan en el momento; las siguientes, en cada pasada del
+    materializador.
+    """
+    datos = regla.dict()
+    validar_regla(datos)
+    datos["proxima_fecha"] = primera_desde(datos, datos["fecha_inicio"])
+    fila = reglas_recurrentes.crear(usuario_id, datos)
+    creadas = materializar([fila])
+    return respuesta({
+        "message": "Regla recurrente creada con éxito",
+        "materializados": sum(creadas.values()),
+        "data": fila
+    }, status_code=201)
+
+
+@router.get("/")
+def obtener_reglas(
+    limite: Optional[int] = Query(None, ge=1, le=settings.RESOURCE_MAX_LIMIT, description="Sin límite devuelve todas"),
+    offset: int = Query(0, ge=0),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """Obtiene las reglas recurrentes del usuario autenticado"""
+    return respuesta({
+        "message": "Reglas recurrentes obtenidas",
+        "data": reglas_recurrentes.listar(usuario_id, limite, offset)
+    })
+
+
+@router.get("/{id}")
+def obtener_regla(id: str, usuario_id: str = Depends(usuario_actual)):
+    """Obtiene una regla recurrente"""
+    return respuesta({
+        "message": "Regla recurrente encontrada",
+        "data": reglas_recurrentes.obtener(usuario_id, id)
+    })
+
+
+@router.put("/{id}")
+def actualizar_regla(id: str, regla: ReglaRecurrenteUpdate, usuario_id: str = Depends(usuario_actual)):
+    """
+    Actualiza una regla. Los movimientos ya generados no cambian; si cambia
+    el calendario (o se reactiva) la regla sigue desde hoy, sin generar lo
+    que quedó atrás.
+    """
+    cambios = {k: v for k, v in regla.dict().items() if v is not None}
+    if not cambios:
+        raise HTTPException(status_code=400, detail="No hay datos para actualizar")
+    if any(c in cambios for c in CAMPOS_CALENDARIO):
+        combinada = {**reglas_recurrentes.obtener(usuario_id, id), **cambios}
+        validar_regla(combinada)
+        cambios["proxima_fecha"] = primera_desde(combinada, date.today())
+    fila = reglas_recurrentes.actualizar(usuario_id, id, cambios)
+    materializar([fila])
+    return respuesta({
+        "message": "Regla recurrente actualizada con éxito",
+        "data": fila
+    })
+
+
+@router.delete("/{id}")
+def eliminar_regla(id: str, usuario_id: str = Depends(usuario_actual)):
+    """Elimina una regla; los movimientos que ya generó se conservan"""
+    reglas_recurrentes.eliminar(usuario_id, id)
+    return respuesta({
+        "message": "Regla recurrente eliminada con éxito",
+        "id": id
+    })
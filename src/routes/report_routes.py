@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from datetime import date
-from src.schemas.report_schemas import ReporteRangoResp, Periodo
+from src.schemas.report_schemas import ReporteRangoResp
+from src.core.serializacion import respuesta
 from src.services.report_service import calcular_reporte_rango
-from src.middleware.auth_middleware import verify_token
+from src.middleware.auth_middleware import usuario_actual
 
 router = APIRouter(prefix="/api", tags=["reportes"])
 
@@ -10,7 +11,7 @@ router = APIRouter(prefix="/api", tags=["reportes"])
 def reporte_por_rango(
     inicio: date = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
     fin: date = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
-    payload: dict = Depends(verify_token)
+    usuario_id: str = Depends(usuario_actual)
 ):
     """
     Retorna los totales de ingresos, gastos y ahorro del usuario
@@ -20,16 +21,18 @@ def reporte_por_rango(
         raise HTTPException(status_code=400, detail="La fecha fin no puede ser menor que la fecha inicio.")
 
     try:
-        usuario_id = payload.get("sub")
         data = calcular_reporte_rango(usuario_id, inicio, fin)
 
-        return ReporteRangoResp(
-            periodo=Periodo(inicio=inicio, fin=fin),
-            total_ingresos=data["total_ingresos"],
-            total_gastos=data["total_gastos"],
-            total_ahorro=data["total_ahorro"],
-            balance=data["balance"]
-        )
+        # Los totales ya son floats calculados aquí: se responde sin construir el modelo
+        return respuesta({
+            "periodo": {"inicio": inicio, "fin": fin},
+            "total_ingresos": data["total_ingresos"],
+            "total_gastos": data["total_gastos"],
+            "total_ahorro": data["total_ahorro"],
+            "balance": data["balance"]
+        })
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generando reporte: {e}")
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from src.middleware.auth_middleware import usuario_actual
+from src.services.search_service import buscador, CAMPOS
+from src.core.serializacion import respuesta
+
+router = APIRouter(prefix="/api", tags=["busqueda"])
+
+TIPOS = ("todos",) + tuple(CAMPOS)
+
+
+@router.get("/buscar")
+def buscar_movimientos(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar (prefijos, sin distinguir tildes)"),
+    tipo: str = Query("todos", description="todos, gastos o ingresos"),
+    limite: int = Query(50, ge=1, le=500),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """
+    Busca gastos e ingresos del usuario autenticado por nombre, descripción
+    y categoría/concepto. Cada palabra de `q` debe coincidir con el inicio
+    de alguna palabra del movimiento ("farm caf" encuentra "Farmacia Café").
+    """
+    if tipo not in TIPOS:
+        raise HTTPException(status_code=400, detail=f"Tipo inválido. Use uno de: {', '.join(TIPOS)}")
+
+    tipos = tuple(CAMPOS) if tipo == "todos" else (tipo,)
+    data = buscador.buscar(usuario_id, q, tipos, limite)
+
+    return respuesta({
+        "message": "Resultados de búsqueda",
+        "total": len(data),
+        "data": data
+    })
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import Optional
+from src.services.sync_service import sincronizar, CursorInvalido
+from src.core.serializacion import respuesta
+from src.middleware.auth_middleware import usuario_actual
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("/")
+def sincronizar_cambios(
+    cursor: Optional[str] = Query(None, description="Cursor devuelto por la sincronización anterior"),
+    usuario_id: str = Depends(usuario_actual)
+):
+    """
+    Devuelve los gastos, ingresos, planes de ahorro y planes de gestión
+    creados o modificados desde `cursor`, las eliminaciones (lápidas) y un
+    cursor nuevo. Sin cursor responde con todo y `completo: true`.
+    """
+    try:
+        return respuesta(sincronizar(usuario_id, cursor))
+    except CursorInvalido as e:
+        raise HTTPException(status_code=400, detail=str(e))
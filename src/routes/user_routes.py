@@ -1,26 +1,43 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from passlib.context import CryptContext
+from postgrest.exceptions import APIError
 from src.database.supabase_client import supabase
+from src.database.resilience import ejecutar
+from src.middleware.auth_middleware import usuario_actual
 from src.models.user_model import Usuario, UsuarioUpdate
+from src.services.email_index_service import indice_correos
+from src.services.purge_service import purgas
+from src.services.usuario_service import usuario_modificado
 
 router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Código de Postgres para violación de restricción UNIQUE
+UNIQUE_VIOLATION = "23505"
+
 @router.post("/")
 def crear_usuario(usuario: Usuario):
-    existing = supabase.table("usuarios").select("*").eq("correo", usuario.correo).execute()
-    if existing.data:
-        raise HTTPException(status_code=400, detail="El correo ingresado ya está registrado")
+    if indice_correos.puede_existir(usuario.correo):
+        existing = ejecutar(supabase.table("usuarios").select("id").eq("correo", usuario.correo), idempotente=True)
+        indice_correos.confirmar_consulta(bool(existing.data))
+        if existing.data:
+            raise HTTPException(status_code=400, detail="El correo ingresado ya está registrado")
     
     hashed_password = pwd_context.hash(usuario.password)
     data = {**usuario.dict(), "password": hashed_password}
-    result = supabase.table("usuarios").insert(data).execute()
+    try:
+        result = ejecutar(supabase.table("usuarios").insert(data))
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail="El correo ingresado ya está registrado")
+        raise
+    indice_correos.agregar(usuario.correo)
     return {"message": "Usuario creado con éxito", "data": result.data}
 
 @router.get("/{id}")
 def obtener_usuario(id: str):
-    result = supabase.table("usuarios").select("*").eq("id", id).execute()
+    result = ejecutar(supabase.table("usuarios").select("*").eq("id", id), idempotente=True)
     if not result.data:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return result.data[0]
@@ -30,11 +47,48 @@ def actualizar_usuario(id: str, usuario: UsuarioUpdate):
     update_data = {k: v for k, v in usuario.dict().items() if v is not None}
     if "password" in update_data:
         update_data["password"] = pwd_context.hash(update_data["password"])
-    result = supabase.table("usuarios").update(update_data).eq("id", id).execute()
+    anterior = None
+    if "correo" in update_data:
+        filas = ejecutar(supabase.table("usuarios").select("correo").eq("id", id), idempotente=True).data
+        anterior = filas[0]["correo"] if filas else None
+    try:
+        result = ejecutar(supabase.table("usuarios").update(update_data).eq("id", id))
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail="El correo ingresado ya está registrado")
+        raise
+    if "correo" in update_data and result.data:
+        indice_correos.agregar(update_data["correo"])
+        if anterior:
+            # El filtro es de contadores: el correo anterior queda libre para otro registro
+            indice_correos.eliminar(anterior)
+        # Los tokens con el correo anterior dejan de resolver en todos los workers
+        usuario_modificado(anterior, update_data["correo"])
     return {"message": "Usuario actualizado con éxito", "data": result.data}
 
-@router.delete("/{id}")
-def eliminar_usuario(id: str):
-    result = supabase.table("usuarios").delete().eq("id", id).execute()
-    return {"message": "Usuario eliminado con éxito", "data": result.data}
+@router.delete("/{id}", status_code=202)
+def eliminar_usuario(id: str, usuario_id: str = Depends(usuario_actual)):
+    """
+    Programa la eliminación del usuario: sus gastos, ingresos y planes se
+    borran en segundo plano por bloques y al final se elimina la cuenta.
+    Solo el propio usuario puede eliminar su cuenta. El progreso se consulta
+    en /usuarios/purgas/{job_id}.
+    """
+    if usuario_id != id:
+        raise HTTPException(status_code=403, detail="No puedes eliminar la cuenta de otro usuario")
+    existente = ejecutar(supabase.table("usuarios").select("id").eq("id", id), idempotente=True)
+    if not existente.data:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    trabajo = purgas.encolar(id)
+    return {
+        "message": "Eliminación de usuario en curso",
+        "job_id": trabajo["job_id"],
+        "estado_url": f"/usuarios/purgas/{trabajo['job_id']}",
+    }
 
+@router.get("/purgas/{job_id}")
+def estado_purga(job_id: str):
+    trabajo = purgas.estado(job_id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo de purga no encontrado")
+    return trabajo
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+
+class CategoriaTop(BaseModel):
+    categoria: str
+    total: float
+    cantidad: int
+    promedio: float
+    porcentaje: float
+
+class GastoAtipico(BaseModel):
+    id: str
+    categoria: Optional[str] = None
+    nombre_gasto: Optional[str] = None
+    monto: float
+    fecha: date
+    z_score: float
+    promedio_categoria: float
+
+class AnaliticaGastosResp(BaseModel):
+    inicio: Optional[date] = None
+    fin: Optional[date] = None
+    total_gastos: float
+    cantidad_gastos: int
+    top_categorias: List[CategoriaTop]
+    atipicos: List[GastoAtipico]
@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
 from datetime import date
 from typing import Optional
+from src.core.money import Monto
 
 class PlanGestionCreate(BaseModel):
     categoria: str = Field(..., description="Categoría del plan de gestión de gasto")
-    monto_limite: float = Field(..., gt=0, description="Monto máximo permitido")
+    monto_limite: Monto = Field(..., gt=0, description="Monto máximo permitido")
     fecha_inicio: date
     fecha_fin: date
     descripcion: Optional[str] = None
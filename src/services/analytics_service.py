@@ -0,0 +1,121 @@
+"""
+Analítica de gastos en una sola pasada y con memoria acotada.
+
+Los gastos del usuario se leen página a página (paginación por llave, ver
+src/database/paginacion.py) y cada fila se descarta tras actualizar los
+acumuladores de su categoría: total, media y varianza con el algoritmo de
+Welford, y un min-heap con los K gastos más grandes como candidatos a
+atípicos. Así la memoria es O(categorías × K) sin importar cuántos gastos
+haya. Al final se eligen las N categorías con mayor total y se marcan como
+atípicos los candidatos cuyo z-score supera el umbral.
+"""
+import heapq
+import itertools
+import math
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+from src.core.config import settings
+from src.core.money import a_centavos, a_monto
+from src.database.paginacion import recorrer
+from src.database.supabase_client import supabase
+
+GASTOS_TABLE = "gastos"
+
+
+class EstadisticaCategoria:
+    __slots__ = ("cantidad", "total", "media", "m2", "mayores")
+
+    def __init__(self):
+        self.cantidad = 0
+        self.total = 0  # centavos: el total se suma exacto; media y varianza son estadísticas
+        self.media = 0.0
+        self.m2 = 0.0
+        # (monto, desempate, fila): el desempate evita comparar dicts con montos iguales
+        self.mayores: List[tuple] = []
+
+    def agregar(self, centavos: int, fila: dict, desempate: int, max_candidatos: int) -> None:
+        monto = centavos / 100
+        self.cantidad += 1
+        self.total += centavos
+        delta = monto - self.media
+        self.media += delta / self.cantidad
+        self.m2 += delta * (monto - self.media)
+        if max_candidatos <= 0:
+            return
+        if len(self.mayores) < max_candidatos:
+            heapq.heappush(self.mayores, (monto, desempate, fila))
+        elif monto > self.mayores[0][0]:
+            heapq.heapreplace(self.mayores, (monto, desempate, fila))
+
+    @property
+    def desviacion(self) -> float:
+        return math.sqrt(self.m2 / (self.cantidad - 1)) if self.cantidad > 1 else 0.0
+
+
+def filas_gastos(usuario_id: str, inicio: Optional[date], fin: Optional[date],
+                 columnas: str = "id, categoria, nombre_gasto, monto, fecha") -> Iterator[dict]:
+    """Recorre los gastos del usuario en páginas de ANALYTICS_PAGE_SIZE filas."""
+    def construir():
+        query = supabase.table(GASTOS_TABLE).select(columnas).eq("usuario_id", usuario_id)
+        if inicio:
+            query = query.gte("fecha", str(inicio))
+        if fin:
+            query = query.lte("fecha", str(fin))
+        return query
+
+    return recorrer(construir, settings.ANALYTICS_PAGE_SIZE)
+
+
+def agregar_gastos(filas: Iterator[dict], max_candidatos: int) -> Dict[str, EstadisticaCategoria]:
+    categorias: Dict[str, EstadisticaCategoria] = {}
+    contador = itertools.count()
+    for fila in filas:
+        categoria = fila.get("categoria") or "Sin categoría"
+        estadistica = categorias.get(categoria)
+        if estadistica is None:
+            estadistica = categorias[categoria] = EstadisticaCategoria()
+        estadistica.agregar(a_centavos(fila.get("monto")), fila, next(contador), max_candidatos)
+    return categorias
+
+
+def resumir(categorias: Dict[str, EstadisticaCategoria], top: int, umbral_z: float) -> dict:
+    total = sum(e.total for e in categorias.values())
+    mejores = heapq.nlargest(top, categorias.items(), key=lambda par: par[1].total)
+    top_categorias = [
+        {
+            "categoria": nombre,
+            "total": a_monto(e.total),
+            "cantidad": e.cantidad,
+            "promedio": round(e.media, 2),
+            "porcentaje": round(e.total / total * 100, 2) if total else 0.0,
+        }
+        for nombre, e in mejores
+    ]
+
+    atipicos = []
+    for nombre, e in categorias.items():
+        desviacion = e.desviacion
+        if e.cantidad < settings.ANALYTICS_MIN_SAMPLES or desviacion == 0:
+            continue
+        for monto, _, fila in e.mayores:
+            z = (monto - e.media) / desviacion
+            if z >= umbral_z:
+                atipicos.append({**fila, "z_score": round(z, 2), "promedio_categoria": round(e.media, 2)})
+    atipicos.sort(key=lambda a: a["z_score"], reverse=True)
+
+    return {
+        "total_gastos": a_monto(total),
+        "cantidad_gastos": sum(e.cantidad for e in categorias.values()),
+        "top_categorias": top_categorias,
+        "atipicos": atipicos,
+    }
+
+
+def analizar_gastos(usuario_id: str, inicio: Optional[date], fin: Optional[date],
+                    top: int = 5, umbral_z: float = 3.0, max_atipicos: int = 10) -> dict:
+    """Top-N categorías por total y gastos atípicos (z-score ≥ umbral) de su categoría."""
+    categorias = agregar_gastos(filas_gastos(usuario_id, inicio, fin), max_atipicos)
+    resumen = resumir(categorias, top, umbral_z)
+    resumen["atipicos"] = resumen["atipicos"][:max_atipicos]
+    return resumen
@@ -0,0 +1,314 @@
+"""
+Archivo de movimientos viejos y resúmenes mensuales.
+
+Los gastos e ingresos con fecha anterior al primer día del mes que cae
+ARCHIVE_AFTER_DAYS atrás se mueven de las tablas calientes a archivos
+columnar comprimidos (src/core/archive.py), uno por usuario, tabla y año.
+Por cada mes archivado queda una fila en `resumen_mensual` con el total en
+centavos y la cantidad de movimientos. `calcular_reporte_rango` suma a los
+datos vivos los resúmenes de los meses completos del rango y, para los
+meses archivados que el rango cubre solo en parte, el total leído del
+archivo.
+
+Orden de un archivado, pensado para poder repetirse tras una caída:
+  1. se leen las filas viejas con `actualizado_en` hasta el tope (el
+     momento de la lectura menos ARCHIVE_OVERLAP_SECONDS) y se guarda una
+     copia en el archivo pendiente de la tabla;
+  2. se borran de la tabla caliente por bloques, solo si siguen sin
+     cambios (`actualizado_en <= tope`): una fila editada después de la
+     lectura se queda en la tabla y se archiva en otra pasada;
+  3. las filas efectivamente borradas se agregan al archivo de su año (por
+     id, así repetir no duplica), los resúmenes de los meses tocados se
+     recalculan desde el archivo completo (upsert) y se borra la copia.
+Si el proceso cae entre 2 y 3, la pasada siguiente consolida desde la copia
+las filas que ya no están en la tabla, salvo las que el usuario borró (las
+que tienen lápida). Una fila no está a la vez en la tabla y en el archivo:
+mientras duran los borrados, los reportes por consulta directa pueden no
+contar el bloque en curso.
+
+Al terminar cada tabla se publica ("archivo", usuario) en el bus de
+caché: los snapshots del ledger se recargan sin las filas archivadas y la
+caché de resúmenes se invalida. Los clientes de /sync conservan las filas
+archivadas (no se dejan lápidas); el detalle sigue disponible en
+/api/archivo.
+"""
+import argparse
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from postgrest.exceptions import APIError
+
+from src.core import archive
+from src.core.cache import ARCHIVO, MOVIMIENTOS, CacheL1, bus
+from src.core.columnar import dia_epoch
+from src.core.config import settings
+from src.core.metrics import registro
+from src.core.money import a_centavos
+from src.database.paginacion import marca_segura, recorrer
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+from src.services.sync_service import ELIMINACIONES_TABLE
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TABLAS_ARCHIVO = ("gastos", "ingresos")
+RESUMEN_TABLE = "resumen_mensual"
+
+_filas = registro.contador("archivo_filas_total", "Movimientos movidos al archivo por tabla")
+_ejecuciones = registro.contador("archivo_ejecuciones_total", "Pasadas del archivado por resultado")
+_lecturas = registro.contador("archivo_lecturas_total", "Lecturas de archivos para meses cubiertos en parte")
+
+_resumenes = CacheL1("resumen_mensual", 10_000, settings.ARCHIVE_SUMMARY_CACHE_TTL_SECONDS)
+
+
+def nombre_archivo(usuario_id: str, tabla: str, anio: int) -> str:
+    return f"{usuario_id}/{tabla}/{anio}.fta"
+
+
+def nombre_pendiente(usuario_id: str, tabla: str) -> str:
+    """Copia de las filas en curso de archivado, hasta que se consolidan."""
+    return f"{usuario_id}/{tabla}/pendiente.fta"
+
+
+def corte(hoy: Optional[date] = None) -> date:
+    """Se archivan las filas con fecha anterior a este día (siempre un primero de mes)."""
+    return ((hoy or date.today()) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)).replace(day=1)
+
+
+def _mes(fecha) -> date:
+    return date.fromisoformat(str(fecha)[:10]).replace(day=1)
+
+
+def _fin_de_mes(mes: date) -> date:
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+# ---------- archivado ----------
+def _resumir(filas: List[dict], meses) -> List[dict]:
+    totales: Dict[date, List[int]] = {m: [0, 0] for m in meses}
+    for fila in filas:
+        mes = _mes(fila["fecha"])
+        if mes in totales:
+            totales[mes][0] += a_centavos(fila.get("monto"))
+            totales[mes][1] += 1
+    return [{"mes": str(m), "total_centavos": t, "cantidad": n} for m, (t, n) in sorted(totales.items())]
+
+
+def _consolidar(usuario_id: str, tabla: str, movidas: List[dict]) -> None:
+    """Agrega al archivo de cada año las filas ya borradas de la tabla caliente y recalcula sus resúmenes."""
+    por_anio: Dict[int, List[dict]] = defaultdict(list)
+    for fila in movidas:
+        por_anio[int(str(fila["fecha"])[:4])].append(fila)
+    for anio, nuevas in sorted(por_anio.items()):
+        nombre = nombre_archivo(usuario_id, tabla, anio)
+        previo = archive.abrir(nombre)
+        combinadas = {str(f["id"]): f for f in (previo.leer() if previo else [])}
+        combinadas.update({str(f["id"]): f for f in nuevas})
+        filas = list(combinadas.values())
+        archive.almacen().escribir(nombre, archive.codificar(filas))
+
+        resumenes = [{"usuario_id": usuario_id, "tabla": tabla, **r}
+                     for r in _resumir(filas, {_mes(f["fecha"]) for f in nuevas})]
+        ejecutar(supabase.table(RESUMEN_TABLE).upsert(resumenes, on_conflict="usuario_id,tabla,mes"))
+
+
+def _borrar(usuario_id: str, tabla: str, filas: List[dict], tope: str) -> List[dict]:
+    """Borra las filas que siguen sin cambios desde la lectura; devuelve las borradas."""
+    ids = [f["id"] for f in filas]
+    borradas = []
+    for i in range(0, len(ids), settings.ARCHIVE_CHUNK_SIZE):
+        respuesta = ejecutar(supabase.table(tabla).delete().eq("usuario_id", usuario_id)
+                             .in_("id", ids[i:i + settings.ARCHIVE_CHUNK_SIZE]).lte("actualizado_en", tope))
+        borradas.extend(respuesta.data or [])
+        time.sleep(settings.ARCHIVE_THROTTLE_SECONDS)
+    return borradas
+
+
+def _descartar_pendiente(nombre: str) -> None:
+    archive.olvidar(nombre)
+    archive.almacen().eliminar(nombre)
+
+
+def _recuperar(usuario_id: str, tabla: str) -> int:
+    """Consolida la copia pendiente de un archivado interrumpido; devuelve cuántas filas movió."""
+    nombre = nombre_pendiente(usuario_id, tabla)
+    pendiente = archive.abrir(nombre)
+    if pendiente is None:
+        return 0
+    filas = pendiente.leer()
+    ids = [f["id"] for f in filas]
+    presentes = set()
+    for i in range(0, len(ids), settings.ARCHIVE_CHUNK_SIZE):
+        bloque = ids[i:i + settings.ARCHIVE_CHUNK_SIZE]
+        vivas = ejecutar(supabase.table(tabla).select("id").eq("usuario_id", usuario_id).in_("id", bloque),
+                         idempotente=True).data or []
+        lapidas = ejecutar(supabase.table(ELIMINACIONES_TABLE).select("registro_id").eq("usuario_id", usuario_id)
+                           .eq("tabla", tabla).in_("registro_id", [str(x) for x in bloque]),
+                           idempotente=True).data or []
+        presentes.update(str(f["id"]) for f in vivas)
+        presentes.update(str(f["registro_id"]) for f in lapidas)
+    movidas = [f for f in filas if str(f["id"]) not in presentes]
+    _consolidar(usuario_id, tabla, movidas)
+    _descartar_pendiente(nombre)
+    return len(movidas)
+
+
+def archivar_usuario(usuario_id: str, hoy: Optional[date] = None) -> Dict[str, int]:
+    """Archiva los movimientos viejos del usuario; devuelve cuántos se movieron por tabla."""
+    limite = corte(hoy)
+    movidas = {}
+    for tabla in TABLAS_ARCHIVO:
+        movidas[tabla] = _recuperar(usuario_id, tabla)
+        tope = marca_segura(None, time.time(), settings.ARCHIVE_OVERLAP_SECONDS)
+
+        def construir(tabla=tabla):
+            return (supabase.table(tabla).select("*").eq("usuario_id", usuario_id)
+                    .lt("fecha", str(limite)).lte("actualizado_en", tope))
+
+        filas = list(recorrer(construir, settings.ARCHIVE_PAGE_SIZE))
+        if filas:
+            nombre = nombre_pendiente(usuario_id, tabla)
+            archive.almacen().escribir(nombre, archive.codificar(filas))
+            borradas = _borrar(usuario_id, tabla, filas, tope)
+            _consolidar(usuario_id, tabla, borradas)
+            _descartar_pendiente(nombre)
+            movidas[tabla] += len(borradas)
+        _filas.inc(movidas[tabla], tabla=tabla)
+        if movidas[tabla]:
+            bus.publicar(ARCHIVO, usuario_id)
+            bus.publicar(MOVIMIENTOS, usuario_id)
+    return movidas
+
+
+def archivar_todos(hoy: Optional[date] = None) -> Dict[str, int]:
+    totales = {t: 0 for t in TABLAS_ARCHIVO}
+    for usuario in recorrer(lambda: supabase.table("usuarios").select("id"), settings.ARCHIVE_PAGE_SIZE):
+        try:
+            for tabla, n in archivar_usuario(usuario["id"], hoy).items():
+                totales[tabla] += n
+        except Exception:
+            logger.exception("No se pudo archivar al usuario %s", usuario["id"])
+    return totales
+
+
+def eliminar_archivo_usuario(usuario_id: str) -> None:
+    """Borra los archivos del usuario (los resúmenes se purgan con sus tablas)."""
+    archive.olvidar(f"{usuario_id}/")
+    archive.almacen().eliminar_prefijo(usuario_id)
+    bus.publicar(ARCHIVO, usuario_id)
+
+
+# ---------- lectura ----------
+def _cargar_resumenes(usuario_id: str) -> Dict[str, Dict[date, int]]:
+    resultado: Dict[str, Dict[date, int]] = {t: {} for t in TABLAS_ARCHIVO}
+    try:
+        filas = ejecutar(
+            supabase.table(RESUMEN_TABLE).select("tabla, mes, total_centavos").eq("usuario_id", usuario_id),
+            idempotente=True,
+        ).data or []
+    except APIError:
+        # Sin la tabla (migración 004 pendiente) no hay nada archivado
+        logger.exception("No se pudieron leer los resúmenes mensuales")
+        return resultado
+    for fila in filas:
+        resultado.setdefault(fila["tabla"], {})[_mes(fila["mes"])] = int(fila["total_centavos"])
+    return resultado
+
+
+def resumenes(usuario_id: str) -> Dict[str, Dict[date, int]]:
+    """Total en centavos de cada mes archivado, por tabla (en caché hasta el próximo archivado)."""
+    return _resumenes.obtener(usuario_id, lambda: _cargar_resumenes(usuario_id), [(ARCHIVO, usuario_id)])
+
+
+def total_archivado(usuario_id: str, tabla: str, inicio: date, fin: date) -> int:
+    """Centavos archivados de `tabla` con fecha en [inicio, fin]."""
+    total = 0
+    for mes, centavos in resumenes(usuario_id).get(tabla, {}).items():
+        fin_mes = _fin_de_mes(mes)
+        if fin_mes < inicio or mes > fin:
+            continue
+        if inicio <= mes and fin_mes <= fin:
+            total += centavos
+            continue
+        _lecturas.inc(tabla=tabla)
+        archivo = archive.abrir(nombre_archivo(usuario_id, tabla, mes.year))
+        if archivo is None:
+            logger.warning("Falta el archivo %s", nombre_archivo(usuario_id, tabla, mes.year))
+            continue
+        total += archivo.total_en_rango(max(inicio, mes), min(fin, fin_mes))
+    return total
+
+
+def leer_archivado(usuario_id: str, tabla: str, inicio: date, fin: date, limite: int) -> List[dict]:
+    """Movimientos archivados con fecha en [inicio, fin], del más reciente al más antiguo."""
+    filas: List[dict] = []
+    for anio in range(fin.year, inicio.year - 1, -1):
+        archivo = archive.abrir(nombre_archivo(usuario_id, tabla, anio))
+        if archivo is None or archivo.cabecera["desde"] is None:
+            continue
+        if archivo.cabecera["hasta"] < dia_epoch(inicio) or archivo.cabecera["desde"] > dia_epoch(fin):
+            continue
+        filas.extend(reversed(archivo.leer(inicio, fin)))
+        if len(filas) >= limite:
+            break
+    return filas[:limite]
+
+
+# ---------- ejecución periódica ----------
+class GestorArchivo:
+    """
+    Hilo que archiva cada ARCHIVE_INTERVAL_HOURS. Con varios workers en el
+    host solo corre el que obtiene el lock de ARCHIVE_LOCK_PATH.
+    """
+
+    def __init__(self):
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if self._hilo is not None:
+            return
+        self._hilo = threading.Thread(target=self._bucle, name="archivo-movimientos", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            time.sleep(settings.ARCHIVE_INTERVAL_HOURS * 3600)
+            self.ejecutar()
+
+    def ejecutar(self) -> Optional[Dict[str, int]]:
+        with open(settings.ARCHIVE_LOCK_PATH, "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    _ejecuciones.inc(resultado="omitida")
+                    return None
+            try:
+                movidas = archivar_todos()
+                _ejecuciones.inc(resultado="completada")
+                logger.info("Archivado completado: %s", movidas)
+                return movidas
+            except Exception:
+                _ejecuciones.inc(resultado="fallida")
+                logger.exception("Archivado fallido")
+                return None
+
+
+archivador = GestorArchivo()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archiva los movimientos viejos (de todos o de un usuario)")
+    parser.add_argument("--usuario", help="id del usuario; sin él se recorren todos")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(archivar_usuario(args.usuario) if args.usuario else archivador.ejecutar())
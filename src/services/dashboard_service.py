@@ -0,0 +1,101 @@
+"""
+Datos de la pantalla de inicio en una sola petición.
+
+Con el usuario ya resuelto, cada sección (perfil, últimos gastos e
+ingresos, reporte del mes y planes) corre en el threadpool al mismo tiempo
+y se espera a todas juntas: la respuesta tarda lo que la sección más lenta
+y no la suma. Cada sección trae su estado y su duración; si una falla o
+supera DASHBOARD_SECTION_TIMEOUT_SECONDS se informa el error en ella y
+las demás se devuelven igual. El límite de la sección es también su
+presupuesto con Supabase, así que una sección vencida no sigue ocupando
+un hilo del threadpool con llamadas que ya nadie espera.
+"""
+import asyncio
+import logging
+import time
+from datetime import date
+from typing import Callable, Dict
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.core.metrics import registro
+from src.database.resilience import ejecutar, presupuesto
+from src.database.supabase_client import supabase
+from src.services.plan_index_service import indice_plan_gestion, indice_planes_ahorro
+from src.services.report_service import calcular_reporte_rango
+
+logger = logging.getLogger(__name__)
+
+_secciones = registro.contador("dashboard_secciones_total", "Secciones del dashboard por resultado")
+_segundos = registro.contador("dashboard_seccion_segundos_total", "Tiempo acumulado por sección del dashboard")
+
+
+def _perfil(usuario_id: str) -> dict:
+    filas = ejecutar(
+        supabase.table("usuarios").select("id, nombre, correo").eq("id", usuario_id), idempotente=True
+    ).data
+    if not filas:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return filas[0]
+
+
+def _recientes(tabla: str, usuario_id: str) -> list:
+    return ejecutar(
+        supabase.table(tabla).select("*").eq("usuario_id", usuario_id)
+        .order("fecha", desc=True).limit(settings.DASHBOARD_RECENT_LIMIT),
+        idempotente=True,
+    ).data or []
+
+
+def _reporte_mes(usuario_id: str, hoy: date) -> dict:
+    inicio = hoy.replace(day=1)
+    return {"periodo": {"inicio": inicio, "fin": hoy}, **calcular_reporte_rango(usuario_id, inicio, hoy)}
+
+
+def _con_presupuesto(funcion: Callable[[], object]) -> object:
+    with presupuesto(settings.DASHBOARD_SECTION_TIMEOUT_SECONDS):
+        return funcion()
+
+
+async def _seccion(nombre: str, funcion: Callable[[], object]) -> dict:
+    inicio = time.perf_counter()
+    resultado: Dict[str, object] = {"estado": "ok"}
+    try:
+        resultado["data"] = await asyncio.wait_for(
+            run_in_threadpool(_con_presupuesto, funcion), settings.DASHBOARD_SECTION_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        resultado = {"estado": "error", "error": "Tiempo de espera agotado"}
+    except HTTPException as e:
+        # 504: el presupuesto de la sección se agotó dentro del hilo
+        resultado = {"estado": "error", "error": "Tiempo de espera agotado" if e.status_code == 504 else e.detail}
+    except Exception:
+        logger.exception("Error en la sección %s del dashboard", nombre)
+        resultado = {"estado": "error", "error": "Error interno"}
+    duracion = time.perf_counter() - inicio
+    _secciones.inc(seccion=nombre, resultado=resultado["estado"])
+    _segundos.inc(duracion, seccion=nombre)
+    resultado["duracion_ms"] = round(duracion * 1000, 1)
+    return resultado
+
+
+async def armar_dashboard(usuario_id: str, hoy: date = None) -> dict:
+    hoy = hoy or date.today()
+    secciones = {
+        "usuario": lambda: _perfil(usuario_id),
+        "gastos_recientes": lambda: _recientes("gastos", usuario_id),
+        "ingresos_recientes": lambda: _recientes("ingresos", usuario_id),
+        "reporte_mes": lambda: _reporte_mes(usuario_id, hoy),
+        "planes_ahorro": lambda: indice_planes_ahorro.consultar(usuario_id),
+        "planes_gestion": lambda: indice_plan_gestion.consultar(usuario_id),
+    }
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(_seccion(n, f) for n, f in secciones.items()))
+    return {
+        "usuario_id": usuario_id,
+        "fecha": hoy,
+        "duracion_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        "secciones": dict(zip(secciones, resultados)),
+    }
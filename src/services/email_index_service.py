@@ -0,0 +1,92 @@
+"""
+Índice en memoria de los correos registrados.
+
+Evita la consulta de "¿ya existe este correo?" al registrar usuarios
+cuando el filtro de Bloom garantiza que el correo es nuevo. La restricción
+UNIQUE de `usuarios.correo` sigue siendo la autoridad final: si otro worker
+registró el correo después de la precarga, el INSERT falla y se responde
+igual que antes ("El usuario ya existe").
+"""
+import logging
+import threading
+
+from src.core.bloom import FiltroBloomContador
+from src.core.config import settings
+from src.core.metrics import registro
+from src.database.paginacion import recorrer
+from src.database.supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+USERS_TABLE = "usuarios"
+
+_evitadas = registro.contador(
+    "indice_correos_consultas_evitadas_total", "Registros que omitieron la consulta de correo duplicado"
+)
+_positivos = registro.contador(
+    "indice_correos_positivos_total", "Correos que el filtro marcó como posiblemente existentes"
+)
+_falsos_positivos = registro.contador(
+    "indice_correos_falsos_positivos_total", "Positivos del filtro que la base de datos desmintió"
+)
+registro.medidor(
+    "indice_correos_tasa_falsos_positivos",
+    "Fracción de positivos del filtro que resultaron no existir",
+    lambda: {(): (_falsos_positivos.valor() / _positivos.valor()) if _positivos.valor() else 0.0},
+)
+
+
+def _normalizar(correo: str) -> str:
+    return correo.strip().lower()
+
+
+class IndiceCorreos:
+    def __init__(self):
+        self.filtro = FiltroBloomContador(settings.EMAIL_INDEX_CAPACITY, settings.EMAIL_INDEX_FP_RATE)
+        self.listo = False
+        registro.medidor(
+            "indice_correos_elementos", "Correos cargados en el filtro", lambda: {(): self.filtro.elementos}
+        )
+
+    def precargar(self) -> None:
+        """Recorre `usuarios` por páginas y carga todos los correos en el filtro."""
+        filas = recorrer(lambda: supabase.table(USERS_TABLE).select("id, correo"), settings.EMAIL_INDEX_PAGE_SIZE)
+        for fila in filas:
+            if fila.get("correo"):
+                self.filtro.agregar(_normalizar(fila["correo"]))
+        self.listo = True
+        logger.info("Índice de correos listo con %d correos", self.filtro.elementos)
+
+    def precargar_en_segundo_plano(self) -> None:
+        def tarea():
+            try:
+                self.precargar()
+            except Exception:
+                # Sin índice el registro simplemente sigue consultando la base
+                logger.exception("No se pudo precargar el índice de correos")
+
+        threading.Thread(target=tarea, name="precarga-indice-correos", daemon=True).start()
+
+    def puede_existir(self, correo: str) -> bool:
+        """False solo si el correo seguro no está registrado (se puede omitir la consulta)."""
+        if not self.listo:
+            return True
+        if _normalizar(correo) in self.filtro:
+            _positivos.inc()
+            return True
+        _evitadas.inc()
+        return False
+
+    def confirmar_consulta(self, existe: bool) -> None:
+        """Registra el resultado de la consulta hecha tras un positivo del filtro."""
+        if self.listo and not existe:
+            _falsos_positivos.inc()
+
+    def agregar(self, correo: str) -> None:
+        self.filtro.agregar(_normalizar(correo))
+
+    def eliminar(self, correo: str) -> None:
+        self.filtro.eliminar(_normalizar(correo))
+
+
+indice_correos = IndiceCorreos()
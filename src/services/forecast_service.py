@@ -0,0 +1,174 @@
+"""
+Pronóstico de flujo de caja a partir del historial del usuario.
+
+Desde el snapshot columnar del ledger se arma la serie diaria de flujo neto
+(ingresos - gastos, en centavos) de los últimos FORECAST_HISTORY_DAYS días.
+Sobre ella se calculan promedios móviles con sumas acumuladas y un perfil
+estacional aditivo: cuánto se aparta, en promedio, cada día del mes (cobro
+de nómina, renta) y cada día de la semana del flujo medio. El pronóstico de
+un día futuro es el nivel reciente (promedio de FORECAST_LEVEL_WINDOW_DAYS)
+más sus dos ajustes estacionales.
+
+El modelo se guarda por usuario junto con la generación y la versión del
+snapshot y la fecha: solo se recalcula cuando cambia el ledger (o se
+recarga) o cambia el día. Proyectar
+hasta la `fecha_fin` de cada plan de ahorro es O(días) sobre el modelo.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Dict, List, Optional
+
+from src.core.columnar import dia_epoch, fecha_de_dia
+from src.core.config import settings
+from src.core.metrics import registro
+from src.core.money import a_centavos, a_monto, np
+from src.services.ledger_service import ledger
+from src.services.plan_index_service import indice_planes_ahorro
+
+DIAS_SEMANA = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+
+_aciertos = registro.contador("pronostico_cache_aciertos_total", "Pronósticos servidos con el modelo en caché")
+_calculos = registro.contador("pronostico_calculos_total", "Modelos de pronóstico recalculados")
+
+
+def promedios_moviles(serie: List[int], ventana: int) -> List[float]:
+    """Promedio de cada ventana de `ventana` días que termina en cada posición (desde la ventana-ésima)."""
+    if ventana <= 0 or len(serie) < ventana:
+        return []
+    if np is not None:
+        acumulada = np.concatenate(([0], np.cumsum(np.asarray(serie, dtype=np.int64))))
+        return ((acumulada[ventana:] - acumulada[:-ventana]) / ventana).tolist()
+    acumulada = [0] + list(accumulate(serie))
+    return [(acumulada[i + ventana] - acumulada[i]) / ventana for i in range(len(serie) - ventana + 1)]
+
+
+def _ajustes(serie: List[int], dias: List[date], clave, grupos: int) -> List[float]:
+    """Promedio de la serie por grupo (día de la semana o del mes) menos el promedio general."""
+    sumas, conteos = [0] * grupos, [0] * grupos
+    for valor, dia in zip(serie, dias):
+        g = clave(dia)
+        sumas[g] += valor
+        conteos[g] += 1
+    media = sum(serie) / len(serie) if serie else 0.0
+    return [(sumas[g] / conteos[g] - media) if conteos[g] else 0.0 for g in range(grupos)]
+
+
+class ModeloFlujo:
+    __slots__ = ("hoy", "desde", "dias", "nivel", "media", "movil_7", "movil_30",
+                 "ajuste_semana", "ajuste_mes")
+
+    def __init__(self, serie: List[int], desde: date, hoy: date):
+        self.hoy = hoy
+        self.desde = desde
+        self.dias = len(serie)
+        fechas = [desde + timedelta(days=i) for i in range(len(serie))]
+        self.media = sum(serie) / len(serie) if serie else 0.0
+        ventana = min(settings.FORECAST_LEVEL_WINDOW_DAYS, len(serie))
+        nivel = promedios_moviles(serie, ventana)
+        self.nivel = nivel[-1] if nivel else 0.0
+        movil_7, movil_30 = promedios_moviles(serie, 7), promedios_moviles(serie, 30)
+        self.movil_7 = movil_7[-1] if movil_7 else None
+        self.movil_30 = movil_30[-1] if movil_30 else None
+        self.ajuste_semana = _ajustes(serie, fechas, lambda f: f.weekday(), 7)
+        self.ajuste_mes = _ajustes(serie, fechas, lambda f: f.day - 1, 31)
+
+    def pronostico(self, dia: date) -> float:
+        """Flujo neto esperado, en centavos, para un día futuro."""
+        return self.nivel + self.ajuste_semana[dia.weekday()] + self.ajuste_mes[dia.day - 1]
+
+    def proyectar(self, hasta: date) -> List[float]:
+        """Flujo esperado de cada día desde mañana hasta `hasta` inclusive."""
+        dias = (hasta - self.hoy).days
+        return [self.pronostico(self.hoy + timedelta(days=i)) for i in range(1, dias + 1)]
+
+
+class ServicioPronostico:
+    def __init__(self):
+        # usuario_id -> (generación del snapshot, versión, fecha, modelo)
+        self._modelos: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _modelo(self, usuario_id: str, hoy: date):
+        snapshot = ledger.obtener(usuario_id)
+        clave = (snapshot.generacion, snapshot.version, hoy)
+        with self._lock:
+            entrada = self._modelos.get(usuario_id)
+            if entrada is not None and entrada[:3] == clave:
+                self._modelos.move_to_end(usuario_id)
+                _aciertos.inc()
+                return snapshot, entrada[3]
+
+        _calculos.inc()
+        inicio = dia_epoch(hoy) - settings.FORECAST_HISTORY_DAYS + 1
+        primero = snapshot.primer_dia()
+        if primero is not None:
+            inicio = min(max(inicio, primero), dia_epoch(hoy))
+        serie = snapshot.serie_neta(inicio, dia_epoch(hoy) - inicio + 1)
+        modelo = ModeloFlujo(serie, fecha_de_dia(inicio), hoy)
+        with self._lock:
+            self._modelos[usuario_id] = clave + (modelo,)
+            self._modelos.move_to_end(usuario_id)
+            while len(self._modelos) > settings.FORECAST_CACHE_MAX_USERS:
+                self._modelos.popitem(last=False)
+        return snapshot, modelo
+
+    def pronosticar(self, usuario_id: str, horizonte_dias: Optional[int] = None, hoy: Optional[date] = None) -> dict:
+        hoy = hoy or date.today()
+        snapshot, modelo = self._modelo(usuario_id, hoy)
+        planes = indice_planes_ahorro.consultar(usuario_id)
+
+        fin_planes = [date.fromisoformat(str(p["fecha_fin"])[:10]) for p in planes]
+        horizonte = horizonte_dias or settings.FORECAST_DEFAULT_HORIZON_DAYS
+        hasta = max([hoy + timedelta(days=horizonte)] + fin_planes)
+        hasta = min(hasta, hoy + timedelta(days=settings.FORECAST_MAX_HORIZON_DAYS))
+        futuro = modelo.proyectar(hasta)
+        acumulado_futuro = [0.0] + list(accumulate(futuro))
+
+        mensual: Dict[str, float] = {}
+        for i, neto in enumerate(futuro[:horizonte], start=1):
+            mes = (hoy + timedelta(days=i)).strftime("%Y-%m")
+            mensual[mes] = mensual.get(mes, 0.0) + neto
+
+        return {
+            "generado_para": hoy,
+            "historial": {
+                "desde": modelo.desde,
+                "dias": modelo.dias,
+                "neto_promedio_diario": a_monto(round(modelo.media)),
+                "promedio_movil_7": a_monto(round(modelo.movil_7)) if modelo.movil_7 is not None else None,
+                "promedio_movil_30": a_monto(round(modelo.movil_30)) if modelo.movil_30 is not None else None,
+            },
+            "perfil_semanal": {d: a_monto(round(a)) for d, a in zip(DIAS_SEMANA, modelo.ajuste_semana)},
+            "perfil_dia_mes": [a_monto(round(a)) for a in modelo.ajuste_mes],
+            "proyeccion_mensual": [{"mes": m, "neto": a_monto(round(v))} for m, v in mensual.items()],
+            "planes": [self._evaluar_plan(p, snapshot, hoy, acumulado_futuro) for p in planes],
+        }
+
+    @staticmethod
+    def _evaluar_plan(plan: dict, snapshot, hoy: date, acumulado_futuro: List[float]) -> dict:
+        inicio = date.fromisoformat(str(plan["fecha_inicio"])[:10])
+        fin = date.fromisoformat(str(plan["fecha_fin"])[:10])
+        objetivo = a_centavos(plan.get("monto_objetivo"))
+        corte = min(hoy, fin)
+        actual = 0
+        if inicio <= corte:
+            actual = snapshot.total("ingresos", inicio, corte) - snapshot.total("gastos", inicio, corte)
+        dias_restantes = max(0, (fin - hoy).days)
+        esperado = acumulado_futuro[min(dias_restantes, len(acumulado_futuro) - 1)]
+        proyectado = actual + round(esperado)
+        faltante = max(0, objetivo - actual)
+        return {
+            "id": plan["id"],
+            "nombre_plan": plan.get("nombre_plan"),
+            "monto_objetivo": a_monto(objetivo),
+            "fecha_fin": fin,
+            "ahorro_actual": a_monto(actual),
+            "ahorro_proyectado": a_monto(proyectado),
+            "alcanzable": proyectado >= objetivo,
+            "ahorro_diario_necesario": a_monto(-(-faltante // dias_restantes)) if dias_restantes else None,
+        }
+
+
+pronosticos = ServicioPronostico()
@@ -0,0 +1,236 @@
+"""
+Snapshot columnar, por usuario, de sus gastos e ingresos.
+
+La primera consulta carga todos los movimientos del usuario en columnas
+compactas (src/core/columnar.py). Después, como mucho cada
+LEDGER_SNAPSHOT_REFRESH_SECONDS, se piden solo las filas con
+`actualizado_en` posterior al watermark, que nunca pasa del momento de la
+lectura menos LEDGER_SNAPSHOT_OVERLAP_SECONDS: una fila que confirma tarde
+con una marca anterior llega en el delta siguiente (reaplicar una fila es
+idempotente). Las escrituras hechas por este
+worker se aplican al instante desde las rutas; las de otros workers
+incrementan la versión de ("movimientos", usuario) en el bus de caché y el
+snapshot se sincroniza en la siguiente lectura sin esperar al intervalo.
+Cuando el archivado mueve filas fuera de las tablas calientes publica
+("archivo", usuario) y el snapshot se recarga completo.
+Los borrados llegan como lápidas de `eliminaciones` (ver sync_service). Como
+red de seguridad ante lápidas perdidas, cada snapshot se recarga completo
+tras LEDGER_SNAPSHOT_FULL_RELOAD_SECONDS. Los snapshots se desalojan por
+LRU cuando su tamaño total supera LEDGER_SNAPSHOT_MAX_BYTES.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+from src.core.cache import ARCHIVO, MOVIMIENTOS, bus
+from src.core.columnar import ColumnasMovimientos
+from src.core.config import settings
+from src.core.metrics import registro
+from src.core.single_flight import single_flight
+from src.database.paginacion import desde_marca, marca_segura, mas_reciente, recorrer
+from src.database.supabase_client import supabase
+from src.services.sync_service import eliminaciones_desde, ultima_eliminacion
+
+# Columna dictionary-encoded de cada tabla
+CATEGORIA = {"gastos": "categoria", "ingresos": "concepto"}
+
+_aciertos = registro.contador("ledger_snapshot_aciertos_total", "Lecturas servidas por un snapshot vigente")
+_cargas = registro.contador("ledger_snapshot_cargas_total", "Cargas completas de snapshots desde Supabase")
+_deltas = registro.contador("ledger_snapshot_deltas_total", "Sincronizaciones incrementales y filas recibidas")
+_desalojos = registro.contador("ledger_snapshot_desalojos_total", "Snapshots desalojados por el presupuesto de memoria")
+
+_generaciones = itertools.count(1)
+
+
+class SnapshotUsuario:
+    def __init__(self):
+        self.columnas: Dict[str, ColumnasMovimientos] = {t: ColumnasMovimientos() for t in CATEGORIA}
+        # Watermark de los deltas; solo lo avanzan las lecturas (ver marca_segura)
+        self.marca: Optional[str] = None
+        self.eliminacion = 0  # id de la última lápida aplicada
+        self.cargado = time.monotonic()
+        self.sincronizado = self.cargado
+        # (generacion, version) identifica el contenido para cachés derivados:
+        # cada carga completa es una generación nueva y `version` aumenta con
+        # cada cambio real dentro de ella
+        self.generacion = next(_generaciones)
+        self.version = 0
+        # Versiones del bus con las que el snapshot está al día
+        self.version_bus = 0
+        self.version_archivo = 0
+        self.lock = threading.Lock()
+
+    @property
+    def bytes(self) -> int:
+        return 200 + sum(c.bytes for c in self.columnas.values())
+
+    def aplicar(self, tipo: str, fila: dict, nueva: bool = False) -> bool:
+        argumentos = (fila["id"], fila["fecha"], fila.get("monto"), fila.get(CATEGORIA[tipo]))
+        if nueva:
+            self.columnas[tipo].agregar(*argumentos)
+            return True
+        return self.columnas[tipo].upsert(*argumentos)
+
+    def aplicar_varias(self, tipo: str, filas: List[dict]) -> int:
+        return self.columnas[tipo].upsert_varios(
+            [(f["id"], f["fecha"], f.get("monto"), f.get(CATEGORIA[tipo])) for f in filas]
+        )
+
+    def total(self, tipo: str, inicio: date, fin: date) -> int:
+        """Total en centavos de `tipo` con fecha en [inicio, fin]."""
+        with self.lock:
+            return self.columnas[tipo].total_en_rango(inicio, fin)
+
+    def totales_por_categoria(self, tipo: str, inicio: date, fin: date) -> Dict[str, int]:
+        with self.lock:
+            return self.columnas[tipo].totales_por_categoria(inicio, fin)
+
+    def serie_neta(self, desde: int, dias: int) -> List[int]:
+        """Ingresos menos gastos, en centavos, de cada día desde el día epoch `desde`."""
+        with self.lock:
+            ingresos = self.columnas["ingresos"].serie_diaria(desde, dias)
+            gastos = self.columnas["gastos"].serie_diaria(desde, dias)
+        return [i - g for i, g in zip(ingresos, gastos)]
+
+    def primer_dia(self) -> Optional[int]:
+        with self.lock:
+            dias = [d for d in (c.primer_dia() for c in self.columnas.values()) if d is not None]
+        return min(dias) if dias else None
+
+
+def _mas_reciente(marca: Optional[str], fila: dict) -> Optional[str]:
+    actualizado = fila.get("actualizado_en")
+    return mas_reciente(marca, str(actualizado)) if actualizado else marca
+
+
+def _recorrer(tabla: str, usuario_id: str, marca: Optional[str] = None) -> Iterator[dict]:
+    """Filas del usuario (solo las modificadas desde `marca`, si se indica) por páginas."""
+    columnas = f"id, fecha, monto, {CATEGORIA[tabla]}, actualizado_en"
+
+    def construir():
+        query = supabase.table(tabla).select(columnas).eq("usuario_id", usuario_id)
+        return desde_marca(query, marca) if marca else query
+
+    return recorrer(construir, settings.LEDGER_PAGE_SIZE)
+
+
+class GestorSnapshots:
+    def __init__(self):
+        self._snapshots: "OrderedDict[str, SnapshotUsuario]" = OrderedDict()
+        self._lock = threading.Lock()
+        registro.medidor("ledger_snapshot_bytes", "Bytes ocupados por los snapshots columnar",
+                         lambda: {(): sum(s.bytes for s in list(self._snapshots.values()))})
+        registro.medidor("ledger_snapshot_filas", "Movimientos cargados en snapshots",
+                         lambda: {(): sum(len(c) for s in list(self._snapshots.values()) for c in s.columnas.values())})
+
+    def _cargar(self, usuario_id: str) -> SnapshotUsuario:
+        _cargas.inc()
+        snapshot = SnapshotUsuario()
+        # Escrituras publicadas durante la carga se recogen con un delta en la próxima lectura
+        snapshot.version_bus = bus.version(MOVIMIENTOS, usuario_id)
+        snapshot.version_archivo = bus.version(ARCHIVO, usuario_id)
+        # Antes de leer filas: un borrado concurrente llegará como lápida en el próximo delta
+        snapshot.eliminacion = ultima_eliminacion(usuario_id)
+        lectura, maxima = time.time(), None
+        for tabla in CATEGORIA:
+            for fila in _recorrer(tabla, usuario_id):
+                snapshot.aplicar(tabla, fila, nueva=True)
+                maxima = _mas_reciente(maxima, fila)
+        snapshot.marca = marca_segura(maxima, lectura, settings.LEDGER_SNAPSHOT_OVERLAP_SECONDS)
+        return snapshot
+
+    def _sincronizar(self, usuario_id: str, snapshot: SnapshotUsuario) -> None:
+        version_bus = bus.version(MOVIMIENTOS, usuario_id)
+        lapidas = eliminaciones_desde(usuario_id, snapshot.eliminacion, tablas=tuple(CATEGORIA))
+        lectura = time.time()
+        filas = {tabla: list(_recorrer(tabla, usuario_id, snapshot.marca)) for tabla in CATEGORIA}
+        maxima = snapshot.marca
+        for lista in filas.values():
+            for fila in lista:
+                maxima = _mas_reciente(maxima, fila)
+        with snapshot.lock:
+            cambios = sum(snapshot.aplicar_varias(tabla, lista) for tabla, lista in filas.items())
+            for lapida in lapidas:
+                cambios += snapshot.columnas[lapida["tabla"]].quitar(lapida["registro_id"])
+            if lapidas:
+                snapshot.eliminacion = max(snapshot.eliminacion, int(lapidas[-1]["id"]))
+            if cambios:
+                snapshot.version += 1
+            snapshot.marca = marca_segura(maxima, lectura, settings.LEDGER_SNAPSHOT_OVERLAP_SECONDS)
+            snapshot.version_bus = max(snapshot.version_bus, version_bus)
+            snapshot.sincronizado = time.monotonic()
+        _deltas.inc(resultado="sincronizacion")
+        _deltas.inc(cambios, resultado="filas")
+
+    def _desalojar(self) -> None:
+        total = sum(s.bytes for s in self._snapshots.values())
+        while total > settings.LEDGER_SNAPSHOT_MAX_BYTES and len(self._snapshots) > 1:
+            _, snapshot = self._snapshots.popitem(last=False)
+            total -= snapshot.bytes
+            _desalojos.inc()
+
+    def obtener(self, usuario_id: str) -> SnapshotUsuario:
+        """Snapshot vigente del usuario, cargándolo o sincronizándolo si hace falta."""
+        ahora = time.monotonic()
+        version_archivo = bus.version(ARCHIVO, usuario_id)
+        with self._lock:
+            snapshot = self._snapshots.get(usuario_id)
+            if snapshot is not None and (ahora - snapshot.cargado >= settings.LEDGER_SNAPSHOT_FULL_RELOAD_SECONDS
+                                         or snapshot.version_archivo != version_archivo):
+                snapshot = None
+            if snapshot is not None:
+                self._snapshots.move_to_end(usuario_id)
+
+        if snapshot is not None:
+            if (snapshot.version_bus != bus.version(MOVIMIENTOS, usuario_id)
+                    or ahora - snapshot.sincronizado >= settings.LEDGER_SNAPSHOT_REFRESH_SECONDS):
+                single_flight.ejecutar("ledger_delta", usuario_id, lambda: self._sincronizar(usuario_id, snapshot))
+            else:
+                _aciertos.inc()
+            return snapshot
+
+        snapshot = single_flight.ejecutar("ledger_carga", usuario_id, lambda: self._cargar(usuario_id))
+        with self._lock:
+            self._snapshots[usuario_id] = snapshot
+            self._snapshots.move_to_end(usuario_id)
+            self._desalojar()
+        return snapshot
+
+    # ---------- hooks de escritura ----------
+    # `version` es la que devolvió bus.publicar() para esta escritura. Si el
+    # snapshot no estaba al día con la anterior se deja como está y la
+    # próxima lectura lo sincroniza con un delta.
+    def registrar(self, usuario_id: str, tipo: str, fila: dict, version: int) -> None:
+        with self._lock:
+            snapshot = self._snapshots.get(usuario_id)
+        if snapshot is None:
+            return
+        with snapshot.lock:
+            if snapshot.version_bus != version - 1:
+                return
+            snapshot.version_bus = version
+            if snapshot.aplicar(tipo, fila):
+                snapshot.version += 1
+
+    def quitar(self, usuario_id: str, tipo: str, id_fila, version: int) -> None:
+        with self._lock:
+            snapshot = self._snapshots.get(usuario_id)
+        if snapshot is None:
+            return
+        with snapshot.lock:
+            if snapshot.version_bus != version - 1:
+                return
+            snapshot.version_bus = version
+            if snapshot.columnas[tipo].quitar(id_fila):
+                snapshot.version += 1
+
+    def invalidar(self, usuario_id: str) -> None:
+        """Descarta el snapshot local (los demás workers se invalidan por el bus)."""
+        with self._lock:
+            self._snapshots.pop(usuario_id, None)
+
+
+ledger = GestorSnapshots()
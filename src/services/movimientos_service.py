@@ -0,0 +1,26 @@
+"""
+Efectos de una escritura de gasto o ingreso sobre las cachés.
+
+Publica la invalidación de los movimientos del usuario en el bus y aplica
+el cambio en el índice de búsqueda y el snapshot del ledger de este worker
+con la versión resultante: si estaban al día siguen válidos sin recargar,
+y los demás workers ven la versión nueva y recargan o sincronizan.
+"""
+from src.core.cache import MOVIMIENTOS, bus
+from src.services.ledger_service import ledger
+from src.services.search_service import buscador
+from src.services.sync_service import registrar_eliminacion
+
+
+def movimiento_escrito(usuario_id: str, tipo: str, fila: dict) -> None:
+    version = bus.publicar(MOVIMIENTOS, usuario_id)
+    buscador.registrar(usuario_id, tipo, fila, version)
+    ledger.registrar(usuario_id, tipo, fila, version)
+
+
+def movimiento_eliminado(usuario_id: str, tipo: str, id_fila) -> None:
+    # La lápida primero: quien sincronice al ver la versión nueva ya la encuentra
+    registrar_eliminacion(usuario_id, tipo, id_fila)
+    version = bus.publicar(MOVIMIENTOS, usuario_id)
+    buscador.quitar(usuario_id, tipo, id_fila, version)
+    ledger.quitar(usuario_id, tipo, id_fila, version)
@@ -0,0 +1,116 @@
+"""
+Índice en memoria, por usuario, de las ventanas de fechas de los planes.
+
+Responde "qué planes están activos en la fecha X (y categoría Y)" con un
+árbol de intervalos en O(log n + k) y sin llamar a Supabase mientras la
+entrada esté en caché. Las rutas de creación, actualización y eliminación
+de planes publican la invalidación en el bus de caché (src/core/cache.py),
+con el nombre del índice como espacio, y todos los workers descartan su
+entrada; PLAN_INDEX_TTL_SECONDS queda como red de seguridad.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+from src.core.cache import bus
+from src.core.config import settings
+from src.core.interval_tree import ArbolIntervalos
+from src.core.metrics import registro
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+
+_aciertos = registro.contador("indice_planes_aciertos_total", "Consultas de planes activos resueltas desde caché")
+_fallos = registro.contador("indice_planes_fallos_total", "Consultas de planes activos que cargaron desde Supabase")
+
+
+def _dia(valor) -> int:
+    if isinstance(valor, date):
+        return valor.toordinal()
+    return date.fromisoformat(str(valor)[:10]).toordinal()
+
+
+class _Entrada:
+    __slots__ = ("filas", "arbol", "por_categoria", "creada", "version")
+
+    def __init__(self, filas: List[dict], clave_categoria: Optional[str], version: int):
+        self.filas = filas
+        self.creada = time.monotonic()
+        self.version = version
+        # El valor guardado es la posición de la fila para conservar el orden original
+        intervalos = [(_dia(f["fecha_inicio"]), _dia(f["fecha_fin"]), i) for i, f in enumerate(filas)]
+        self.arbol = ArbolIntervalos(intervalos)
+        self.por_categoria: Dict[str, ArbolIntervalos] = {}
+        if clave_categoria:
+            grupos: Dict[str, list] = {}
+            for intervalo in intervalos:
+                grupos.setdefault(filas[intervalo[2]].get(clave_categoria), []).append(intervalo)
+            self.por_categoria = {c: ArbolIntervalos(g) for c, g in grupos.items()}
+
+
+class IndicePlanes:
+    def __init__(self, nombre: str, cargar: Callable[[str], List[dict]], clave_categoria: Optional[str] = None):
+        self.nombre = nombre
+        self._cargar = cargar
+        self._clave_categoria = clave_categoria
+        self._entradas: "OrderedDict[str, _Entrada]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entrada(self, usuario_id: str) -> _Entrada:
+        # Versión leída antes de cargar: una invalidación durante la carga fuerza otra en la próxima consulta
+        version = bus.version(self.nombre, usuario_id)
+        with self._lock:
+            entrada = self._entradas.get(usuario_id)
+            if (entrada is not None and entrada.version == version
+                    and time.monotonic() - entrada.creada < settings.PLAN_INDEX_TTL_SECONDS):
+                self._entradas.move_to_end(usuario_id)
+                _aciertos.inc(indice=self.nombre)
+                return entrada
+        _fallos.inc(indice=self.nombre)
+        entrada = _Entrada(self._cargar(usuario_id), self._clave_categoria, version)
+        with self._lock:
+            self._entradas[usuario_id] = entrada
+            self._entradas.move_to_end(usuario_id)
+            while len(self._entradas) > settings.PLAN_INDEX_MAX_USERS:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def consultar(self, usuario_id: str, activo_en: Optional[date] = None, categoria: Optional[str] = None) -> List[dict]:
+        """Planes del usuario activos en `activo_en` (si se indica) y de `categoria` (si se indica)."""
+        entrada = self._entrada(usuario_id)
+        if categoria is not None and self._clave_categoria:
+            arbol = entrada.por_categoria.get(categoria)
+            if arbol is None:
+                return []
+        else:
+            arbol = entrada.arbol
+        if activo_en is None:
+            posiciones = arbol.valores()
+        else:
+            posiciones = arbol.contienen(activo_en.toordinal())
+        return [entrada.filas[i] for i in sorted(posiciones)]
+
+    def invalidar(self, usuario_id: str) -> None:
+        """Descarta la entrada del usuario en este worker y en los demás."""
+        with self._lock:
+            self._entradas.pop(usuario_id, None)
+        bus.publicar(self.nombre, usuario_id)
+
+
+def _cargar_planes_ahorro(usuario_id: str) -> List[dict]:
+    return ejecutar(
+        supabase.table("planes_ahorro").select("*").eq("usuario_id", usuario_id).order("creado_en", desc=True),
+        idempotente=True,
+    ).data or []
+
+
+def _cargar_plan_gestion(usuario_id: str) -> List[dict]:
+    return ejecutar(
+        supabase.table("plan_gestion").select("*").eq("usuario_id", usuario_id).order("fecha_inicio", desc=False),
+        idempotente=True,
+    ).data or []
+
+
+indice_planes_ahorro = IndicePlanes("planes_ahorro", _cargar_planes_ahorro)
+indice_plan_gestion = IndicePlanes("plan_gestion", _cargar_plan_gestion, clave_categoria="categoria")
@@ -0,0 +1,280 @@
+"""
+Purga en segundo plano de los datos de un usuario eliminado.
+
+Eliminar una cuenta encola un trabajo que borra gastos, ingresos,
+planes_ahorro, plan_gestion y resumen_mensual del usuario en bloques de PURGE_CHUNK_SIZE
+filas, con una pausa entre bloques para no bloquear las tablas, y al final
+borra la fila de `usuarios` (así las llaves foráneas nunca quedan
+huérfanas). Cada paso se anota en un journal local (JSON Lines) que
+comparten los workers del host; al arrancar se reanudan los trabajos que
+no terminaron. El journal se compacta cada PURGE_COMPACT_SECONDS y los
+trabajos terminados se descartan tras PURGE_RETENTION_HOURS, así su
+tamaño (y el costo de consultarlo) no crece sin límite. Borrar por id es idempotente, de modo que repetir un bloque
+tras una caída es seguro.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from src.core.config import settings
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+from src.services.email_index_service import indice_correos
+from src.core.cache import MOVIMIENTOS, bus
+from src.services.search_service import buscador
+from src.services.ledger_service import ledger
+from src.services.plan_index_service import indice_planes_ahorro, indice_plan_gestion
+from src.services.usuario_service import usuario_modificado
+from src.services.archive_service import eliminar_archivo_usuario
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TABLAS_DEPENDIENTES = ("reglas_recurrentes", "gastos", "ingresos", "planes_ahorro", "plan_gestion", "resumen_mensual")
+
+PENDIENTE, EN_CURSO, COMPLETADO, FALLIDO = "pendiente", "en_curso", "completado", "fallido"
+
+
+def _aplicar(trabajos: Dict[str, dict], evento: dict) -> None:
+    """Aplica un evento del journal al estado de los trabajos."""
+    trabajo = trabajos.setdefault(evento["job_id"], {
+        "job_id": evento["job_id"], "usuario_id": evento.get("usuario_id"),
+        "estado": PENDIENTE, "borradas": {}, "creado_en": evento["ts"],
+    })
+    if evento["evento"] == EN_CURSO:
+        trabajo["estado"] = EN_CURSO
+    elif evento["evento"] == "progreso":
+        trabajo["borradas"][evento["tabla"]] = evento["borradas"]
+    elif evento["evento"] in (COMPLETADO, FALLIDO):
+        trabajo["estado"] = evento["evento"]
+        trabajo["detalle"] = evento.get("detalle")
+    trabajo["actualizado_en"] = evento["ts"]
+
+
+class GestorPurgas:
+    """
+    El journal es el estado compartido entre workers: cualquiera encola
+    (anota el evento "creado") y consulta el estado leyéndolo. Solo ejecuta
+    el worker que obtiene el lock de PURGE_LOCK_PATH: reproduce el journal,
+    procesa los trabajos, cada PURGE_POLL_SECONDS lee los encolados por los
+    demás y cada PURGE_COMPACT_SECONDS compacta el journal. Los otros reintentan el lock con la misma
+    frecuencia, por si el ejecutor se cae. Anotar y compactar se hacen con
+    el lock exclusivo del journal, así la compactación no pisa eventos.
+    """
+
+    def __init__(self, ruta_journal: str, ruta_lock: str):
+        self.ruta_journal = ruta_journal
+        self.ruta_lock = ruta_lock
+        self.trabajos: Dict[str, dict] = {}  # solo en el worker ejecutor
+        self.ejecutor = False
+        self._leido = 0  # bytes del journal ya aplicados a self.trabajos
+        self._compactado = 0.0
+        self._cola: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+
+    # ---------- journal ----------
+    @contextmanager
+    def _journal_bloqueado(self):
+        """Exclusión entre hilos y entre procesos sobre el journal."""
+        with self._lock, open(self.ruta_journal + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _escribir(self, evento: dict) -> None:
+        evento["ts"] = datetime.utcnow().isoformat()
+        with open(self.ruta_journal, "a", encoding="utf-8") as f:
+            f.write(json.dumps(evento) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _anotar(self, evento: dict) -> None:
+        with self._journal_bloqueado():
+            self._escribir(evento)
+
+    def _leer(self, trabajos: Dict[str, dict], desde: int = 0) -> int:
+        """Aplica a `trabajos` los eventos desde el byte `desde`; devuelve hasta dónde leyó."""
+        if not os.path.exists(self.ruta_journal):
+            return 0
+        with open(self.ruta_journal, "rb") as f:
+            f.seek(desde)
+            for linea in f:
+                try:
+                    evento = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue  # línea truncada por una caída a mitad de escritura
+                _aplicar(trabajos, evento)
+            return f.tell()
+
+    def _compactar(self) -> None:
+        """
+        Reescribe el journal con una línea por evento vigente de cada trabajo
+        y olvida los terminados hace más de PURGE_RETENTION_HOURS (solo el
+        ejecutor, entre trabajo y trabajo).
+        """
+        with self._journal_bloqueado():
+            self._leido = self._leer(self.trabajos, self._leido)
+            vencimiento = (datetime.utcnow() - timedelta(hours=settings.PURGE_RETENTION_HOURS)).isoformat()
+            for job_id in [k for k, t in self.trabajos.items()
+                           if t["estado"] in (COMPLETADO, FALLIDO) and t["actualizado_en"] < vencimiento]:
+                del self.trabajos[job_id]
+            temporal = self.ruta_journal + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                for t in self.trabajos.values():
+                    f.write(json.dumps({"evento": "creado", "job_id": t["job_id"], "usuario_id": t["usuario_id"],
+                                        "ts": t["creado_en"]}) + "\n")
+                    for tabla, n in t["borradas"].items():
+                        f.write(json.dumps({"evento": "progreso", "job_id": t["job_id"], "tabla": tabla,
+                                            "borradas": n, "ts": t["actualizado_en"]}) + "\n")
+                    if t["estado"] in (COMPLETADO, FALLIDO):
+                        f.write(json.dumps({"evento": t["estado"], "job_id": t["job_id"],
+                                            "detalle": t.get("detalle"), "ts": t["actualizado_en"]}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta_journal)
+            self._leido = os.path.getsize(self.ruta_journal)
+        self._compactado = time.monotonic()
+
+    def _reproducir_journal(self) -> None:
+        """Reconstruye el estado de los trabajos desde cero y compacta el journal."""
+        self.trabajos, self._leido = {}, 0
+        self._compactar()
+
+    def _leer_nuevos(self) -> None:
+        """Incorpora los trabajos que otros workers anotaron desde la última lectura."""
+        with self._journal_bloqueado():
+            self._leido = self._leer(self.trabajos, self._leido)
+        for trabajo in list(self.trabajos.values()):
+            if trabajo["estado"] == PENDIENTE and not trabajo.get("encolado"):
+                trabajo["encolado"] = True
+                self._cola.put(trabajo["job_id"])
+
+    # ---------- API ----------
+    def iniciar(self) -> None:
+        """Arranca el hilo que intenta ser el ejecutor de las purgas."""
+        if self._hilo is not None:
+            return
+        os.makedirs(os.path.dirname(self.ruta_journal) or ".", exist_ok=True)
+        self._hilo = threading.Thread(target=self._bucle, name="purga-usuarios", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, usuario_id: str) -> dict:
+        """Registra un trabajo de purga (o devuelve el activo para ese usuario)."""
+        self.iniciar()
+        with self._journal_bloqueado():
+            trabajos: Dict[str, dict] = {}
+            self._leer(trabajos)
+            for trabajo in trabajos.values():
+                if trabajo["usuario_id"] == usuario_id and trabajo["estado"] in (PENDIENTE, EN_CURSO):
+                    return trabajo
+            trabajo = {"job_id": uuid.uuid4().hex, "usuario_id": usuario_id, "estado": PENDIENTE, "borradas": {}}
+            self._escribir({"evento": "creado", "job_id": trabajo["job_id"], "usuario_id": usuario_id})
+        trabajo["creado_en"] = trabajo["actualizado_en"] = datetime.utcnow().isoformat()
+        return trabajo
+
+    def estado(self, job_id: str) -> Optional[dict]:
+        if self.ejecutor and job_id in self.trabajos:
+            trabajo = self.trabajos[job_id]
+        else:
+            trabajos: Dict[str, dict] = {}
+            with self._journal_bloqueado():
+                self._leer(trabajos)
+            trabajo = trabajos.get(job_id)
+        return {k: v for k, v in trabajo.items() if k != "encolado"} if trabajo else None
+
+    # ---------- worker ----------
+    def _bucle(self) -> None:
+        with open(self.ruta_lock, "a") as lock:
+            while fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    time.sleep(settings.PURGE_POLL_SECONDS)
+            # El lock se conserva mientras viva el proceso
+            self._reproducir_journal()
+            self.ejecutor = True
+            for trabajo in self.trabajos.values():
+                if trabajo["estado"] not in (COMPLETADO, FALLIDO):
+                    trabajo["estado"] = PENDIENTE
+                    logger.info("Reanudando purga %s del usuario %s", trabajo["job_id"], trabajo["usuario_id"])
+            while True:
+                self._leer_nuevos()
+                if time.monotonic() - self._compactado >= settings.PURGE_COMPACT_SECONDS:
+                    self._compactar()
+                try:
+                    job_id = self._cola.get(timeout=settings.PURGE_POLL_SECONDS)
+                except queue.Empty:
+                    continue
+                self._procesar(self.trabajos[job_id])
+
+    def _procesar(self, trabajo: dict) -> None:
+        job_id = trabajo["job_id"]
+        trabajo["estado"] = EN_CURSO
+        self._anotar({"evento": EN_CURSO, "job_id": job_id})
+        try:
+            self._purgar(trabajo)
+            trabajo["estado"] = COMPLETADO
+            self._anotar({"evento": COMPLETADO, "job_id": job_id})
+            logger.info("Purga %s completada: %s", job_id, trabajo["borradas"])
+        except Exception as e:
+            trabajo["estado"] = FALLIDO
+            trabajo["detalle"] = str(e)
+            self._anotar({"evento": FALLIDO, "job_id": job_id, "detalle": str(e)})
+            logger.exception("Purga %s fallida", job_id)
+        trabajo["actualizado_en"] = datetime.utcnow().isoformat()
+
+    def _con_reintentos(self, funcion):
+        for intento in range(settings.PURGE_MAX_RETRIES):
+            try:
+                return funcion()
+            except Exception:
+                if intento == settings.PURGE_MAX_RETRIES - 1:
+                    raise
+                time.sleep(min(30, 2 ** intento))
+
+    def _purgar(self, trabajo: dict) -> None:
+        usuario_id = trabajo["usuario_id"]
+        for tabla in TABLAS_DEPENDIENTES:
+            while True:
+                ids = [f["id"] for f in self._con_reintentos(lambda: ejecutar(
+                    supabase.table(tabla).select("id").eq("usuario_id", usuario_id).limit(settings.PURGE_CHUNK_SIZE),
+                    idempotente=True,
+                ).data or [])]
+                if not ids:
+                    break
+                self._con_reintentos(lambda: ejecutar(supabase.table(tabla).delete().in_("id", ids)))
+                trabajo["borradas"][tabla] = trabajo["borradas"].get(tabla, 0) + len(ids)
+                trabajo["actualizado_en"] = datetime.utcnow().isoformat()
+                self._anotar({"evento": "progreso", "job_id": trabajo["job_id"], "tabla": tabla,
+                              "borradas": trabajo["borradas"][tabla]})
+                time.sleep(settings.PURGE_THROTTLE_SECONDS)
+
+        eliminar_archivo_usuario(usuario_id)
+        eliminados = self._con_reintentos(
+            lambda: ejecutar(supabase.table("usuarios").delete().eq("id", usuario_id)).data or []
+        )
+        buscador.invalidar(usuario_id)
+        ledger.invalidar(usuario_id)
+        bus.publicar(MOVIMIENTOS, usuario_id)
+        indice_planes_ahorro.invalidar(usuario_id)
+        indice_plan_gestion.invalidar(usuario_id)
+        for eliminado in eliminados:
+            if eliminado.get("correo"):
+                indice_correos.eliminar(eliminado["correo"])
+                usuario_modificado(eliminado["correo"])
+
+
+purgas = GestorPurgas(settings.PURGE_JOURNAL_PATH, settings.PURGE_LOCK_PATH)
@@ -0,0 +1,245 @@
+"""
+Movimientos recurrentes: reglas por usuario (alquiler, suscripciones,
+sueldo) que generan un gasto o ingreso en cada ocurrencia.
+
+Cada regla guarda `proxima_fecha`, la primera ocurrencia todavía no
+materializada. Una pasada del materializador:
+  1. recorre por páginas las reglas activas con proxima_fecha <= hoy;
+  2. por cada página arma en memoria todas las ocurrencias vencidas de
+     todas sus reglas (las de varios días o meses de caída incluidas, así
+     la recuperación se hace en una sola pasada) y las inserta en lotes de
+     RECURRING_BATCH_SIZE filas por tabla con
+     ON CONFLICT (regla_id, fecha) DO NOTHING;
+  3. adelanta proxima_fecha con un UPDATE por cada par (anterior, nueva),
+     condicionado a la anterior para no pisar una edición concurrente.
+El costo crece con la cantidad de lotes, no con usuarios × ocurrencias.
+Si la pasada se corta entre 2 y 3, la siguiente reintenta las mismas
+ocurrencias y el conflicto por (regla_id, fecha) las descarta.
+
+Las ocurrencias mensuales y anuales conservan el día de fecha_inicio y
+caen el último día en los meses más cortos (31 de enero -> 28 de febrero ->
+31 de marzo).
+"""
+import argparse
+import calendar
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+from src.core.cache import MOVIMIENTOS, bus
+from src.core.config import settings
+from src.core.metrics import registro
+from src.database.paginacion import recorrer
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+REGLAS_TABLE = "reglas_recurrentes"
+TIPOS = ("gastos", "ingresos")
+FRECUENCIAS = ("diaria", "semanal", "mensual", "anual")
+# Campos de la regla -> columnas de la tabla destino
+CAMPOS = {
+    "gastos": {"categoria": "categoria", "nombre": "nombre_gasto"},
+    "ingresos": {"categoria": "concepto", "nombre": "nombre_fuente"},
+}
+
+_ocurrencias = registro.contador("recurrentes_ocurrencias_total", "Movimientos creados por reglas recurrentes")
+_lotes = registro.contador("recurrentes_lotes_total", "Lotes enviados a Supabase por el materializador")
+_ejecuciones = registro.contador("recurrentes_ejecuciones_total", "Pasadas del materializador por resultado")
+
+
+def _fecha(valor) -> Optional[date]:
+    if valor is None or isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+# ---------- calendario ----------
+def ocurrencia(regla: dict, n: int) -> date:
+    """La n-ésima ocurrencia de la regla (la 0 es fecha_inicio)."""
+    inicio = _fecha(regla["fecha_inicio"])
+    paso = n * int(regla.get("intervalo") or 1)
+    frecuencia = regla["frecuencia"]
+    if frecuencia == "diaria":
+        return inicio + timedelta(days=paso)
+    if frecuencia == "semanal":
+        return inicio + timedelta(weeks=paso)
+    meses = paso * 12 if frecuencia == "anual" else paso
+    anio, mes = divmod(inicio.month - 1 + meses, 12)
+    anio += inicio.year
+    return date(anio, mes + 1, min(inicio.day, calendar.monthrange(anio, mes + 1)[1]))
+
+
+def primera_desde(regla: dict, desde: date) -> Optional[date]:
+    """Primera ocurrencia en o después de `desde`, o None si la regla ya terminó."""
+    inicio = _fecha(regla["fecha_inicio"])
+    n = 0
+    if desde > inicio:
+        intervalo = int(regla.get("intervalo") or 1)
+        frecuencia = regla["frecuencia"]
+        if frecuencia in ("diaria", "semanal"):
+            dias = intervalo * (7 if frecuencia == "semanal" else 1)
+            n = -(-(desde - inicio).days // dias)
+        else:
+            meses = (desde.year - inicio.year) * 12 + desde.month - inicio.month
+            n = max(0, meses // (intervalo * (12 if frecuencia == "anual" else 1)) - 1)
+            while ocurrencia(regla, n) < desde:
+                n += 1
+    fecha = ocurrencia(regla, n)
+    fin = _fecha(regla.get("fecha_fin"))
+    return None if fin and fecha > fin else fecha
+
+
+def vencidas(regla: dict, hoy: date) -> List[date]:
+    """Ocurrencias sin materializar con fecha <= hoy."""
+    fechas = []
+    fecha = _fecha(regla.get("proxima_fecha"))
+    while fecha is not None and fecha <= hoy:
+        fechas.append(fecha)
+        fecha = primera_desde(regla, fecha + timedelta(days=1))
+    return fechas
+
+
+def _movimiento(regla: dict, fecha: date) -> dict:
+    campos = CAMPOS[regla["tipo"]]
+    return {
+        "usuario_id": regla["usuario_id"],
+        "regla_id": regla["id"],
+        campos["categoria"]: regla["categoria"],
+        campos["nombre"]: regla["nombre"],
+        "monto": regla["monto"],
+        "fecha": fecha.isoformat(),
+        "descripcion": regla.get("descripcion"),
+    }
+
+
+def _en_lotes(filas: List[dict]) -> Iterable[List[dict]]:
+    for i in range(0, len(filas), settings.RECURRING_BATCH_SIZE):
+        yield filas[i:i + settings.RECURRING_BATCH_SIZE]
+
+
+# ---------- materialización ----------
+def materializar(reglas: List[dict], hoy: Optional[date] = None) -> Dict[str, int]:
+    """
+    Inserta las ocurrencias vencidas de `reglas` y adelanta su proxima_fecha
+    (también en los dicts recibidos). Devuelve cuántos movimientos nuevos
+    quedaron por tabla.
+    """
+    hoy = hoy or date.today()
+    filas: Dict[str, List[dict]] = {t: [] for t in TIPOS}
+    avances: Dict[tuple, List] = defaultdict(list)
+    usuarios = set()
+    for regla in reglas:
+        if not regla.get("activa", True) or regla.get("tipo") not in TIPOS:
+            continue
+        fechas = vencidas(regla, hoy)
+        if not fechas:
+            continue
+        filas[regla["tipo"]].extend(_movimiento(regla, f) for f in fechas)
+        nueva = primera_desde(regla, fechas[-1] + timedelta(days=1))
+        avances[(str(regla["proxima_fecha"])[:10], nueva.isoformat() if nueva else None)].append(regla["id"])
+        regla["proxima_fecha"] = nueva.isoformat() if nueva else None
+        usuarios.add(regla["usuario_id"])
+
+    creadas = {t: 0 for t in TIPOS}
+    for tabla, pendientes in filas.items():
+        for lote in _en_lotes(pendientes):
+            # Las escrituras no se duplican por hedging: la copia ganadora contaría 0 filas nuevas
+            respuesta = ejecutar(
+                supabase.table(tabla).upsert(lote, on_conflict="regla_id,fecha", ignore_duplicates=True)
+            )
+            _lotes.inc(tabla=tabla)
+            creadas[tabla] += len(respuesta.data or [])
+        _ocurrencias.inc(creadas[tabla], tabla=tabla)
+
+    # Las ocurrencias ya están guardadas: recién ahora se adelanta cada regla
+    for (anterior, nueva), ids in avances.items():
+        for i in range(0, len(ids), settings.RECURRING_BATCH_SIZE):
+            ejecutar(supabase.table(REGLAS_TABLE).update({"proxima_fecha": nueva})
+                     .in_("id", ids[i:i + settings.RECURRING_BATCH_SIZE]).eq("proxima_fecha", anterior))
+            _lotes.inc(tabla=REGLAS_TABLE)
+
+    for usuario_id in usuarios:
+        bus.publicar(MOVIMIENTOS, usuario_id)
+    return creadas
+
+
+def materializar_pendientes(hoy: Optional[date] = None) -> Dict[str, int]:
+    """Una pasada sobre todas las reglas con ocurrencias vencidas."""
+    hoy = hoy or date.today()
+
+    def construir():
+        return supabase.table(REGLAS_TABLE).select("*").eq("activa", True).lte("proxima_fecha", hoy.isoformat())
+
+    totales = {t: 0 for t in TIPOS}
+    filas = recorrer(construir, settings.RECURRING_PAGE_SIZE)
+    while True:
+        pagina = list(islice(filas, settings.RECURRING_PAGE_SIZE))
+        if not pagina:
+            return totales
+        for tabla, n in materializar(pagina, hoy).items():
+            totales[tabla] += n
+
+
+# ---------- ejecución periódica ----------
+class GestorRecurrentes:
+    """
+    Hilo que materializa al arrancar (recupera lo vencido mientras la app
+    estuvo caída) y luego cada RECURRING_INTERVAL_MINUTES. Con varios
+    workers en el host solo corre el que obtiene el lock de
+    RECURRING_LOCK_PATH; la unicidad (regla_id, fecha) cubre el resto.
+    """
+
+    def __init__(self):
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if self._hilo is not None:
+            return
+        self._hilo = threading.Thread(target=self._bucle, name="movimientos-recurrentes", daemon=True)
+        self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            self.ejecutar()
+            time.sleep(settings.RECURRING_INTERVAL_MINUTES * 60)
+
+    def ejecutar(self) -> Optional[Dict[str, int]]:
+        with open(settings.RECURRING_LOCK_PATH, "a") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    _ejecuciones.inc(resultado="omitida")
+                    return None
+            try:
+                creadas = materializar_pendientes()
+                _ejecuciones.inc(resultado="completada")
+                if any(creadas.values()):
+                    logger.info("Movimientos recurrentes materializados: %s", creadas)
+                return creadas
+            except Exception:
+                _ejecuciones.inc(resultado="fallida")
+                logger.exception("Materialización de movimientos recurrentes fallida")
+                return None
+
+
+recurrentes = GestorRecurrentes()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materializa las ocurrencias vencidas de las reglas recurrentes")
+    parser.add_argument("--hoy", type=date.fromisoformat, help="fecha de corte (YYYY-MM-DD); por defecto hoy")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(materializar_pendientes(args.hoy))
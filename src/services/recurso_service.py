@@ -0,0 +1,196 @@
+"""
+Capa de servicio común para los recursos del usuario: gastos, ingresos,
+planes de ahorro y planes de gestión.
+
+Cada recurso se describe con un `Recurso` (tabla, orden del listado, nombre
+para los mensajes y hooks de escritura) y un `ServicioRecurso` hace todo el
+acceso a Supabase:
+  - toda consulta sale de `consulta()`, ya filtrada por usuario_id;
+  - proyección de columnas y paginación (limite/offset) opcionales; sin
+    límite el listado recorre la tabla por páginas con paginación por
+    llave, así nunca lo trunca el máximo de filas de PostgREST;
+  - los listados completos pasan por single-flight;
+  - los APIError de PostgREST se traducen a HTTPException (409, 400...) y
+    cada operación queda medida por recurso en /metrics;
+  - tras escribir se llaman los hooks del recurso (bus de caché, índices,
+    lápidas para /sync).
+"""
+import time
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from src.core.config import settings
+from src.core.metrics import registro
+from src.core.single_flight import single_flight
+from src.database.paginacion import recorrer
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+from src.services.movimientos_service import movimiento_eliminado, movimiento_escrito
+from src.services.plan_index_service import indice_plan_gestion, indice_planes_ahorro
+from src.services.sync_service import registrar_eliminacion
+
+_operaciones = registro.contador("recurso_operaciones_total", "Operaciones de la capa de servicio por recurso")
+_segundos = registro.contador("recurso_segundos_total", "Tiempo acumulado en Supabase por recurso y operación")
+_errores = registro.contador("recurso_errores_total", "Errores de PostgREST traducidos por recurso y estado HTTP")
+
+# Códigos de error de Postgres -> (estado HTTP, detalle)
+ERRORES_POSTGRES = {
+    "23505": (409, "Ya existe un registro con esos datos"),
+    "23503": (400, "El registro hace referencia a datos que no existen"),
+    "23502": (400, "Falta un campo obligatorio"),
+    "23514": (400, "Los datos no cumplen las restricciones"),
+    "22P02": (400, "Formato de dato inválido"),
+    "22007": (400, "Formato de fecha inválido"),
+    "22008": (400, "Fecha fuera de rango"),
+}
+
+
+def mapear_error(error: APIError) -> HTTPException:
+    status, detalle = ERRORES_POSTGRES.get(str(getattr(error, "code", "")), (500, "Error en la base de datos"))
+    return HTTPException(status_code=status, detail=detalle)
+
+
+def _serializable(datos: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.isoformat() if isinstance(v, date) else v for k, v in datos.items()}
+
+
+class Recurso:
+    def __init__(self, tabla: str, nombre: str, orden: Optional[str] = None, descendente: bool = False,
+                 al_escribir: Optional[Callable[[str, dict], None]] = None,
+                 al_eliminar: Optional[Callable[[str, Any], None]] = None,
+                 sin_crear: Optional[Tuple[int, str]] = None):
+        self.tabla = tabla
+        self.nombre = nombre  # para los mensajes: "Gasto no encontrado"
+        self.orden = orden  # None: por id, recorriendo por páginas
+        self.descendente = descendente
+        self.al_escribir = al_escribir
+        self.al_eliminar = al_eliminar
+        # (estado HTTP, detalle) si el insert no devuelve la fila creada
+        self.sin_crear = sin_crear or (500, f"No se pudo crear el registro ({tabla})")
+
+
+class ServicioRecurso:
+    def __init__(self, recurso: Recurso):
+        self.recurso = recurso
+
+    def _ejecutar(self, operacion: str, query, idempotente: bool = False):
+        inicio = time.perf_counter()
+        try:
+            return ejecutar(query, idempotente=idempotente)
+        except APIError as e:
+            error = mapear_error(e)
+            _errores.inc(recurso=self.recurso.tabla, estado=str(error.status_code))
+            raise error from e
+        finally:
+            _operaciones.inc(recurso=self.recurso.tabla, operacion=operacion)
+            _segundos.inc(time.perf_counter() - inicio, recurso=self.recurso.tabla, operacion=operacion)
+
+    def _no_encontrado(self) -> HTTPException:
+        return HTTPException(status_code=404, detail=f"{self.recurso.nombre} no encontrado")
+
+    # ---------- constructor de consultas ----------
+    def consulta(self, usuario_id: str, columnas: str = "*"):
+        """Builder de select sobre la tabla, siempre acotado al usuario."""
+        return supabase.table(self.recurso.tabla).select(columnas).eq("usuario_id", usuario_id)
+
+    def _ordenar(self, query):
+        if self.recurso.orden:
+            return query.order(self.recurso.orden, desc=self.recurso.descendente)
+        return query.order("id")
+
+    # ---------- lectura ----------
+    def listar(self, usuario_id: str, limite: Optional[int] = None, offset: int = 0,
+               columnas: str = "*") -> List[dict]:
+        if limite is not None:
+            query = self._ordenar(self.consulta(usuario_id, columnas)).limit(limite).offset(offset)
+            return self._ejecutar("listar", query, idempotente=True).data or []
+
+        def todas():
+            if self.recurso.orden:
+                return self._ejecutar("listar", self._ordenar(self.consulta(usuario_id, columnas)),
+                                      idempotente=True).data or []
+            inicio = time.perf_counter()
+            try:
+                return list(recorrer(lambda: self.consulta(usuario_id, columnas), settings.RESOURCE_PAGE_SIZE))
+            except APIError as e:
+                raise mapear_error(e) from e
+            finally:
+                _operaciones.inc(recurso=self.recurso.tabla, operacion="listar")
+                _segundos.inc(time.perf_counter() - inicio, recurso=self.recurso.tabla, operacion="listar")
+
+        # Peticiones duplicadas (varios dispositivos, reintentos del frontend) comparten una sola consulta
+        return single_flight.ejecutar(f"listar_{self.recurso.tabla}", (usuario_id, columnas), todas)
+
+    def obtener(self, usuario_id: str, id_registro, columnas: str = "*") -> dict:
+        filas = self._ejecutar("obtener", self.consulta(usuario_id, columnas).eq("id", id_registro),
+                               idempotente=True).data
+        if not filas:
+            raise self._no_encontrado()
+        return filas[0]
+
+    # ---------- escritura ----------
+    def crear(self, usuario_id: str, datos: Dict[str, Any]) -> dict:
+        fila = {**_serializable(datos), "usuario_id": usuario_id}
+        creadas = self._ejecutar("crear", supabase.table(self.recurso.tabla).insert(fila)).data
+        if not creadas:
+            status, detalle = self.recurso.sin_crear
+            raise HTTPException(status_code=status, detail=detalle)
+        if self.recurso.al_escribir:
+            self.recurso.al_escribir(usuario_id, creadas[0])
+        return creadas[0]
+
+    def actualizar(self, usuario_id: str, id_registro, cambios: Dict[str, Any]) -> dict:
+        if not cambios:
+            raise HTTPException(status_code=400, detail="No hay datos para actualizar")
+        query = (supabase.table(self.recurso.tabla).update(_serializable(cambios))
+                 .eq("id", id_registro).eq("usuario_id", usuario_id))
+        filas = self._ejecutar("actualizar", query).data
+        if not filas:
+            raise self._no_encontrado()
+        if self.recurso.al_escribir:
+            self.recurso.al_escribir(usuario_id, filas[0])
+        return filas[0]
+
+    def eliminar(self, usuario_id: str, id_registro) -> dict:
+        query = supabase.table(self.recurso.tabla).delete().eq("id", id_registro).eq("usuario_id", usuario_id)
+        filas = self._ejecutar("eliminar", query).data
+        if not filas:
+            raise self._no_encontrado()
+        if self.recurso.al_eliminar:
+            self.recurso.al_eliminar(usuario_id, id_registro)
+        return filas[0]
+
+
+def _plan_eliminado(indice, tabla: str):
+    def al_eliminar(usuario_id: str, id_registro) -> None:
+        indice.invalidar(usuario_id)
+        registrar_eliminacion(usuario_id, tabla, id_registro)
+    return al_eliminar
+
+
+gastos = ServicioRecurso(Recurso(
+    "gastos", "Gasto",
+    al_escribir=lambda u, fila: movimiento_escrito(u, "gastos", fila),
+    al_eliminar=lambda u, id_registro: movimiento_eliminado(u, "gastos", id_registro),
+))
+ingresos = ServicioRecurso(Recurso(
+    "ingresos", "Ingreso",
+    al_escribir=lambda u, fila: movimiento_escrito(u, "ingresos", fila),
+    al_eliminar=lambda u, id_registro: movimiento_eliminado(u, "ingresos", id_registro),
+))
+planes_ahorro = ServicioRecurso(Recurso(
+    "planes_ahorro", "Plan de ahorro", orden="creado_en", descendente=True,
+    al_escribir=lambda u, fila: indice_planes_ahorro.invalidar(u),
+    al_eliminar=_plan_eliminado(indice_planes_ahorro, "planes_ahorro"),
+    sin_crear=(500, "Error al crear el plan de ahorro en la base de datos"),
+))
+planes_gestion = ServicioRecurso(Recurso(
+    "plan_gestion", "Plan de gestión", orden="fecha_inicio",
+    al_escribir=lambda u, fila: indice_plan_gestion.invalidar(u),
+    al_eliminar=_plan_eliminado(indice_plan_gestion, "plan_gestion"),
+    sin_crear=(400, "No se pudo crear el plan de gestión."),
+))
+reglas_recurrentes = ServicioRecurso(Recurso("reglas_recurrentes", "Regla recurrente", orden="creado_en"))
@@ -1,11 +1,28 @@
+import logging
 from datetime import date
+from postgrest.exceptions import APIError
+from src.core.config import settings
+from src.core.money import a_monto, sumar_centavos
 from src.database.supabase_client import supabase
+from src.database.resilience import ejecutar
+from src.core.single_flight import single_flight
+from src.services.ledger_service import ledger
+from src.services.archive_service import total_archivado
+
+logger = logging.getLogger(__name__)
 
 INGRESOS_TABLE = "ingresos"
 GASTOS_TABLE = "gastos"
 
-def suma_ingresos(usuario_id: str, inicio: date, fin: date) -> float:
-    """Suma todos los ingresos del usuario en el rango de fechas."""
+# Código de Postgres para columna inexistente
+UNDEFINED_COLUMN = "42703"
+
+# False cuando la base no tiene `actualizado_en` (migración 002 pendiente):
+# se detecta en el primer intento y el proceso deja de probar el snapshot
+_snapshot_disponible = True
+
+def suma_ingresos(usuario_id: str, inicio: date, fin: date) -> int:
+    """Suma, en centavos, todos los ingresos del usuario en el rango de fechas."""
     query = (
         supabase.table(INGRESOS_TABLE)
         .select("monto, fecha")
@@ -13,11 +30,11 @@ def suma_ingresos(usuario_id: str, inicio: date, fin: date) -> float:
         .gte("fecha", str(inicio))
         .lte("fecha", str(fin))
     )
-    data = query.execute().data or []
-    return float(sum(item.get("monto", 0) for item in data))
+    data = ejecutar(query, idempotente=True).data or []
+    return sumar_centavos(item.get("monto") for item in data)
 
-def suma_gastos(usuario_id: str, inicio: date, fin: date) -> float:
-    """Suma todos los gastos del usuario en el rango de fechas."""
+def suma_gastos(usuario_id: str, inicio: date, fin: date) -> int:
+    """Suma, en centavos, todos los gastos del usuario en el rango de fechas."""
     query = (
         supabase.table(GASTOS_TABLE)
         .select("monto, fecha")
@@ -25,23 +42,55 @@ def suma_gastos(usuario_id: str, inicio: date, fin: date) -> float:
         .gte("fecha", str(inicio))
         .lte("fecha", str(fin))
     )
-    data = query.execute().data or []
-    return float(sum(item.get("monto", 0) for item in data))
+    data = ejecutar(query, idempotente=True).data or []
+    return sumar_centavos(item.get("monto") for item in data)
 
 def calcular_reporte_rango(usuario_id: str, inicio: date, fin: date) -> dict:
     """
     Calcula los totales de ingresos, gastos, ahorro y balance
-    en el rango de fechas dado.
+    en el rango de fechas dado. Las llamadas idénticas concurrentes
+    comparten un único cálculo.
     """
-    total_ingresos = suma_ingresos(usuario_id, inicio, fin)
-    total_gastos = suma_gastos(usuario_id, inicio, fin)
-    total_ahorro = max(0, total_ingresos - total_gastos)
+    return single_flight.ejecutar(
+        "calcular_reporte_rango",
+        (usuario_id, inicio, fin),
+        lambda: _calcular_reporte_rango(usuario_id, inicio, fin),
+    )
+
+def _totales_desde_snapshot(usuario_id: str, inicio: date, fin: date):
+    """(ingresos, gastos) en centavos desde el snapshot columnar, o None si no está disponible."""
+    global _snapshot_disponible
+    if not settings.LEDGER_SNAPSHOT_ENABLED or not _snapshot_disponible:
+        return None
+    try:
+        snapshot = ledger.obtener(usuario_id)
+    except APIError as e:
+        # Los errores de la petición llegan intactos desde `ejecutar` (no pasan por el breaker)
+        if e.code == UNDEFINED_COLUMN:
+            _snapshot_disponible = False
+            logger.warning("Falta la columna actualizado_en (migración 002); los reportes usan consultas directas")
+        else:
+            logger.exception("No se pudo cargar el snapshot del ledger; se usan consultas directas")
+        return None
+    return snapshot.total("ingresos", inicio, fin), snapshot.total("gastos", inicio, fin)
+
+def _calcular_reporte_rango(usuario_id: str, inicio: date, fin: date) -> dict:
+    # Todo en centavos enteros: las sumas son exactas y no hace falta redondear
+    totales = _totales_desde_snapshot(usuario_id, inicio, fin)
+    if totales is not None:
+        total_ingresos, total_gastos = totales
+    else:
+        total_ingresos = suma_ingresos(usuario_id, inicio, fin)
+        total_gastos = suma_gastos(usuario_id, inicio, fin)
+    # Los meses archivados ya no están en las tablas: se suman desde sus resúmenes
+    total_ingresos += total_archivado(usuario_id, INGRESOS_TABLE, inicio, fin)
+    total_gastos += total_archivado(usuario_id, GASTOS_TABLE, inicio, fin)
     balance = total_ingresos - total_gastos
 
     return {
         "periodo": {"inicio": str(inicio), "fin": str(fin)},
-        "total_ingresos": round(total_ingresos, 2),
-        "total_gastos": round(total_gastos, 2),
-        "total_ahorro": round(total_ahorro, 2),
-        "balance": round(balance, 2),
+        "total_ingresos": a_monto(total_ingresos),
+        "total_gastos": a_monto(total_gastos),
+        "total_ahorro": a_monto(max(0, balance)),
+        "balance": a_monto(balance),
     }
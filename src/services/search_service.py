@@ -0,0 +1,225 @@
+"""
+Búsqueda de texto sobre los gastos e ingresos de un usuario.
+
+Cada usuario tiene un índice invertido en memoria (token -> movimientos) que
+se construye la primera vez que busca y se mantiene al día con los hooks de
+las rutas de escritura. Los tokens se normalizan sin tildes y en minúsculas
+y se guardan también ordenados, de modo que "farm" encuentra "Farmacia" con
+una búsqueda binaria por prefijo. Los índices se desalojan por LRU cuando el
+tamaño estimado de todos supera SEARCH_INDEX_MAX_BYTES. Cada índice guarda
+la versión de ("movimientos", usuario) del bus de caché con la que quedó al
+día: si otro worker escribe, la versión cambia y el índice se reconstruye.
+SEARCH_INDEX_TTL_SECONDS queda como red de seguridad.
+"""
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.core.cache import MOVIMIENTOS, bus
+from src.core.config import settings
+from src.core.metrics import registro
+from src.database.paginacion import recorrer
+from src.database.supabase_client import supabase
+
+# Campos de texto indexados por tipo de movimiento
+CAMPOS = {
+    "gastos": ("nombre_gasto", "descripcion", "categoria"),
+    "ingresos": ("nombre_fuente", "descripcion", "concepto"),
+}
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _columnas(tipo: str) -> Tuple[str, ...]:
+    return ("id", "monto", "fecha") + CAMPOS[tipo]
+
+
+_aciertos = registro.contador("busqueda_indice_aciertos_total", "Búsquedas resueltas con un índice ya cargado")
+_construcciones = registro.contador("busqueda_indice_construcciones_total", "Índices de búsqueda construidos desde Supabase")
+_desalojos = registro.contador("busqueda_indice_desalojos_total", "Índices de búsqueda desalojados por el límite de memoria")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes ni diéresis ("Café Ñandú" -> "cafe nandu")."""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto: Optional[str]) -> Set[str]:
+    if not texto:
+        return set()
+    return set(_TOKEN.findall(normalizar(str(texto))))
+
+
+class IndiceUsuario:
+    """Índice invertido de los movimientos de un usuario; las claves son (tipo, id)."""
+
+    def __init__(self):
+        self.documentos: Dict[Tuple[str, str], dict] = {}
+        self.tokens_doc: Dict[Tuple[str, str], Set[str]] = {}
+        self.postings: Dict[str, Set[Tuple[str, str]]] = {}
+        self._ordenados: Optional[List[str]] = None
+        self.bytes = 0
+        self.creado = time.monotonic()
+        self.version = 0  # versión del bus con la que el índice está al día
+
+    @staticmethod
+    def _peso(fila: dict, tokens: Set[str]) -> int:
+        # Estimación gruesa: fila + entradas en los postings; basta para repartir el presupuesto
+        return 200 + sum(len(str(v)) for v in fila.values() if v is not None) + 80 * len(tokens)
+
+    def agregar(self, tipo: str, fila: dict) -> None:
+        clave = (tipo, str(fila["id"]))
+        self.quitar(tipo, clave[1])
+        tokens = set()
+        for campo in CAMPOS[tipo]:
+            tokens |= tokenizar(fila.get(campo))
+        self.documentos[clave] = fila
+        self.tokens_doc[clave] = tokens
+        for token in tokens:
+            if token not in self.postings:
+                self.postings[token] = set()
+                self._ordenados = None
+            self.postings[token].add(clave)
+        self.bytes += self._peso(fila, tokens)
+
+    def quitar(self, tipo: str, doc_id: str) -> None:
+        clave = (tipo, str(doc_id))
+        fila = self.documentos.pop(clave, None)
+        if fila is None:
+            return
+        tokens = self.tokens_doc.pop(clave)
+        for token in tokens:
+            claves = self.postings[token]
+            claves.discard(clave)
+            if not claves:
+                del self.postings[token]
+                self._ordenados = None
+        self.bytes -= self._peso(fila, tokens)
+
+    def _con_prefijo(self, prefijo: str) -> Set[Tuple[str, str]]:
+        if self._ordenados is None:
+            self._ordenados = sorted(self.postings)
+        encontrados: Set[Tuple[str, str]] = set()
+        i = bisect.bisect_left(self._ordenados, prefijo)
+        while i < len(self._ordenados) and self._ordenados[i].startswith(prefijo):
+            encontrados |= self.postings[self._ordenados[i]]
+            i += 1
+        return encontrados
+
+    def buscar(self, terminos: Iterable[str], tipos: Iterable[str]) -> List[Tuple[str, dict]]:
+        """Movimientos que contienen todos los términos (cada uno como prefijo de alguna palabra)."""
+        resultado: Optional[Set[Tuple[str, str]]] = None
+        # Empezar por los términos más largos suele dar los conjuntos más pequeños
+        for termino in sorted(terminos, key=len, reverse=True):
+            claves = self._con_prefijo(termino)
+            resultado = claves if resultado is None else resultado & claves
+            if not resultado:
+                return []
+        tipos = set(tipos)
+        return [(tipo, self.documentos[(tipo, i)]) for tipo, i in (resultado or ()) if tipo in tipos]
+
+
+class BuscadorMovimientos:
+    def __init__(self):
+        self._indices: "OrderedDict[str, IndiceUsuario]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        registro.medidor("busqueda_indice_bytes", "Tamaño estimado de los índices de búsqueda", lambda: {(): self._bytes})
+        registro.medidor("busqueda_indice_usuarios", "Usuarios con índice de búsqueda cargado", lambda: {(): len(self._indices)})
+
+    def _cargar(self, usuario_id: str) -> IndiceUsuario:
+        indice = IndiceUsuario()
+        for tipo in CAMPOS:
+            def construir(tipo=tipo):
+                return supabase.table(tipo).select(",".join(_columnas(tipo))).eq("usuario_id", usuario_id)
+
+            for fila in recorrer(construir, settings.SEARCH_PAGE_SIZE):
+                indice.agregar(tipo, fila)
+        return indice
+
+    def _desalojar(self) -> None:
+        while self._bytes > settings.SEARCH_INDEX_MAX_BYTES and len(self._indices) > 1:
+            _, indice = self._indices.popitem(last=False)
+            self._bytes -= indice.bytes
+            _desalojos.inc()
+
+    def _indice(self, usuario_id: str) -> IndiceUsuario:
+        version = bus.version(MOVIMIENTOS, usuario_id)
+        with self._lock:
+            indice = self._indices.get(usuario_id)
+            if (indice is not None and indice.version == version
+                    and time.monotonic() - indice.creado < settings.SEARCH_INDEX_TTL_SECONDS):
+                self._indices.move_to_end(usuario_id)
+                _aciertos.inc()
+                return indice
+        _construcciones.inc()
+        indice = self._cargar(usuario_id)
+        # Versión leída antes de cargar: si hubo escrituras durante la carga se reconstruye en la próxima
+        indice.version = version
+        with self._lock:
+            anterior = self._indices.pop(usuario_id, None)
+            if anterior is not None:
+                self._bytes -= anterior.bytes
+            self._indices[usuario_id] = indice
+            self._bytes += indice.bytes
+            self._desalojar()
+        return indice
+
+    def buscar(self, usuario_id: str, texto: str, tipos: Iterable[str] = tuple(CAMPOS), limite: int = 50) -> List[dict]:
+        """Movimientos del usuario que coinciden con `texto`, del más reciente al más antiguo."""
+        terminos = tokenizar(texto)
+        if not terminos:
+            return []
+        indice = self._indice(usuario_id)
+        with self._lock:
+            encontrados = indice.buscar(terminos, tipos)
+        encontrados.sort(key=lambda par: str(par[1].get("fecha") or ""), reverse=True)
+        return [{"tipo": tipo, **fila} for tipo, fila in encontrados[:limite]]
+
+    # ---------- hooks de escritura ----------
+    def _vigente(self, usuario_id: str, version: int) -> Optional[IndiceUsuario]:
+        """
+        Índice cargado que estaba al día justo antes de la escritura que
+        publicó `version`; queda al día con ella tras aplicar el cambio.
+        Si se perdió otra escritura no se toca y se reconstruirá.
+        """
+        indice = self._indices.get(usuario_id)
+        if indice is None or indice.version != version - 1:
+            return None
+        indice.version = version
+        return indice
+
+    def registrar(self, usuario_id: str, tipo: str, fila: dict, version: int) -> None:
+        """Agrega o reemplaza un movimiento recién escrito, si el usuario tiene índice cargado."""
+        with self._lock:
+            indice = self._vigente(usuario_id, version)
+            if indice is None:
+                return
+            self._bytes -= indice.bytes
+            indice.agregar(tipo, {c: fila.get(c) for c in _columnas(tipo)})
+            self._bytes += indice.bytes
+            self._desalojar()
+
+    def quitar(self, usuario_id: str, tipo: str, doc_id: str, version: int) -> None:
+        with self._lock:
+            indice = self._vigente(usuario_id, version)
+            if indice is None:
+                return
+            self._bytes -= indice.bytes
+            indice.quitar(tipo, doc_id)
+            self._bytes += indice.bytes
+
+    def invalidar(self, usuario_id: str) -> None:
+        """Descarta el índice local (los demás workers se invalidan por el bus)."""
+        with self._lock:
+            indice = self._indices.pop(usuario_id, None)
+            if indice is not None:
+                self._bytes -= indice.bytes
+
+
+buscador = BuscadorMovimientos()
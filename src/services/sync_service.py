@@ -0,0 +1,143 @@
+"""
+Sincronización incremental para clientes: "qué cambió desde mi cursor".
+
+Cada tabla sincronizable tiene `actualizado_en` (DEFAULT y trigger en
+sql/002 y sql/003) y los borrados dejan una lápida en `eliminaciones`. El
+cursor es opaco para el cliente (JSON en base64) y guarda, por tabla, un
+watermark (la marca más reciente entregada, acotada al momento de la
+lectura menos SYNC_OVERLAP_SECONDS: una fila que confirma tarde con una
+marca anterior se vuelve a pedir), los ids entregados después del
+watermark (para no reenviarlos) y el id de la última lápida vista. Sin
+cursor, o con uno más viejo que la retención de lápidas, se responde con
+todas las filas y `completo: true` para que el cliente reemplace su copia.
+"""
+import base64
+import binascii
+import json
+import logging
+import time
+from typing import Dict, List, Optional
+
+from src.core.config import settings
+from src.database.paginacion import desde_marca, marca_segura, mas_reciente, posterior, recorrer
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+TABLAS_SYNC = ("gastos", "ingresos", "planes_ahorro", "plan_gestion")
+ELIMINACIONES_TABLE = "eliminaciones"
+VERSION_CURSOR = 1
+# Tope de ids recordados por tabla dentro del margen; si se supera solo se
+# reenvían algunas filas durante unos segundos, nunca se pierden cambios
+MAX_RECORDADOS = 100
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+# ---------- lápidas ----------
+def registrar_eliminacion(usuario_id: str, tabla: str, registro_id) -> None:
+    """
+    Anota el borrado para los clientes que sincronizan. El borrado ya está
+    hecho: si la lápida falla solo se registra el error y el cliente lo
+    verá en su próxima sincronización completa.
+    """
+    try:
+        ejecutar(supabase.table(ELIMINACIONES_TABLE).insert(
+            {"usuario_id": usuario_id, "tabla": tabla, "registro_id": str(registro_id)}
+        ))
+    except Exception:
+        logger.exception("No se pudo registrar la eliminación de %s/%s", tabla, registro_id)
+
+
+def eliminaciones_desde(usuario_id: str, ultimo_id: int, tablas=TABLAS_SYNC) -> List[dict]:
+    """Lápidas del usuario con id mayor que `ultimo_id`, en orden."""
+    def construir():
+        return (supabase.table(ELIMINACIONES_TABLE).select("id, tabla, registro_id, creado_en")
+                .eq("usuario_id", usuario_id).in_("tabla", list(tablas)).gt("id", ultimo_id))
+
+    return list(recorrer(construir, settings.SYNC_PAGE_SIZE))
+
+
+def ultima_eliminacion(usuario_id: str) -> int:
+    filas = ejecutar(
+        supabase.table(ELIMINACIONES_TABLE).select("id").eq("usuario_id", usuario_id).order("id", desc=True).limit(1),
+        idempotente=True,
+    ).data or []
+    return int(filas[0]["id"]) if filas else 0
+
+
+# ---------- cursor ----------
+def codificar_cursor(datos: dict) -> str:
+    crudo = json.dumps(datos, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, usuario_id: str) -> dict:
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError) as e:
+        raise CursorInvalido("Cursor inválido") from e
+    if not isinstance(datos, dict) or datos.get("v") != VERSION_CURSOR or datos.get("u") != usuario_id:
+        raise CursorInvalido("Cursor inválido")
+    return datos
+
+
+# ---------- sincronización ----------
+def _cambios_tabla(tabla: str, usuario_id: str, marca: Optional[str], entregados: Dict[str, str]):
+    """Filas nuevas o modificadas de `tabla` y el estado del cursor para ella."""
+    def construir():
+        query = supabase.table(tabla).select("*").eq("usuario_id", usuario_id)
+        return desde_marca(query, marca) if marca else query
+
+    lectura = time.time()
+    filas, maxima = [], marca
+    for fila in recorrer(construir, settings.SYNC_PAGE_SIZE):
+        actualizado = fila.get("actualizado_en")
+        maxima = mas_reciente(maxima, str(actualizado) if actualizado else None)
+        # Las filas posteriores a la marca ya entregadas con la misma versión no se reenvían
+        if entregados.get(str(fila["id"])) == str(actualizado):
+            continue
+        filas.append(fila)
+
+    nueva_marca = marca_segura(maxima, lectura, settings.SYNC_OVERLAP_SECONDS)
+    # El próximo pedido volverá a ver las entregas posteriores a la nueva marca
+    recientes = dict(entregados)
+    recientes.update({str(f["id"]): str(f["actualizado_en"]) for f in filas if f.get("actualizado_en")})
+    recientes = {i: m for i, m in recientes.items() if posterior(m, nueva_marca)}
+    if len(recientes) > MAX_RECORDADOS:
+        recientes = {}
+    return filas, nueva_marca, recientes
+
+
+def sincronizar(usuario_id: str, cursor: Optional[str]) -> dict:
+    datos = decodificar_cursor(cursor, usuario_id) if cursor else None
+    if datos and time.time() - datos.get("ts", 0) > settings.SYNC_TOMBSTONE_RETENTION_DAYS * 86400:
+        datos = None  # las lápidas de ese periodo pueden haberse purgado
+    completo = datos is None
+
+    if completo:
+        # La marca de lápidas se toma antes de leer las filas: un borrado
+        # concurrente se verá como lápida en la siguiente sincronización
+        ultimo_id = ultima_eliminacion(usuario_id)
+        eliminados = []
+    else:
+        eliminaciones = eliminaciones_desde(usuario_id, int(datos.get("e", 0)))
+        ultimo_id = int(eliminaciones[-1]["id"]) if eliminaciones else int(datos.get("e", 0))
+        eliminados = [{"tabla": e["tabla"], "id": e["registro_id"], "eliminado_en": e.get("creado_en")}
+                      for e in eliminaciones]
+
+    cambios, marcas, recientes = {}, {}, {}
+    for tabla in TABLAS_SYNC:
+        marca = None if completo else datos.get("t", {}).get(tabla)
+        entregados = {} if completo else datos.get("r", {}).get(tabla, {})
+        cambios[tabla], marcas[tabla], recientes[tabla] = _cambios_tabla(tabla, usuario_id, marca, entregados)
+
+    nuevo_cursor = codificar_cursor({
+        "v": VERSION_CURSOR, "u": usuario_id, "ts": int(time.time()), "e": ultimo_id,
+        "t": {t: m for t, m in marcas.items() if m}, "r": {t: r for t, r in recientes.items() if r},
+    })
+    return {"completo": completo, "cambios": cambios, "eliminados": eliminados, "cursor": nuevo_cursor}
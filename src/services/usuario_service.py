@@ -0,0 +1,46 @@
+"""
+Resolución correo -> id de usuario con caché L1.
+
+Las rutas que reciben el correo en el token resolvían el id con una
+consulta a `usuarios` en cada petición. El id de un correo casi nunca
+cambia: se guarda en la caché del worker y se invalida por el bus cuando
+el usuario cambia de correo o se elimina (ver src/core/cache.py).
+"""
+from typing import Optional
+
+from src.core.cache import USUARIO, CacheL1, bus
+from src.core.config import settings
+from src.database.resilience import ejecutar
+from src.database.supabase_client import supabase
+
+_ids = CacheL1("usuario_id", settings.USER_ID_CACHE_MAX_ENTRIES, settings.USER_ID_CACHE_TTL_SECONDS)
+
+
+def _consultar_id(correo: str) -> Optional[str]:
+    filas = ejecutar(supabase.table("usuarios").select("id").eq("correo", correo), idempotente=True).data
+    return filas[0]["id"] if filas else None
+
+
+def id_por_correo(correo: str) -> Optional[str]:
+    """Id del usuario con ese correo, o None si no existe (los ausentes no se cachean)."""
+    usuario_id = _ids.obtener(correo, lambda: _consultar_id(correo), [(USUARIO, correo)])
+    if usuario_id is None:
+        _ids.descartar(correo)
+    return usuario_id
+
+
+def usuario_modificado(*correos: str) -> None:
+    """Invalida en todos los workers la resolución de esos correos."""
+    for correo in correos:
+        if correo:
+            bus.publicar(USUARIO, correo)
+
+
+def id_de_sub(sub: Optional[str]) -> Optional[str]:
+    """
+    Id del usuario del token. El login emite el id en `sub`; los tokens
+    emitidos con el correo se resuelven por correo.
+    """
+    if not sub:
+        return None
+    return id_por_correo(sub) if "@" in sub else sub
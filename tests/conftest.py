@@ -0,0 +1,47 @@
+"""
+Configuración común de las pruebas.
+
+Las pruebas no hablan con Supabase: el cliente apunta al PostgREST falso de
+benchmarks/ (sin latencia) y la fixture `db` deja sus tablas vacías en
+cada prueba. Los archivos que la app escribe (journal de purgas, bus de
+caché, locks) van a un directorio temporal. Todo se fija antes de importar
+`src`, porque Settings lee el entorno al importarse.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_raiz = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_raiz))
+sys.path.insert(0, str(_raiz / "benchmarks"))
+
+from fake_postgrest import BaseDatosFalsa, iniciar_servidor  # noqa: E402
+
+_tmp = tempfile.mkdtemp(prefix="fintrack_pruebas_")
+_base = BaseDatosFalsa()
+_servidor = iniciar_servidor(0, 0, _base)
+
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{_servidor.server_address[1]}"
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoidGVzdCJ9.firma")
+os.environ.setdefault("SECRET_KEY", "clave-de-pruebas")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("CACHE_BUS_BACKEND", "memoria")
+os.environ.setdefault("PURGE_JOURNAL_PATH", os.path.join(_tmp, "purgas.jsonl"))
+os.environ.setdefault("PURGE_LOCK_PATH", os.path.join(_tmp, "purgas.lock"))
+os.environ.setdefault("RATE_LIMIT_SQLITE_PATH", os.path.join(_tmp, "rate_limit.db"))
+os.environ.setdefault("IDEMPOTENCY_SQLITE_PATH", os.path.join(_tmp, "idempotencia.db"))
+os.environ.setdefault("ARCHIVE_DIR", os.path.join(_tmp, "archivo"))
+os.environ.setdefault("ARCHIVE_LOCK_PATH", os.path.join(_tmp, "archivo.lock"))
+os.environ.setdefault("RECURRING_LOCK_PATH", os.path.join(_tmp, "recurrentes.lock"))
+os.environ.setdefault("PROFILER_DIR", os.path.join(_tmp, "profiles"))
+
+
+@pytest.fixture
+def db() -> BaseDatosFalsa:
+    """Base del PostgREST falso, vacía al empezar cada prueba."""
+    with _base.lock:
+        _base.tablas.clear()
+    return _base
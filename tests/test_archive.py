@@ -0,0 +1,186 @@
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.core import archive
+from src.core.archive import AlmacenLocal, ArchivoMovimientos, codificar
+from src.core.config import settings
+from src.services import archive_service, report_service
+from src.services.archive_service import archivar_usuario, leer_archivado, nombre_pendiente, total_archivado
+
+HOY = date(2025, 6, 15)  # corte: 2022-06-01
+
+
+def _marca(segundos_atras: float) -> str:
+    return (datetime.utcnow() - timedelta(seconds=segundos_atras)).isoformat()
+
+
+# ---------- formato de archivo ----------
+FILAS = [
+    {"id": "b", "fecha": "2022-03-31", "monto": 0.1, "categoria": "Ocio", "descripcion": None},
+    {"id": "a", "fecha": "2022-01-05", "monto": 1250.55, "categoria": "Salud", "descripcion": "Consulta"},
+    {"id": "c", "fecha": "2022-03-01", "monto": 0.2, "categoria": "Ocio", "descripcion": "ñandú"},
+    {"id": "d", "fecha": "2022-12-31", "monto": 99, "categoria": "Vivienda", "descripcion": None},
+]
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    ruta = tmp_path / "2022.fta"
+    ruta.write_bytes(codificar(FILAS))
+    return ArchivoMovimientos(str(ruta))
+
+
+def test_codificar_y_leer_ida_y_vuelta(archivo):
+    assert archivo.filas == 4
+    leidas = archivo.leer()
+    assert [f["id"] for f in leidas] == ["a", "c", "b", "d"]
+    assert sorted(leidas, key=lambda f: f["id"]) == sorted(FILAS, key=lambda f: f["id"])
+
+
+def test_leer_y_total_por_rango(archivo):
+    marzo = (date(2022, 3, 1), date(2022, 3, 31))
+    assert [f["id"] for f in archivo.leer(*marzo)] == ["c", "b"]
+    assert archivo.total_en_rango(*marzo) == 30
+    assert archivo.total_en_rango(date(2022, 1, 1), date(2022, 12, 31)) == 125055 + 30 + 9900
+    assert archivo.total_en_rango(date(2022, 4, 1), date(2022, 11, 30)) == 0
+    assert archivo.leer(date(2023, 1, 1), date(2023, 12, 31)) == []
+
+
+def test_archivo_vacio(tmp_path):
+    ruta = tmp_path / "vacio.fta"
+    ruta.write_bytes(codificar([]))
+    vacio = ArchivoMovimientos(str(ruta))
+    assert vacio.filas == 0 and vacio.cabecera["desde"] is None
+    assert vacio.total_en_rango(date(2022, 1, 1), date(2022, 12, 31)) == 0
+
+
+def test_archivo_que_no_es_de_movimientos(tmp_path):
+    ruta = tmp_path / "otro.fta"
+    ruta.write_bytes(b"nada que ver")
+    with pytest.raises(ValueError):
+        ArchivoMovimientos(str(ruta))
+
+
+# ---------- archivado ----------
+@pytest.fixture
+def almacen(tmp_path, monkeypatch):
+    local = AlmacenLocal(str(tmp_path / "archivo"))
+    monkeypatch.setattr(archive, "_almacen", local)
+    monkeypatch.setattr(archive, "_abiertos", OrderedDict())
+    monkeypatch.setattr(settings, "ARCHIVE_THROTTLE_SECONDS", 0)
+    monkeypatch.setattr(settings, "ARCHIVE_CHUNK_SIZE", 2)
+    return local
+
+
+@pytest.fixture
+def usuario(db, almacen):
+    usuario_id = str(uuid.uuid4())
+
+    def fila(id_, fecha, monto, **extra):
+        return {"id": id_, "usuario_id": usuario_id, "fecha": fecha, "monto": monto,
+                "descripcion": None, "actualizado_en": _marca(3600), **extra}
+
+    db.tablas["gastos"] = [
+        fila("g1", "2021-07-10", 10.1, categoria="Ocio"),
+        fila("g2", "2022-03-01", 20.2, categoria="Salud"),
+        fila("g3", "2022-03-20", 30.3, categoria="Salud"),
+        fila("g4", "2022-05-31", 0.01, categoria="Ocio"),
+        fila("g5", "2022-06-01", 5, categoria="Ocio"),  # desde el corte: no se archiva
+        fila("g6", "2024-01-01", 7, categoria="Ocio"),
+    ]
+    db.tablas["ingresos"] = [
+        fila("i1", "2021-12-31", 1000, concepto="Salario"),
+        fila("i2", "2022-07-01", 500, concepto="Salario"),
+    ]
+    db.tablas["eliminaciones"] = []
+    db.tablas["resumen_mensual"] = []
+    return usuario_id
+
+
+def _ids(db, tabla):
+    return sorted(f["id"] for f in db.tablas[tabla])
+
+
+RANGOS = [
+    (date(2021, 1, 1), date(2025, 12, 31)),
+    (date(2022, 3, 15), date(2022, 6, 30)),  # marzo archivado solo en parte
+    (date(2021, 12, 31), date(2022, 3, 1)),
+    (date(2022, 6, 1), date(2022, 6, 30)),
+]
+
+
+def _reportes(usuario_id):
+    return [report_service._calcular_reporte_rango(usuario_id, inicio, fin) for inicio, fin in RANGOS]
+
+
+@pytest.mark.parametrize("con_snapshot", [True, False])
+def test_archivar_no_cambia_los_reportes(db, usuario, monkeypatch, con_snapshot):
+    monkeypatch.setattr(settings, "LEDGER_SNAPSHOT_ENABLED", con_snapshot)
+    antes = _reportes(usuario)
+
+    assert archivar_usuario(usuario, HOY) == {"gastos": 4, "ingresos": 1}
+    assert _ids(db, "gastos") == ["g5", "g6"]
+    assert _ids(db, "ingresos") == ["i2"]
+    resumenes = {(r["tabla"], r["mes"]): (r["total_centavos"], r["cantidad"]) for r in db.tablas["resumen_mensual"]}
+    assert resumenes == {("gastos", "2021-07-01"): (1010, 1), ("gastos", "2022-03-01"): (5050, 2),
+                         ("gastos", "2022-05-01"): (1, 1), ("ingresos", "2021-12-01"): (100000, 1)}
+    assert archive.abrir(nombre_pendiente(usuario, "gastos")) is None
+
+    assert _reportes(usuario) == antes
+    assert total_archivado(usuario, "gastos", date(2022, 3, 15), date(2022, 3, 31)) == 3030
+    assert [f["id"] for f in leer_archivado(usuario, "gastos", date(2021, 1, 1), date(2022, 12, 31), 10)] == \
+        ["g4", "g3", "g2", "g1"]
+
+    # Repetir no duplica nada
+    assert archivar_usuario(usuario, HOY) == {"gastos": 0, "ingresos": 0}
+    assert _reportes(usuario) == antes
+
+
+def test_fila_modificada_recien_no_se_archiva(db, usuario):
+    with db.lock:
+        db.tablas["gastos"][0]["actualizado_en"] = _marca(0)
+    assert archivar_usuario(usuario, HOY)["gastos"] == 3
+    assert "g1" in _ids(db, "gastos")
+
+
+def test_fila_editada_entre_la_lectura_y_el_borrado_se_queda_en_la_tabla(db, usuario, monkeypatch):
+    borrar = archive_service._borrar
+
+    def editar_y_borrar(usuario_id, tabla, filas, tope):
+        if tabla == "gastos":
+            with db.lock:
+                g2 = next(f for f in db.tablas["gastos"] if f["id"] == "g2")
+                g2.update(monto=99, actualizado_en=_marca(0))
+        return borrar(usuario_id, tabla, filas, tope)
+
+    monkeypatch.setattr(archive_service, "_borrar", editar_y_borrar)
+    assert archivar_usuario(usuario, HOY)["gastos"] == 3
+    # La edición no se pierde y el archivo no cuenta la versión vieja
+    assert next(f for f in db.tablas["gastos"] if f["id"] == "g2")["monto"] == 99
+    assert total_archivado(usuario, "gastos", date(2022, 3, 1), date(2022, 3, 31)) == 3030
+    reporte = report_service._calcular_reporte_rango(usuario, date(2022, 3, 1), date(2022, 3, 31))
+    assert reporte["total_gastos"] == 129.3
+
+
+def test_archivado_interrumpido_se_consolida_en_la_pasada_siguiente(db, usuario, monkeypatch):
+    antes = _reportes(usuario)
+
+    def caida(usuario_id, tabla, movidas):
+        raise RuntimeError("el proceso murió")
+
+    with monkeypatch.context() as m:
+        m.setattr(archive_service, "_consolidar", caida)
+        with pytest.raises(RuntimeError):
+            archivar_usuario(usuario, HOY)
+    assert _ids(db, "gastos") == ["g5", "g6"]
+    assert archive.abrir(nombre_pendiente(usuario, "gastos")) is not None
+    # El usuario borró una de las filas mientras tanto (deja lápida): no se archiva
+    db.tablas["eliminaciones"].append({"id": 1, "usuario_id": usuario, "tabla": "gastos", "registro_id": "g4"})
+
+    assert archivar_usuario(usuario, HOY) == {"gastos": 3, "ingresos": 1}
+    assert archive.abrir(nombre_pendiente(usuario, "gastos")) is None
+    assert total_archivado(usuario, "gastos", date(2021, 1, 1), date(2022, 12, 31)) == 1010 + 5050
+    assert _reportes(usuario)[0]["total_gastos"] == round(antes[0]["total_gastos"] - 0.01, 2)
@@ -0,0 +1,57 @@
+import random
+
+from src.core.bloom import FiltroBloomContador
+
+
+def correos(n: int, semilla: int = 1):
+    rnd = random.Random(semilla)
+    return [f"usuario{rnd.getrandbits(64):x}@fintrack.io" for _ in range(n)]
+
+
+def test_sin_falsos_negativos():
+    filtro = FiltroBloomContador(5000, 0.01)
+    cargados = correos(5000)
+    for correo in cargados:
+        filtro.agregar(correo)
+    assert all(correo in filtro for correo in cargados)
+    assert filtro.elementos == 5000
+
+
+def test_tasa_de_falsos_positivos_cerca_de_la_configurada():
+    filtro = FiltroBloomContador(5000, 0.01)
+    for correo in correos(5000):
+        filtro.agregar(correo)
+    ajenos = correos(20000, semilla=2)
+    tasa = sum(correo in filtro for correo in ajenos) / len(ajenos)
+    assert tasa < 0.03
+
+
+def test_eliminar_libera_el_elemento_sin_afectar_a_los_demas():
+    filtro = FiltroBloomContador(1000, 0.01)
+    cargados = correos(1000)
+    for correo in cargados:
+        filtro.agregar(correo)
+    for correo in cargados[:500]:
+        filtro.eliminar(correo)
+    assert all(correo in filtro for correo in cargados[500:])
+    assert sum(correo in filtro for correo in cargados[:500]) < 25
+    assert filtro.elementos == 500
+
+
+def test_eliminar_un_elemento_ausente_no_cambia_nada():
+    filtro = FiltroBloomContador(1000, 0.01)
+    filtro.agregar("a@fintrack.io")
+    antes = bytes(filtro._contadores)
+    filtro.eliminar("b@fintrack.io")
+    assert bytes(filtro._contadores) == antes
+    assert "a@fintrack.io" in filtro
+
+
+def test_contadores_saturados_no_producen_falsos_negativos():
+    filtro = FiltroBloomContador(10, 0.5)
+    for _ in range(300):
+        filtro.agregar("repetido@fintrack.io")
+    filtro.agregar("otro@fintrack.io")
+    for _ in range(300):
+        filtro.eliminar("repetido@fintrack.io")
+    assert "otro@fintrack.io" in filtro
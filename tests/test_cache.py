@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from src.core.cache import MOVIMIENTOS, USUARIO, BusMemoria, BusMmap, CacheL1, bus
+
+
+# ---------- bus mmap ----------
+def test_bus_mmap_comparte_las_versiones_entre_instancias(tmp_path):
+    ruta = str(tmp_path / "bus" / "versiones.bin")
+    worker_a, worker_b = BusMmap(ruta, 1024), BusMmap(ruta, 1024)
+    assert worker_a.version(MOVIMIENTOS, "u1") == worker_b.version(MOVIMIENTOS, "u1") == 0
+    assert worker_a.publicar(MOVIMIENTOS, "u1") == 1
+    assert worker_b.version(MOVIMIENTOS, "u1") == 1
+    assert worker_b.publicar(MOVIMIENTOS, "u1") == 2
+    assert worker_a.version(MOVIMIENTOS, "u1") == 2
+    # Otra clave y otro espacio no se ven afectados (salvo colisión de celda)
+    assert worker_a.version(MOVIMIENTOS, "u2") == 0
+    assert worker_a.version(USUARIO, "u1") == 0
+    # Un worker que arranca después ve lo publicado antes
+    assert BusMmap(ruta, 1024).version(MOVIMIENTOS, "u1") == 2
+
+
+def test_bus_mmap_con_colision_invalida_de_mas(tmp_path):
+    una_celda = BusMmap(str(tmp_path / "versiones.bin"), 1)
+    una_celda.publicar(MOVIMIENTOS, "u1")
+    assert una_celda.version(MOVIMIENTOS, "u2") == 1
+
+
+# ---------- caché L1 ----------
+@pytest.fixture
+def bus_local(monkeypatch):
+    local = BusMemoria()
+    monkeypatch.setattr(bus, "_backend", local)
+    return local
+
+
+class Cargador:
+    def __init__(self):
+        self.cargas = 0
+
+    def __call__(self):
+        self.cargas += 1
+        return {"carga": self.cargas}
+
+
+def test_cache_sirve_la_copia_hasta_que_cambia_una_dependencia(bus_local):
+    cache, cargar = CacheL1("prueba", 10), Cargador()
+    dependencias = [(MOVIMIENTOS, "u1"), (USUARIO, "ana@fintrack.io")]
+    assert cache.obtener("u1", cargar, dependencias) == {"carga": 1}
+    assert cache.obtener("u1", cargar, dependencias) == {"carga": 1}
+    bus.publicar(MOVIMIENTOS, "u2")
+    assert cache.obtener("u1", cargar, dependencias) == {"carga": 1}
+    bus.publicar(USUARIO, "ana@fintrack.io")
+    assert cache.obtener("u1", cargar, dependencias) == {"carga": 2}
+    assert cargar.cargas == 2
+
+
+def test_invalidacion_publicada_por_otro_worker(tmp_path, monkeypatch):
+    ruta = str(tmp_path / "versiones.bin")
+    monkeypatch.setattr(bus, "_backend", BusMmap(ruta, 1024))
+    cache, cargar = CacheL1("prueba", 10), Cargador()
+    cache.obtener("u1", cargar, [(MOVIMIENTOS, "u1")])
+    BusMmap(ruta, 1024).publicar(MOVIMIENTOS, "u1")
+    assert cache.obtener("u1", cargar, [(MOVIMIENTOS, "u1")]) == {"carga": 2}
+
+
+def test_cache_con_ttl_caduca(bus_local):
+    cache, cargar = CacheL1("prueba", 10, ttl=0.05), Cargador()
+    cache.obtener("u1", cargar, [])
+    assert cache.obtener("u1", cargar, []) == {"carga": 1}
+    time.sleep(0.08)
+    assert cache.obtener("u1", cargar, []) == {"carga": 2}
+
+
+def test_escritura_durante_la_carga_no_deja_la_copia_vieja(bus_local):
+    cache = CacheL1("prueba", 10)
+
+    def cargar_y_escribir():
+        bus.publicar(MOVIMIENTOS, "u1")  # otro worker escribe mientras se carga
+        return "vieja"
+
+    assert cache.obtener("u1", cargar_y_escribir, [(MOVIMIENTOS, "u1")]) == "vieja"
+    assert cache.obtener("u1", lambda: "nueva", [(MOVIMIENTOS, "u1")]) == "nueva"
+
+
+def test_cache_descarta_la_entrada_menos_usada_y_a_pedido(bus_local):
+    cache = CacheL1("prueba", 2)
+    for clave in ("a", "b"):
+        cache.obtener(clave, lambda: 1, [])
+    cache.obtener("a", lambda: 2, [])  # acierto: "a" pasa a ser la más reciente
+    cache.obtener("c", lambda: 1, [])
+    assert cache.obtener("a", lambda: 2, []) == 1
+    assert cache.obtener("b", lambda: 2, []) == 2
+    cache.descartar("a")
+    assert cache.obtener("a", lambda: 3, []) == 3
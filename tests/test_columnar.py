@@ -0,0 +1,160 @@
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.core import columnar, money
+from src.core.cache import MOVIMIENTOS, bus
+from src.core.columnar import ColumnasMovimientos, dia_epoch, fecha_de_dia
+from src.core.config import settings
+from src.services.ledger_service import GestorSnapshots
+
+CATEGORIAS = ["Ocio", "Salud", "Vivienda", None]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def sin_numpy(request, monkeypatch):
+    if request.param == "numpy" and money.np is None:
+        pytest.skip("NumPy no instalado")
+    if request.param == "python":
+        monkeypatch.setattr(columnar, "np", None)
+        monkeypatch.setattr(money, "np", None)
+
+
+def referencia_total(filas: dict, inicio: date, fin: date) -> int:
+    return sum(money.a_centavos(m) for f, m, _ in filas.values() if inicio <= f <= fin)
+
+
+def normalizada(fila):
+    fecha, monto, categoria = fila
+    return fecha, money.a_centavos(monto), categoria or ""
+
+
+def test_dia_epoch_ida_y_vuelta():
+    assert dia_epoch("1970-01-02") == 1
+    assert fecha_de_dia(dia_epoch(date(2025, 2, 28))) == date(2025, 2, 28)
+    assert dia_epoch("2025-02-28T10:00:00+00:00") == dia_epoch(date(2025, 2, 28))
+
+
+def test_operaciones_aleatorias_coinciden_con_un_dict(sin_numpy):
+    rnd = random.Random(11)
+    columnas = ColumnasMovimientos()
+    filas = {}
+    ids = [str(uuid.UUID(int=rnd.getrandbits(128))) for _ in range(150)] + [str(i) for i in range(50)]
+    for _ in range(3000):
+        id_fila = rnd.choice(ids)
+        operacion = rnd.random()
+        if operacion < 0.6:
+            fila = (date(2024, 1, 1) + timedelta(days=rnd.randrange(500)), round(rnd.uniform(-50, 900), 2),
+                    rnd.choice(CATEGORIAS))
+            anterior = filas.get(id_fila)
+            assert columnas.upsert(id_fila, *fila) == (anterior is None or normalizada(anterior) != normalizada(fila))
+            filas[id_fila] = fila
+        else:
+            assert columnas.quitar(id_fila) == (filas.pop(id_fila, None) is not None)
+        assert len(columnas) == len(filas)
+
+    for _ in range(50):
+        inicio = date(2024, 1, 1) + timedelta(days=rnd.randrange(500))
+        fin = inicio + timedelta(days=rnd.randrange(120))
+        assert columnas.total_en_rango(inicio, fin) == referencia_total(filas, inicio, fin)
+
+    por_categoria = {}
+    for f, m, c in filas.values():
+        por_categoria[c or ""] = por_categoria.get(c or "", 0) + money.a_centavos(m)
+    esperado = {c: t for c, t in por_categoria.items() if t}
+    assert columnas.totales_por_categoria(date(2024, 1, 1), date(2025, 6, 1)) == esperado
+
+
+def test_quitar_mueve_la_ultima_fila_al_hueco():
+    columnas = ColumnasMovimientos()
+    for i, monto in enumerate((1, 2, 3)):
+        columnas.agregar(f"id{i}", "2025-01-01", monto, "Ocio")
+    assert columnas.quitar("id0")
+    assert list(columnas.centavos) == [300, 200]
+    assert columnas.quitar("id2") and list(columnas.centavos) == [200]
+    assert not columnas.quitar("id2")
+    assert columnas.upsert("id1", "2025-01-01", 2, "Ocio") is False  # sin cambios
+
+
+def test_upsert_varios_con_lote_grande_equivale_a_upserts_sueltos():
+    rnd = random.Random(5)
+    filas = [(f"id{rnd.randrange(80)}", date(2025, 1, 1) + timedelta(days=rnd.randrange(60)),
+              rnd.randint(1, 500), rnd.choice(CATEGORIAS)) for _ in range(200)]
+    por_lote, sueltas = ColumnasMovimientos(), ColumnasMovimientos()
+    for columnas in (por_lote, sueltas):
+        columnas.agregar("id0", "2025-01-01", 1, "Ocio")
+    cambios = por_lote.upsert_varios(filas)
+    assert cambios == sum(sueltas.upsert(*f) for f in filas)
+    assert len(por_lote) == len(sueltas)
+    assert por_lote.total_en_rango(date(2025, 1, 1), date(2025, 3, 1)) == \
+        sueltas.total_en_rango(date(2025, 1, 1), date(2025, 3, 1))
+
+
+def test_serie_diaria(sin_numpy):
+    columnas = ColumnasMovimientos()
+    columnas.agregar("a", "2025-01-01", 10, "Ocio")
+    columnas.agregar("b", "2025-01-03", 5.5, "Ocio")
+    columnas.agregar("c", "2025-01-03", 1, "Salud")
+    columnas.agregar("d", "2025-02-01", 99, "Salud")
+    assert columnas.serie_diaria(dia_epoch("2025-01-01"), 4) == [1000, 0, 650, 0]
+    assert columnas.primer_dia() == dia_epoch("2025-01-01")
+
+
+# ---------- snapshot del ledger ----------
+def _marca(segundos_atras: float = 0) -> str:
+    return (datetime.utcnow() - timedelta(seconds=segundos_atras)).isoformat()
+
+
+def test_snapshot_se_sincroniza_con_deltas_y_lapidas(db, monkeypatch):
+    monkeypatch.setattr(settings, "LEDGER_PAGE_SIZE", 2)
+    db.tablas["gastos"] = [
+        {"id": f"g{i}", "usuario_id": "u1", "fecha": "2025-01-10", "monto": 10.1, "categoria": "Ocio",
+         "actualizado_en": _marca(60)} for i in range(5)
+    ]
+    db.tablas["ingresos"] = [{"id": "i1", "usuario_id": "u1", "fecha": "2025-01-01", "monto": 100,
+                              "concepto": "Salario", "actualizado_en": _marca(60)}]
+    db.tablas["eliminaciones"] = []
+    gestor = GestorSnapshots()
+    enero = (date(2025, 1, 1), date(2025, 1, 31))
+
+    snapshot = gestor.obtener("u1")
+    assert snapshot.total("gastos", *enero) == 5050
+    assert snapshot.total("ingresos", *enero) == 10000
+
+    with db.lock:
+        db.tablas["gastos"][0].update(monto=20, actualizado_en=_marca())
+        db.tablas["gastos"].append({"id": "g9", "usuario_id": "u1", "fecha": "2025-01-20", "monto": 0.05,
+                                    "categoria": "Salud", "actualizado_en": _marca()})
+        db.tablas["gastos"] = [g for g in db.tablas["gastos"] if g["id"] != "g1"]
+        db.tablas["eliminaciones"].append({"id": 1, "usuario_id": "u1", "tabla": "gastos", "registro_id": "g1"})
+    bus.publicar(MOVIMIENTOS, "u1")
+
+    actualizado = gestor.obtener("u1")
+    assert actualizado is snapshot  # delta sobre el mismo snapshot, sin recarga completa
+    assert actualizado.total("gastos", *enero) == 2000 + 3 * 1010 + 5
+    assert actualizado.totales_por_categoria("gastos", *enero) == {"Ocio": 5030, "Salud": 5}
+    assert actualizado.eliminacion == 1
+
+
+def test_delta_del_snapshot_recoge_filas_que_confirman_tarde(db, monkeypatch):
+    monkeypatch.setattr(settings, "LEDGER_SNAPSHOT_OVERLAP_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "LEDGER_SNAPSHOT_REFRESH_SECONDS", 0)
+    vista = datetime.utcnow() - timedelta(seconds=0.05)
+    db.tablas["gastos"] = [{"id": "g1", "usuario_id": "u1", "fecha": "2025-01-10", "monto": 10,
+                            "categoria": "Ocio", "actualizado_en": vista.isoformat()}]
+    db.tablas["ingresos"] = []
+    db.tablas["eliminaciones"] = []
+    gestor = GestorSnapshots()
+    enero = (date(2025, 1, 1), date(2025, 1, 31))
+    assert gestor.obtener("u1").total("gastos", *enero) == 1000
+
+    # Confirmada después de la carga con una marca anterior a la más reciente vista
+    tarde = (vista - timedelta(seconds=0.05)).isoformat()
+    with db.lock:
+        db.tablas["gastos"].append({"id": "g2", "usuario_id": "u1", "fecha": "2025-01-11", "monto": 5,
+                                    "categoria": "Ocio", "actualizado_en": tarde})
+    time.sleep(0.5)  # más de dos márgenes después
+    assert gestor.obtener("u1").total("gastos", *enero) == 1500
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.config import settings
+from src.database import resilience
+from src.database.resilience import CircuitBreaker, llamar
+from src.services import dashboard_service
+from src.services.dashboard_service import armar_dashboard
+
+
+@pytest.fixture
+def secciones(monkeypatch):
+    monkeypatch.setattr(settings, "DASHBOARD_SECTION_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "HEDGE_ENABLED", False)
+    monkeypatch.setattr(resilience, "breaker", CircuitBreaker(umbral=5, ventana=30, enfriamiento=60))
+    monkeypatch.setattr(dashboard_service, "_recientes", lambda tabla, usuario_id: [{"tabla": tabla}])
+    monkeypatch.setattr(dashboard_service, "_reporte_mes", lambda usuario_id, hoy: {"total_gastos": 0})
+    monkeypatch.setattr(dashboard_service.indice_planes_ahorro, "consultar", lambda usuario_id: [])
+    monkeypatch.setattr(dashboard_service.indice_plan_gestion, "consultar", lambda usuario_id: [])
+    estado = {"terminada": threading.Event(), "error": None}
+
+    def perfil_lento(usuario_id):
+        # Dos llamadas lentas seguidas: la segunda ya no debería salir
+        try:
+            for _ in range(2):
+                llamar(lambda: time.sleep(0.5), idempotente=True)
+            return {"id": usuario_id}
+        except HTTPException as e:
+            estado["error"] = e.status_code
+            raise
+        finally:
+            estado["terminada"].set()
+
+    monkeypatch.setattr(dashboard_service, "_perfil", perfil_lento)
+    return estado
+
+
+def test_seccion_lenta_informa_el_error_sin_frenar_a_las_demas(secciones):
+    inicio = time.monotonic()
+    dashboard = asyncio.run(armar_dashboard("u1"))
+    assert time.monotonic() - inicio < 0.5
+    usuario = dashboard["secciones"].pop("usuario")
+    assert usuario["estado"] == "error" and usuario["error"] == "Tiempo de espera agotado"
+    assert all(s["estado"] == "ok" for s in dashboard["secciones"].values())
+    assert dashboard["secciones"]["gastos_recientes"]["data"] == [{"tabla": "gastos"}]
+    # La sección abandona su llamada al agotar el presupuesto en vez de seguir ocupando el hilo
+    assert secciones["terminada"].wait(0.5)
+    assert secciones["error"] == 504
+
+
+def test_presupuesto_anidado_no_alarga_el_de_la_peticion():
+    with resilience.presupuesto(0.1):
+        with resilience.presupuesto(60):
+            assert resilience.tiempo_restante() <= 0.1
+        with resilience.presupuesto(0.01):
+            assert resilience.tiempo_restante() <= 0.01
@@ -0,0 +1,117 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.middleware.auth_middleware import usuario_actual
+from src.routes import forecast_routes
+from src.services import forecast_service
+from src.services.forecast_service import ModeloFlujo, ServicioPronostico, promedios_moviles
+from src.services.ledger_service import SnapshotUsuario
+
+HOY = date(2025, 3, 1)
+
+
+def test_promedios_moviles_con_y_sin_numpy(monkeypatch):
+    rnd = random.Random(5)
+    serie = [rnd.randrange(-50_000, 50_000) for _ in range(200)]
+    esperado = [sum(serie[i:i + 7]) / 7 for i in range(len(serie) - 6)]
+    assert promedios_moviles(serie, 7) == pytest.approx(esperado)
+    monkeypatch.setattr(forecast_service, "np", None)
+    assert promedios_moviles(serie, 7) == pytest.approx(esperado)
+    assert promedios_moviles(serie[:3], 7) == []
+
+
+def test_modelo_con_perfil_semanal():
+    desde = date(2025, 1, 6)  # lunes
+    serie = [7000 if (desde + timedelta(days=i)).weekday() == 0 else 0 for i in range(28)]
+    modelo = ModeloFlujo(serie, desde, desde + timedelta(days=27))
+    assert modelo.media == pytest.approx(1000)
+    assert modelo.nivel == pytest.approx(1000)  # ventana acotada al historial disponible
+    assert modelo.movil_7 == pytest.approx(1000)
+    assert modelo.movil_30 is None
+    assert modelo.ajuste_semana == pytest.approx([6000] + [-1000] * 6)
+    assert len(modelo.proyectar(modelo.hoy + timedelta(days=10))) == 10
+
+
+def _snapshot(desde: date, hasta: date, centavos: int) -> SnapshotUsuario:
+    snapshot = SnapshotUsuario()
+    dia = desde
+    while dia <= hasta:
+        snapshot.aplicar("ingresos", {"id": str(dia), "fecha": dia.isoformat(), "monto": centavos / 100,
+                                      "concepto": "Salario"}, nueva=True)
+        dia += timedelta(days=1)
+    return snapshot
+
+
+@pytest.fixture
+def servicio(monkeypatch):
+    estado = {"snapshot": _snapshot(date(2025, 1, 1), HOY, 1000), "planes": []}
+    monkeypatch.setattr(forecast_service.ledger, "obtener", lambda usuario_id: estado["snapshot"])
+    monkeypatch.setattr(forecast_service.indice_planes_ahorro, "consultar", lambda usuario_id: estado["planes"])
+    calculos = []
+
+    class ModeloContado(ModeloFlujo):
+        __slots__ = ()
+
+        def __init__(self, *args):
+            calculos.append(args)
+            super().__init__(*args)
+
+    monkeypatch.setattr(forecast_service, "ModeloFlujo", ModeloContado)
+    servicio = ServicioPronostico()
+    servicio.estado, servicio.calculos = estado, calculos
+    return servicio
+
+
+def test_pronostico_y_planes_con_flujo_constante(servicio):
+    servicio.estado["planes"] = [{"id": 1, "nombre_plan": "Viaje", "monto_objetivo": 500,
+                                  "fecha_inicio": "2025-02-01", "fecha_fin": "2025-03-31"}]
+    resultado = servicio.pronosticar("u1", 31, hoy=HOY)
+    assert resultado["historial"]["neto_promedio_diario"] == 10
+    assert set(resultado["perfil_semanal"].values()) == {0}
+    assert resultado["proyeccion_mensual"] == [{"mes": "2025-03", "neto": 300}, {"mes": "2025-04", "neto": 10}]
+    plan, = resultado["planes"]
+    assert plan["ahorro_actual"] == 290  # del 1 de febrero al 1 de marzo
+    assert plan["ahorro_proyectado"] == 590
+    assert plan["alcanzable"] is True
+    assert plan["ahorro_diario_necesario"] == 7
+
+
+def test_modelo_en_cache_hasta_que_cambia_el_snapshot_o_el_dia(servicio):
+    servicio.pronosticar("u1", hoy=HOY)
+    servicio.pronosticar("u1", hoy=HOY)
+    assert len(servicio.calculos) == 1
+
+    servicio.estado["snapshot"].version += 1
+    servicio.pronosticar("u1", hoy=HOY)
+    assert len(servicio.calculos) == 2
+
+    servicio.pronosticar("u1", hoy=HOY + timedelta(days=1))
+    assert len(servicio.calculos) == 3
+
+
+def test_snapshot_recargado_no_reutiliza_el_modelo_anterior(servicio):
+    servicio.pronosticar("u1", hoy=HOY)
+    # Una recarga completa (TTL, archivado, desalojo) crea un snapshot nuevo en la versión 0
+    anterior = servicio.estado["snapshot"]
+    servicio.estado["snapshot"] = _snapshot(date(2025, 1, 1), HOY, 3000)
+    assert servicio.estado["snapshot"].version == anterior.version
+    assert servicio.estado["snapshot"].generacion != anterior.generacion
+    del anterior
+    assert servicio.pronosticar("u1", hoy=HOY)["historial"]["neto_promedio_diario"] == 30
+    assert len(servicio.calculos) == 2
+
+
+def test_horizonte_acotado_por_la_configuracion(servicio):
+    app = FastAPI()
+    app.include_router(forecast_routes.router)
+    app.dependency_overrides[usuario_actual] = lambda: "u1"
+    cliente = TestClient(app)
+    maximo = settings.FORECAST_MAX_HORIZON_DAYS
+    assert cliente.get("/api/pronostico", params={"horizonte_dias": maximo + 1}).status_code == 422
+    assert cliente.get("/api/pronostico", params={"horizonte_dias": 0}).status_code == 422
+    assert cliente.get("/api/pronostico", params={"horizonte_dias": 30}).status_code == 200
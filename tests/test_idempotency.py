@@ -0,0 +1,186 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from src.core.config import settings
+from src.core.idempotency import (
+    COMPLETA, CONFLICTO, EN_CURSO, NUEVA, AlmacenIdempotenciaMemoria, AlmacenIdempotenciaSQLite,
+)
+from src.middleware.idempotency_middleware import MAX_LONGITUD_CLAVE, IdempotencyMiddleware
+
+RESPUESTA = (201, [(b"content-type", b"application/json")], b'{"id": 1}')
+
+
+# ---------- almacenes ----------
+@pytest.fixture(params=["memoria", "sqlite"])
+def almacen(request, tmp_path):
+    if request.param == "sqlite":
+        return AlmacenIdempotenciaSQLite(str(tmp_path / "idempotencia.db"), 100)
+    return AlmacenIdempotenciaMemoria(100)
+
+
+def test_reserva_en_curso_y_respuesta_guardada(almacen):
+    assert almacen.reservar("u:1", "h", 60) == (NUEVA, None)
+    assert almacen.reservar("u:1", "h", 60) == (EN_CURSO, None)
+    almacen.completar("u:1", "h", RESPUESTA, 60)
+    assert almacen.reservar("u:1", "h", 60) == (COMPLETA, RESPUESTA)
+
+
+def test_misma_clave_con_otra_huella_es_conflicto(almacen):
+    almacen.reservar("u:1", "h", 60)
+    assert almacen.reservar("u:1", "otra", 60) == (CONFLICTO, None)
+    almacen.completar("u:1", "h", RESPUESTA, 60)
+    assert almacen.reservar("u:1", "otra", 60) == (CONFLICTO, None)
+
+
+def test_liberar_solo_borra_la_reserva_propia_sin_respuesta(almacen):
+    almacen.reservar("u:1", "h", 60)
+    almacen.liberar("u:1", "otra")
+    assert almacen.reservar("u:1", "h", 60)[0] == EN_CURSO
+    almacen.liberar("u:1", "h")
+    assert almacen.reservar("u:1", "h", 60)[0] == NUEVA
+    almacen.completar("u:1", "h", RESPUESTA, 60)
+    almacen.liberar("u:1", "h")
+    assert almacen.reservar("u:1", "h", 60)[0] == COMPLETA
+
+
+def test_reserva_vencida_se_puede_volver_a_tomar(almacen):
+    almacen.reservar("u:1", "h", 0.05)
+    time.sleep(0.08)
+    assert almacen.reservar("u:1", "otra", 60) == (NUEVA, None)
+
+
+def test_sqlite_comparte_las_claves_entre_almacenes(tmp_path):
+    ruta = str(tmp_path / "idempotencia.db")
+    primero = AlmacenIdempotenciaSQLite(ruta, 100)
+    primero.reservar("u:1", "h", 60)
+    primero.completar("u:1", "h", RESPUESTA, 60)
+    AlmacenIdempotenciaSQLite(ruta, 100).reservar("u:2", "h", 60)
+    otro = AlmacenIdempotenciaSQLite(ruta, 100)
+    assert otro.reservar("u:1", "h", 60) == (COMPLETA, RESPUESTA)
+    assert otro.reservar("u:2", "h", 60) == (EN_CURSO, None)
+
+
+def test_memoria_descarta_las_claves_mas_viejas():
+    almacen = AlmacenIdempotenciaMemoria(2)
+    for clave in ("a", "b", "c"):
+        almacen.reservar(clave, "h", 60)
+    assert almacen.reservar("a", "h", 60)[0] == NUEVA
+    assert almacen.reservar("c", "h", 60)[0] == EN_CURSO
+
+
+# ---------- middleware ----------
+@pytest.fixture
+def servidor(monkeypatch):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_BACKEND", "memoria")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    app = FastAPI()
+    app.state.creados = []
+
+    @app.post("/gastos/")
+    def crear(datos: dict):
+        app.state.creados.append(datos)
+        if datos.get("fallar"):
+            return JSONResponse({"detail": "Supabase no disponible"}, status_code=503)
+        return JSONResponse({"id": len(app.state.creados), **datos}, status_code=201)
+
+    return IdempotencyMiddleware(app)
+
+
+@pytest.fixture
+def cliente(servidor):
+    return TestClient(servidor)
+
+
+def cabeceras(clave: str, sub: str = "ana@fintrack.io") -> dict:
+    firmado = jwt.encode({"sub": sub}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {firmado}", "Idempotency-Key": clave}
+
+
+def test_repeticion_recibe_la_respuesta_guardada(cliente, servidor):
+    primera = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    repetida = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    assert primera.status_code == repetida.status_code == 201
+    assert repetida.json() == primera.json()
+    assert repetida.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in primera.headers
+    assert len(servidor.app.state.creados) == 1
+
+
+def test_misma_clave_con_otro_cuerpo_responde_422(cliente, servidor):
+    cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    respuesta = cliente.post("/gastos/", json={"monto": 99}, headers=cabeceras("k1"))
+    assert respuesta.status_code == 422
+    assert len(servidor.app.state.creados) == 1
+
+
+def test_las_claves_son_por_usuario(cliente, servidor):
+    cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    otra = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1", sub="beto@fintrack.io"))
+    assert otra.status_code == 201
+    assert "idempotent-replayed" not in otra.headers
+    assert len(servidor.app.state.creados) == 2
+
+
+def test_errores_5xx_no_se_guardan(cliente, servidor):
+    assert cliente.post("/gastos/", json={"fallar": True}, headers=cabeceras("k1")).status_code == 503
+    assert cliente.post("/gastos/", json={"fallar": True}, headers=cabeceras("k1")).status_code == 503
+    assert len(servidor.app.state.creados) == 2
+
+
+def test_original_en_curso_responde_409_al_vencer_la_espera(cliente, servidor):
+    respuesta = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    assert respuesta.status_code == 201
+    # Otra petición con la misma clave y el mismo cuerpo toma una reserva sin terminar
+    entrada = servidor.almacen._claves["ana@fintrack.io:k1"]
+    servidor.almacen._claves["ana@fintrack.io:k1"] = [entrada[0], None, time.time() + 60]
+    inicio = time.monotonic()
+    respuesta = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    assert respuesta.status_code == 409
+    assert time.monotonic() - inicio >= settings.IDEMPOTENCY_WAIT_SECONDS
+    assert len(servidor.app.state.creados) == 1
+
+
+def test_clave_demasiado_larga_responde_400(cliente, servidor):
+    respuesta = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k" * (MAX_LONGITUD_CLAVE + 1)))
+    assert respuesta.status_code == 400
+    assert not servidor.app.state.creados
+
+
+def test_sin_token_valido_no_se_guarda_nada(cliente, servidor):
+    for _ in range(2):
+        assert cliente.post("/gastos/", json={"monto": 10}, headers={"Idempotency-Key": "k1"}).status_code == 201
+    assert len(servidor.app.state.creados) == 2
+    assert not servidor.almacen._claves
+
+
+def test_almacen_sqlite_se_consulta_fuera_del_event_loop(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "IDEMPOTENCY_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "IDEMPOTENCY_SQLITE_PATH", str(tmp_path / "idempotencia.db"))
+    hilos = {"almacen": set(), "loop": set()}
+    app = FastAPI()
+
+    @app.post("/gastos/")
+    async def crear(datos: dict):
+        hilos["loop"].add(threading.get_ident())
+        return JSONResponse(datos, status_code=201)
+
+    middleware = IdempotencyMiddleware(app)
+    for operacion in ("reservar", "completar"):
+        original = getattr(middleware.almacen, operacion)
+
+        def registrar(*args, original=original):
+            hilos["almacen"].add(threading.get_ident())
+            return original(*args)
+
+        setattr(middleware.almacen, operacion, registrar)
+    with TestClient(middleware) as cliente:
+        assert cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1")).status_code == 201
+        repetida = cliente.post("/gastos/", json={"monto": 10}, headers=cabeceras("k1"))
+    assert repetida.headers["idempotent-replayed"] == "true"
+    assert hilos["almacen"] and not hilos["almacen"] & hilos["loop"]
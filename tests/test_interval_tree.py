@@ -0,0 +1,56 @@
+import random
+from datetime import date
+
+from src.core.interval_tree import ArbolIntervalos
+from src.services.plan_index_service import IndicePlanes
+
+
+def test_vacio():
+    arbol = ArbolIntervalos([])
+    assert len(arbol) == 0
+    assert arbol.contienen(5) == []
+
+
+def test_extremos_inclusivos():
+    arbol = ArbolIntervalos([(1, 5, "a"), (5, 9, "b"), (10, 12, "c")])
+    assert sorted(arbol.contienen(5)) == ["a", "b"]
+    assert arbol.contienen(9) == ["b"]
+    assert arbol.contienen(0) == [] and arbol.contienen(13) == []
+
+
+def test_coincide_con_la_busqueda_lineal():
+    rnd = random.Random(7)
+    for _ in range(50):
+        intervalos = []
+        for i in range(rnd.randint(1, 200)):
+            inicio = rnd.randint(0, 1000)
+            intervalos.append((inicio, inicio + rnd.randint(0, 300), i))
+        arbol = ArbolIntervalos(intervalos)
+        for punto in [rnd.randint(-10, 1400) for _ in range(30)]:
+            esperado = sorted(v for a, b, v in intervalos if a <= punto <= b)
+            assert sorted(arbol.contienen(punto)) == esperado
+
+
+def test_indice_de_planes_filtra_por_fecha_y_categoria_e_invalida():
+    filas = [
+        {"id": 1, "categoria": "Ocio", "fecha_inicio": "2025-01-01", "fecha_fin": "2025-03-31"},
+        {"id": 2, "categoria": "Salud", "fecha_inicio": "2025-02-01", "fecha_fin": "2025-02-28"},
+        {"id": 3, "categoria": "Ocio", "fecha_inicio": "2025-03-01", "fecha_fin": "2025-12-31"},
+    ]
+    cargas = []
+
+    def cargar(usuario_id):
+        cargas.append(usuario_id)
+        return list(filas)
+
+    indice = IndicePlanes("planes_prueba", cargar, clave_categoria="categoria")
+    assert [p["id"] for p in indice.consultar("u1", date(2025, 2, 15))] == [1, 2]
+    assert [p["id"] for p in indice.consultar("u1", date(2025, 3, 15), categoria="Ocio")] == [1, 3]
+    assert indice.consultar("u1", date(2025, 2, 15), categoria="Vivienda") == []
+    assert [p["id"] for p in indice.consultar("u1")] == [1, 2, 3]
+    assert cargas == ["u1"]
+
+    filas.append({"id": 4, "categoria": "Salud", "fecha_inicio": "2025-02-10", "fecha_fin": "2025-02-20"})
+    indice.invalidar("u1")
+    assert [p["id"] for p in indice.consultar("u1", date(2025, 2, 15), categoria="Salud")] == [2, 4]
+    assert cargas == ["u1", "u1"]
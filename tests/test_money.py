@@ -0,0 +1,59 @@
+from array import array
+from decimal import Decimal
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from src.core import money
+from src.core.money import Monto, a_centavos, a_monto, sumar_centavos, sumar_columna
+
+
+@pytest.mark.parametrize("valor, centavos", [
+    (12.345, 1235),     # mitad hacia arriba sobre la representación decimal, no la binaria
+    (2.675, 268),       # round(2.675, 2) da 2.67 por el binario del float
+    (1.005, 101),
+    (-1.005, -101),
+    ("7.1", 710),
+    (Decimal("0.015"), 2),
+    (3, 300),
+    (None, 0),
+])
+def test_a_centavos_redondea_una_sola_vez(valor, centavos):
+    assert a_centavos(valor) == centavos
+
+
+@pytest.mark.parametrize("valor", [True, float("nan"), float("inf"), "abc", "Infinity"])
+def test_a_centavos_rechaza_valores_no_numericos(valor):
+    with pytest.raises(ValueError):
+        a_centavos(valor)
+
+
+def test_sumas_exactas_en_centavos():
+    assert sum([0.1] * 10) != 1.0
+    assert sumar_centavos([0.1] * 10) == 100
+    assert a_monto(sumar_centavos(["0.10", 0.2, None, 1])) == 1.3
+    assert a_monto(-5) == -0.05
+
+
+@pytest.mark.parametrize("con_numpy", [True, False])
+def test_sumar_columna_con_y_sin_numpy(con_numpy, monkeypatch):
+    if con_numpy and money.np is None:
+        pytest.skip("NumPy no instalado")
+    if not con_numpy:
+        monkeypatch.setattr(money, "np", None)
+    columna = array("q", [100, 250, -50, 7])
+    assert sumar_columna(columna) == 307
+    mascara = [True, False, True, False]
+    if con_numpy:
+        mascara = money.np.array(mascara)
+    assert sumar_columna(columna, mascara) == 50
+
+
+def test_monto_en_modelos_queda_redondeado_al_centavo():
+    class Gasto(BaseModel):
+        monto: Monto
+
+    assert Gasto(monto="10.005").monto == 10.01
+    assert Gasto(monto=2.675).monto == 2.68
+    with pytest.raises(ValidationError):
+        Gasto(monto="diez")
@@ -0,0 +1,148 @@
+import json
+import os
+import time
+
+import pytest
+
+from src.core.config import settings
+from src.services.purge_service import COMPLETADO, EN_CURSO, PENDIENTE, GestorPurgas
+
+
+@pytest.fixture(autouse=True)
+def rapido(monkeypatch):
+    monkeypatch.setattr(settings, "PURGE_THROTTLE_SECONDS", 0)
+    monkeypatch.setattr(settings, "PURGE_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "PURGE_CHUNK_SIZE", 2)
+
+
+@pytest.fixture
+def rutas(tmp_path):
+    return str(tmp_path / "purgas.jsonl"), str(tmp_path / "purgas.lock")
+
+
+def escribir_journal(ruta: str, eventos, truncada: str = "") -> None:
+    with open(ruta, "w", encoding="utf-8") as f:
+        for i, evento in enumerate(eventos):
+            f.write(json.dumps({"ts": f"2025-01-01T00:00:{i:02d}", **evento}) + "\n")
+        f.write(truncada)
+
+
+def esperar(condicion, segundos: float = 5):
+    limite = time.monotonic() + segundos
+    while not condicion():
+        assert time.monotonic() < limite, "la condición no se cumplió a tiempo"
+        time.sleep(0.01)
+
+
+def sembrar_usuario(db, usuario_id: str, gastos: int) -> None:
+    db.tablas["usuarios"] = [{"id": usuario_id, "correo": f"{usuario_id}@fintrack.io"}]
+    db.tablas["gastos"] = [{"id": f"g{i}", "usuario_id": usuario_id, "monto": 1} for i in range(gastos)]
+
+
+def test_reproducir_reconstruye_el_estado_y_compacta(rutas, monkeypatch):
+    monkeypatch.setattr(settings, "PURGE_RETENTION_HOURS", 10 ** 6)
+    journal, lock = rutas
+    escribir_journal(journal, [
+        {"evento": "creado", "job_id": "a", "usuario_id": "u1"},
+        {"evento": EN_CURSO, "job_id": "a"},
+        {"evento": "progreso", "job_id": "a", "tabla": "gastos", "borradas": 2},
+        {"evento": "progreso", "job_id": "a", "tabla": "gastos", "borradas": 4},
+        {"evento": "creado", "job_id": "b", "usuario_id": "u2"},
+        {"evento": "progreso", "job_id": "b", "tabla": "ingresos", "borradas": 1},
+        {"evento": COMPLETADO, "job_id": "b"},
+    ], truncada='{"evento": "progreso", "job_id": "a", "tab')
+    gestor = GestorPurgas(journal, lock)
+    gestor._reproducir_journal()
+
+    assert gestor.trabajos["a"]["estado"] == EN_CURSO
+    assert gestor.trabajos["a"]["borradas"] == {"gastos": 4}
+    assert gestor.trabajos["b"]["estado"] == COMPLETADO
+    with open(journal, encoding="utf-8") as f:
+        assert len(f.readlines()) == 5  # creado + progreso por trabajo, y el cierre de "b"
+
+    # La compactación conserva el progreso; lo inconcluso queda pendiente para reanudarlo
+    otro = GestorPurgas(journal, lock)
+    otro._reproducir_journal()
+    assert {k: (t["estado"], t["borradas"]) for k, t in otro.trabajos.items()} == \
+           {"a": (PENDIENTE, {"gastos": 4}), "b": (COMPLETADO, {"ingresos": 1})}
+
+
+def test_reanuda_un_trabajo_interrumpido(db, rutas):
+    journal, lock = rutas
+    sembrar_usuario(db, "u1", gastos=3)
+    escribir_journal(journal, [
+        {"evento": "creado", "job_id": "a", "usuario_id": "u1"},
+        {"evento": EN_CURSO, "job_id": "a"},
+        {"evento": "progreso", "job_id": "a", "tabla": "gastos", "borradas": 2},
+    ])
+    gestor = GestorPurgas(journal, lock)
+    gestor.iniciar()
+    esperar(lambda: (gestor.estado("a") or {}).get("estado") == COMPLETADO)
+    assert gestor.estado("a")["borradas"]["gastos"] == 5
+    assert db.tablas["gastos"] == [] and db.tablas["usuarios"] == []
+
+
+def test_un_solo_ejecutor_y_estado_visible_desde_cualquier_worker(db, rutas):
+    journal, lock = rutas
+    sembrar_usuario(db, "u1", gastos=5)
+    ejecutor, otro = GestorPurgas(journal, lock), GestorPurgas(journal, lock)
+    ejecutor.iniciar()
+    esperar(lambda: ejecutor.ejecutor)
+    otro.iniciar()
+
+    trabajo = otro.encolar("u1")
+    assert otro.encolar("u1")["job_id"] == trabajo["job_id"]  # ya hay uno activo para el usuario
+    assert otro.estado(trabajo["job_id"])["estado"] in (PENDIENTE, EN_CURSO, COMPLETADO)
+
+    esperar(lambda: otro.estado(trabajo["job_id"])["estado"] == COMPLETADO)
+    assert otro.estado(trabajo["job_id"])["borradas"] == {"gastos": 5}
+    assert db.tablas["gastos"] == []
+    assert not otro.ejecutor
+    assert otro.estado("inexistente") is None
+
+
+def test_la_compactacion_no_pierde_eventos_de_otros_workers(db, rutas):
+    journal, lock = rutas
+    escritor = GestorPurgas(journal, lock)
+    compactador = GestorPurgas(journal, lock)
+    for i in range(20):
+        escritor._anotar({"evento": "creado", "job_id": f"j{i}", "usuario_id": f"u{i}"})
+        compactador._reproducir_journal()
+    assert set(compactador.trabajos) == {f"j{i}" for i in range(20)}
+
+
+def test_compactacion_olvida_los_trabajos_terminados_vencidos(rutas, monkeypatch):
+    monkeypatch.setattr(settings, "PURGE_RETENTION_HOURS", 1)
+    journal, lock = rutas
+    escribir_journal(journal, [
+        {"evento": "creado", "job_id": "viejo", "usuario_id": "u1"},
+        {"evento": COMPLETADO, "job_id": "viejo"},
+        {"evento": "creado", "job_id": "colgado", "usuario_id": "u2"},
+    ])
+    gestor = GestorPurgas(journal, lock)
+    gestor._reproducir_journal()
+    assert set(gestor.trabajos) == {"colgado"}  # lo inconcluso nunca vence
+
+    gestor._anotar({"evento": "creado", "job_id": "nuevo", "usuario_id": "u3"})
+    gestor._anotar({"evento": COMPLETADO, "job_id": "nuevo"})
+    gestor._compactar()
+    assert set(gestor.trabajos) == {"colgado", "nuevo"}
+    assert gestor.estado("viejo") is None
+    with open(journal, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+
+def test_el_ejecutor_compacta_periodicamente(db, rutas, monkeypatch):
+    monkeypatch.setattr(settings, "PURGE_COMPACT_SECONDS", 0.1)
+    monkeypatch.setattr(settings, "PURGE_RETENTION_HOURS", 0)
+    journal, lock = rutas
+    ejecutor, otro = GestorPurgas(journal, lock), GestorPurgas(journal, lock)
+    ejecutor.iniciar()
+    esperar(lambda: ejecutor.ejecutor)
+    for i in range(5):
+        sembrar_usuario(db, f"u{i}", gastos=1)
+        trabajo = otro.encolar(f"u{i}")
+        esperar(lambda: (otro.estado(trabajo["job_id"]) or {}).get("estado") in (COMPLETADO, None))
+    # Sin retención, los trabajos terminados desaparecen del journal
+    esperar(lambda: os.path.getsize(journal) == 0)
+    assert ejecutor.trabajos == {}
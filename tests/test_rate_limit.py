@@ -0,0 +1,172 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from src.core.config import settings
+from src.core.rate_limit import AlmacenMemoria, AlmacenSQLite
+from src.middleware.rate_limit_middleware import RateLimitMiddleware, clasificar
+
+
+# ---------- token buckets ----------
+@pytest.fixture(params=["memoria", "sqlite"])
+def almacen(request, tmp_path):
+    if request.param == "sqlite":
+        return AlmacenSQLite(str(tmp_path / "cubos.db"))
+    return AlmacenMemoria()
+
+
+def test_cubo_admite_hasta_su_capacidad_y_luego_pide_esperar(almacen):
+    for restantes in (8, 6, 4, 2, 0):
+        assert almacen.consumir("usuario:a", 2, 10, 1) == (True, pytest.approx(restantes, abs=0.01), 0.0)
+    permitido, _, espera = almacen.consumir("usuario:a", 2, 10, 1)
+    assert not permitido
+    assert espera == pytest.approx(2, abs=0.01)
+
+
+def test_cubo_se_recarga_con_el_tiempo(almacen):
+    assert almacen.consumir("ip:1", 10, 10, 100)[0]
+    assert not almacen.consumir("ip:1", 10, 10, 100)[0]
+    time.sleep(0.12)
+    assert almacen.consumir("ip:1", 10, 10, 100)[0]
+
+
+def test_claves_independientes(almacen):
+    assert almacen.consumir("usuario:a", 10, 10, 1)[0]
+    assert not almacen.consumir("usuario:a", 1, 10, 1)[0]
+    assert almacen.consumir("usuario:b", 10, 10, 1)[0]
+
+
+def test_consumir_todos_cobra_de_todos_o_de_ninguno(almacen):
+    cubos = [("ip:1", 2, 10, 0.001), ("usuario:a", 2, 3, 0.001)]
+    assert [r[0] for r in almacen.consumir_todos(cubos)] == [True, True]
+    permitidos = [r[0] for r in almacen.consumir_todos(cubos)]
+    assert permitidos == [True, False]  # el usuario rechaza...
+    assert almacen.consumir("ip:1", 6, 10, 0.001)[0]  # ...y la IP conserva sus 6 fichas
+
+
+def test_sqlite_comparte_los_cubos_entre_almacenes(tmp_path):
+    ruta = str(tmp_path / "cubos.db")
+    assert AlmacenSQLite(ruta).consumir("usuario:a", 10, 10, 0.001)[0]
+    assert not AlmacenSQLite(ruta).consumir("usuario:a", 1, 10, 0.001)[0]
+
+
+def test_memoria_descarta_el_cubo_usado_hace_mas_tiempo():
+    almacen = AlmacenMemoria(max_claves=3)
+    for clave in ("a", "b", "c"):
+        almacen.consumir(clave, 10, 10, 0.001)
+    almacen.consumir("a", 0, 10, 0.001)  # "a" pasa a ser el más reciente
+    almacen.consumir("d", 10, 10, 0.001)
+    assert list(almacen._cubos) == ["c", "a", "d"]
+    # Los cubos vacíos que siguen en el almacén no se recargan por la purga
+    assert not almacen.consumir("a", 1, 10, 0.001)[0]
+    assert almacen.consumir("b", 10, 10, 0.001)[0]
+
+
+# ---------- middleware ----------
+def test_clasificacion_de_rutas():
+    assert clasificar("POST", "/auth/login") == "auth"
+    assert clasificar("POST", "/usuarios/") == "auth"
+    assert clasificar("GET", "/api/reporte/rango") == "reporte"
+    assert clasificar("DELETE", "/gastos/1") == "escritura"
+    assert clasificar("GET", "/gastos/") == "lectura"
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "memoria")
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_CAPACITY", 3)
+    monkeypatch.setattr(settings, "RATE_LIMIT_USER_REFILL", 0.001)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_CAPACITY", 100)
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_REFILL", 0.001)
+    app = FastAPI()
+
+    @app.get("/gastos/")
+    def listar():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware)
+    return TestClient(app)
+
+
+def token(sub: str, clave: str = None) -> dict:
+    firmado = jwt.encode({"sub": sub}, clave or settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return {"Authorization": f"Bearer {firmado}"}
+
+
+def sin_firmar(parte: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(parte).encode()).rstrip(b"=").decode()
+
+
+def test_usuario_agota_su_cubo_y_recibe_429(cliente):
+    for _ in range(3):
+        assert cliente.get("/gastos/", headers=token("ana@fintrack.io")).status_code == 200
+    respuesta = cliente.get("/gastos/", headers=token("ana@fintrack.io"))
+    assert respuesta.status_code == 429
+    assert respuesta.headers["ratelimit-limit"] == "3"
+    assert int(respuesta.headers["retry-after"]) >= 1
+
+
+def test_token_falsificado_no_agota_el_cubo_de_la_victima(cliente):
+    falsificado = token("ana@fintrack.io", clave="otra-clave")
+    for _ in range(10):
+        assert cliente.get("/gastos/", headers=falsificado).status_code == 200
+    sin_firma = {"Authorization": f"Bearer {sin_firmar({'alg': 'none'})}.{sin_firmar({'sub': 'ana@fintrack.io'})}."}
+    for _ in range(10):
+        assert cliente.get("/gastos/", headers=sin_firma).status_code == 200
+    # El cubo de la víctima sigue intacto
+    for _ in range(3):
+        assert cliente.get("/gastos/", headers=token("ana@fintrack.io")).status_code == 200
+
+
+def test_rechazo_del_usuario_no_gasta_las_fichas_de_la_ip(cliente, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_CAPACITY", 5)
+    cliente = TestClient(cliente.app)
+    for _ in range(3):
+        assert cliente.get("/gastos/", headers=token("ana@fintrack.io")).status_code == 200
+    for _ in range(5):
+        assert cliente.get("/gastos/", headers=token("ana@fintrack.io")).status_code == 429
+    # Quedan las 2 fichas de la IP
+    assert cliente.get("/gastos/").status_code == 200
+    assert cliente.get("/gastos/").status_code == 200
+    respuesta = cliente.get("/gastos/")
+    assert respuesta.status_code == 429
+    assert respuesta.headers["ratelimit-limit"] == "5"
+
+
+def test_almacen_sqlite_se_consulta_fuera_del_event_loop(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "RATE_LIMIT_SQLITE_PATH", str(tmp_path / "cubos.db"))
+    hilos = {}
+    app = FastAPI()
+
+    @app.get("/gastos/")
+    async def listar():
+        hilos["loop"] = threading.get_ident()
+        return {"ok": True}
+
+    middleware = RateLimitMiddleware(app)
+    consumir_todos = middleware.almacen.consumir_todos
+
+    def registrar(cubos):
+        hilos["almacen"] = threading.get_ident()
+        return consumir_todos(cubos)
+
+    middleware.almacen.consumir_todos = registrar
+    assert TestClient(middleware).get("/gastos/").status_code == 200
+    assert hilos["almacen"] != hilos["loop"]
+
+
+def test_peticiones_sin_token_solo_cuentan_contra_la_ip(cliente, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_IP_CAPACITY", 2)
+    cliente = TestClient(cliente.app)
+    assert cliente.get("/gastos/").status_code == 200
+    assert cliente.get("/gastos/").status_code == 200
+    respuesta = cliente.get("/gastos/")
+    assert respuesta.status_code == 429
+    assert respuesta.headers["ratelimit-limit"] == "2"
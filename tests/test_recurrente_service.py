@@ -0,0 +1,102 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from src.core.config import settings
+from src.services import recurrente_service
+from src.services.recurrente_service import materializar, materializar_pendientes, ocurrencia, primera_desde, vencidas
+
+
+def regla(frecuencia="mensual", inicio="2025-01-31", intervalo=1, **extra):
+    return {"id": "r1", "usuario_id": "u1", "tipo": "gastos", "categoria": "Vivienda", "nombre": "Alquiler",
+            "monto": 500.0, "frecuencia": frecuencia, "intervalo": intervalo, "fecha_inicio": inicio,
+            "fecha_fin": None, "proxima_fecha": inicio, "activa": True, **extra}
+
+
+# ---------- calendario ----------
+def test_mensual_conserva_el_dia_y_cae_el_ultimo_dia_en_meses_cortos():
+    r = regla(inicio="2024-01-31")
+    assert [ocurrencia(r, n) for n in range(4)] == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+
+
+def test_anual_desde_29_de_febrero():
+    r = regla(frecuencia="anual", inicio="2024-02-29")
+    assert [ocurrencia(r, n) for n in range(5)] == [
+        date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)]
+
+
+def test_semanal_con_intervalo():
+    r = regla(frecuencia="semanal", inicio="2025-01-06", intervalo=2)
+    assert ocurrencia(r, 3) == date(2025, 2, 17)
+
+
+@pytest.mark.parametrize("frecuencia", ["diaria", "semanal", "mensual", "anual"])
+def test_primera_desde_coincide_con_recorrer_las_ocurrencias(frecuencia):
+    rnd = random.Random(frecuencia)
+    for _ in range(200):
+        inicio = date(2020, 1, 1) + timedelta(days=rnd.randrange(1500))
+        r = regla(frecuencia=frecuencia, inicio=inicio.isoformat(), intervalo=rnd.randint(1, 4))
+        desde = inicio + timedelta(days=rnd.randrange(-30, 2000))
+        n = 0
+        while ocurrencia(r, n) < desde:
+            n += 1
+        assert primera_desde(r, desde) == ocurrencia(r, n)
+
+
+def test_primera_desde_respeta_fecha_fin():
+    r = regla(inicio="2025-01-15", fecha_fin="2025-03-20")
+    assert primera_desde(r, date(2025, 3, 1)) == date(2025, 3, 15)
+    assert primera_desde(r, date(2025, 3, 16)) is None
+
+
+def test_vencidas_recupera_todas_las_ocurrencias_pendientes():
+    r = regla(frecuencia="diaria", inicio="2025-01-01", intervalo=3, proxima_fecha="2025-01-04")
+    assert vencidas(r, date(2025, 1, 12)) == [date(2025, 1, 4), date(2025, 1, 7), date(2025, 1, 10)]
+    assert vencidas(r, date(2025, 1, 3)) == []
+
+
+# ---------- materialización ----------
+@pytest.fixture
+def reglas_en_db(db):
+    reglas = [
+        regla(id="r1", inicio="2025-01-31"),
+        regla(id="r2", tipo="ingresos", categoria="Salario", nombre="Sueldo", frecuencia="semanal",
+              inicio="2025-03-03", monto=900.0),
+        regla(id="r3", inicio="2025-01-01", activa=False),
+    ]
+    db.tablas["reglas_recurrentes"] = reglas
+    return reglas
+
+
+def test_materializar_pendientes_crea_y_adelanta_las_reglas(db, reglas_en_db, monkeypatch):
+    monkeypatch.setattr(settings, "RECURRING_BATCH_SIZE", 2)
+    creadas = materializar_pendientes(date(2025, 3, 31))
+    assert creadas == {"gastos": 3, "ingresos": 5}
+    assert sorted(g["fecha"] for g in db.tablas["gastos"]) == ["2025-01-31", "2025-02-28", "2025-03-31"]
+    assert {g["nombre_gasto"] for g in db.tablas["gastos"]} == {"Alquiler"}
+    assert {i["concepto"] for i in db.tablas["ingresos"]} == {"Salario"}
+    proximas = {r["id"]: r["proxima_fecha"] for r in db.tablas["reglas_recurrentes"]}
+    assert proximas == {"r1": "2025-04-30", "r2": "2025-04-07", "r3": "2025-01-01"}
+
+
+def test_repetir_la_pasada_no_duplica(db, reglas_en_db):
+    materializar([dict(r) for r in reglas_en_db], date(2025, 3, 31))
+    # Pasada cortada antes de adelantar proxima_fecha: la siguiente reintenta las mismas ocurrencias
+    creadas = materializar([dict(r) for r in reglas_en_db], date(2025, 3, 31))
+    assert creadas == {"gastos": 0, "ingresos": 0}
+    assert len(db.tablas["gastos"]) == 3 and len(db.tablas["ingresos"]) == 5
+
+
+def test_las_escrituras_no_se_duplican_por_hedging(db, reglas_en_db, monkeypatch):
+    llamadas = []
+    original = recurrente_service.ejecutar
+
+    def registrar(consulta, idempotente=False):
+        llamadas.append(idempotente)
+        return original(consulta, idempotente=idempotente)
+
+    monkeypatch.setattr(recurrente_service, "ejecutar", registrar)
+    materializar([dict(r) for r in reglas_en_db], date(2025, 3, 31))
+    assert llamadas and not any(llamadas)
@@ -0,0 +1,102 @@
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from src.database import resilience
+from src.database.resilience import CircuitBreaker
+from src.services import recurso_service
+from src.services.recurso_service import ServicioRecurso, Recurso
+
+
+class ConsultaQueFalla:
+    """Builder de postgrest cuyo execute() responde con un error de Postgres."""
+
+    def __init__(self, codigo):
+        self.codigo = codigo
+
+    def __getattr__(self, nombre):  # insert, update, eq... devuelven el mismo builder
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        raise APIError({"code": self.codigo, "message": "error de prueba"})
+
+
+class SupabaseFalso:
+    def __init__(self, codigo):
+        self.codigo = codigo
+
+    def table(self, nombre):
+        return ConsultaQueFalla(self.codigo)
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    nuevo = CircuitBreaker(umbral=2, ventana=30, enfriamiento=60)
+    monkeypatch.setattr(resilience, "breaker", nuevo)
+    return nuevo
+
+
+@pytest.fixture
+def servicio():
+    return ServicioRecurso(Recurso("gastos_prueba", "Gasto"))
+
+
+@pytest.mark.parametrize("codigo, estado", [
+    ("23505", 409),
+    ("23503", 400),
+    ("23502", 400),
+    ("23514", 400),
+    ("22P02", 400),
+    ("22007", 400),
+    ("22008", 400),
+    ("42703", 500),
+])
+def test_sqlstate_se_traduce_al_estado_http(codigo, estado, servicio, breaker):
+    with pytest.raises(HTTPException) as info:
+        servicio._ejecutar("crear", ConsultaQueFalla(codigo))
+    assert info.value.status_code == estado
+    assert breaker.estado == CircuitBreaker.CERRADO
+
+
+@pytest.mark.parametrize("operacion, argumentos, codigo, estado", [
+    ("crear", ({"monto": 10},), "23505", 409),
+    ("crear", ({"monto": -1},), "23514", 400),
+    ("actualizar", ("id-1", {"fecha": "2025-02-30"}), "22008", 400),
+    ("eliminar", ("id-1",), "23503", 400),
+])
+def test_escrituras_invalidas_no_abren_el_circuito(operacion, argumentos, codigo, estado, servicio, breaker,
+                                                    monkeypatch):
+    monkeypatch.setattr(recurso_service, "supabase", SupabaseFalso(codigo))
+    for _ in range(breaker.umbral * 3):
+        with pytest.raises(HTTPException) as info:
+            getattr(servicio, operacion)("usuario-1", *argumentos)
+        assert info.value.status_code == estado
+    assert breaker.estado == CircuitBreaker.CERRADO
+
+
+def test_fallo_de_servidor_sigue_respondiendo_503(servicio, breaker):
+    with pytest.raises(HTTPException) as info:
+        servicio._ejecutar("obtener", ConsultaQueFalla("57014"))
+    assert info.value.status_code == 503
+
+
+class InsertVacio:
+    """Builder cuyo insert no devuelve la fila creada (p. ej. bloqueado por RLS)."""
+
+    def __getattr__(self, nombre):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return type("Respuesta", (), {"data": []})()
+
+
+@pytest.mark.parametrize("recurso, estado, detalle", [
+    (recurso_service.planes_gestion.recurso, 400, "No se pudo crear el plan de gestión."),
+    (recurso_service.planes_ahorro.recurso, 500, "Error al crear el plan de ahorro en la base de datos"),
+    (Recurso("gastos_prueba", "Gasto"), 500, "No se pudo crear el registro (gastos_prueba)"),
+])
+def test_insert_sin_filas_responde_segun_el_recurso(recurso, estado, detalle, monkeypatch):
+    monkeypatch.setattr(recurso_service, "supabase", type("Supabase", (), {"table": lambda self, n: InsertVacio()})())
+    with pytest.raises(HTTPException) as info:
+        ServicioRecurso(recurso).crear("usuario-1", {"nombre": "Plan"})
+    assert (info.value.status_code, info.value.detail) == (estado, detalle)
@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+from postgrest.exceptions import APIError
+
+from src.database import resilience
+from src.database.resilience import CircuitBreaker, ejecutar
+from src.services import report_service
+
+
+class ConsultaSinColumna:
+    def execute(self):
+        raise APIError({"code": "42703", "message": "column gastos.actualizado_en does not exist"})
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    nuevo = CircuitBreaker(umbral=2, ventana=30, enfriamiento=60)
+    monkeypatch.setattr(resilience, "breaker", nuevo)
+    return nuevo
+
+
+def test_sin_migracion_002_el_reporte_usa_consultas_directas(db, breaker, monkeypatch):
+    db.tablas["ingresos"] = [{"id": "i1", "usuario_id": "u1", "monto": 1000.10, "fecha": "2025-03-01"}]
+    db.tablas["gastos"] = [{"id": "g1", "usuario_id": "u1", "monto": 250.05, "fecha": "2025-03-02"},
+                           {"id": "g2", "usuario_id": "u1", "monto": 0.1, "fecha": "2025-03-03"}]
+    intentos = []
+
+    def obtener_sin_columna(usuario_id):
+        intentos.append(usuario_id)
+        return ejecutar(ConsultaSinColumna(), idempotente=True)
+
+    monkeypatch.setattr(report_service, "_snapshot_disponible", True)
+    monkeypatch.setattr(report_service.ledger, "obtener", obtener_sin_columna)
+
+    for _ in range(breaker.umbral * 2):
+        reporte = report_service._calcular_reporte_rango("u1", date(2025, 3, 1), date(2025, 3, 31))
+        assert reporte["total_ingresos"] == 1000.10
+        assert reporte["total_gastos"] == 250.15
+        assert reporte["balance"] == 749.95
+    # La columna faltante se detecta una vez; el breaker no se entera
+    assert intentos == ["u1"]
+    assert breaker.estado == CircuitBreaker.CERRADO
@@ -0,0 +1,112 @@
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from src.database import resilience
+from src.database.resilience import CircuitBreaker, _es_fallo_upstream, llamar, presupuesto
+
+
+def api_error(codigo) -> APIError:
+    return APIError({"code": codigo, "message": "error de prueba"})
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    nuevo = CircuitBreaker(umbral=3, ventana=30, enfriamiento=60)
+    monkeypatch.setattr(resilience, "breaker", nuevo)
+    return nuevo
+
+
+def fallar_con(error):
+    def funcion():
+        raise error
+    return funcion
+
+
+# ---------- clasificación de errores ----------
+@pytest.mark.parametrize("codigo", ["23505", "23503", "23502", "23514", "22P02", "22007", "22008", "42703",
+                                    "42501", "PGRST116", "PGRST301", "PGRST204", "400", "404", 409])
+def test_errores_de_la_peticion_no_son_fallos_upstream(codigo):
+    assert not _es_fallo_upstream(api_error(codigo))
+
+
+@pytest.mark.parametrize("codigo", ["08006", "08001", "53300", "57014", "57P01", "58030", "XX000",
+                                    "PGRST000", "PGRST001", "PGRST003", "PGRST500", "500", "502", 503])
+def test_errores_de_servidor_son_fallos_upstream(codigo):
+    assert _es_fallo_upstream(api_error(codigo))
+
+
+def test_errores_de_transporte_son_fallos_upstream():
+    assert _es_fallo_upstream(httpx.ConnectError("sin conexión"))
+    assert _es_fallo_upstream(httpx.ReadTimeout("lento"))
+    assert not _es_fallo_upstream(ValueError("otro"))
+
+
+# ---------- llamar ----------
+def test_error_de_restriccion_se_propaga_sin_abrir_el_circuito(breaker):
+    for _ in range(breaker.umbral * 2):
+        with pytest.raises(APIError) as info:
+            llamar(fallar_con(api_error("23505")))
+        assert info.value.code == "23505"
+    assert breaker.estado == CircuitBreaker.CERRADO
+    assert llamar(lambda: "ok") == "ok"
+
+
+def test_fallos_upstream_abren_el_circuito(breaker):
+    for _ in range(breaker.umbral):
+        with pytest.raises(HTTPException) as info:
+            llamar(fallar_con(httpx.ConnectError("sin conexión")))
+        assert info.value.status_code == 503
+    assert breaker.estado == CircuitBreaker.ABIERTO
+
+    with pytest.raises(HTTPException) as info:
+        llamar(lambda: "no se llama")
+    assert info.value.status_code == 503
+    assert "Retry-After" in info.value.headers
+
+
+def test_circuito_semiabierto_cierra_con_una_prueba_exitosa():
+    breaker = CircuitBreaker(umbral=1, ventana=30, enfriamiento=0.01)
+    breaker.registrar_fallo()
+    assert not breaker.permitir()
+    time.sleep(0.02)
+    assert breaker.permitir()
+    assert not breaker.permitir()  # solo una llamada de prueba a la vez
+    breaker.registrar_exito()
+    assert breaker.estado == CircuitBreaker.CERRADO
+
+
+def test_circuito_semiabierto_reabre_si_la_prueba_falla():
+    breaker = CircuitBreaker(umbral=1, ventana=30, enfriamiento=0.01)
+    breaker.registrar_fallo()
+    time.sleep(0.02)
+    assert breaker.permitir()
+    breaker.registrar_fallo()
+    assert breaker.estado == CircuitBreaker.ABIERTO
+
+
+def test_fallos_fuera_de_la_ventana_no_suman():
+    breaker = CircuitBreaker(umbral=2, ventana=0.01, enfriamiento=60)
+    breaker.registrar_fallo()
+    time.sleep(0.02)
+    breaker.registrar_fallo()
+    assert breaker.estado == CircuitBreaker.CERRADO
+
+
+def test_presupuesto_agotado_responde_504_sin_llamar(breaker):
+    llamadas = []
+    with presupuesto(-1):
+        with pytest.raises(HTTPException) as info:
+            llamar(lambda: llamadas.append(1))
+    assert info.value.status_code == 504
+    assert not llamadas
+
+
+def test_llamada_lenta_responde_504_al_agotar_el_presupuesto(breaker):
+    with presupuesto(0.05):
+        with pytest.raises(HTTPException) as info:
+            llamar(lambda: time.sleep(0.5))
+    assert info.value.status_code == 504
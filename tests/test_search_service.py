@@ -0,0 +1,28 @@
+from src.core.config import settings
+from src.services.search_service import BuscadorMovimientos, normalizar, tokenizar
+
+
+def test_normalizar_quita_tildes_y_mayusculas():
+    assert normalizar("Café Ñandú") == "cafe nandu"
+    assert tokenizar("Pago: Café, café y más") == {"pago", "cafe", "y", "mas"}
+
+
+def test_carga_por_llave_indexa_todas_las_paginas(db, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_PAGE_SIZE", 3)
+    db.tablas["gastos"] = [
+        {"id": f"g{i:02d}", "usuario_id": "u1", "monto": 10, "fecha": f"2025-01-{i + 1:02d}",
+         "nombre_gasto": f"Café {i}", "descripcion": None, "categoria": "Alimentación"}
+        for i in range(10)
+    ] + [{"id": "g99", "usuario_id": "otro", "monto": 1, "fecha": "2025-01-01", "nombre_gasto": "Café ajeno",
+          "descripcion": None, "categoria": "Ocio"}]
+    db.tablas["ingresos"] = [
+        {"id": "i1", "usuario_id": "u1", "monto": 900, "fecha": "2025-01-05", "nombre_fuente": "Cafetería",
+         "descripcion": "Sueldo de marzo", "concepto": "Salario"}
+    ]
+    buscador = BuscadorMovimientos()
+
+    resultados = buscador.buscar("u1", "cafe")
+    assert [r["id"] for r in resultados if r["tipo"] == "gastos"] == [f"g{i:02d}" for i in reversed(range(10))]
+    assert {r["id"] for r in resultados if r["tipo"] == "ingresos"} == {"i1"}  # prefijo de "cafeteria"
+    assert buscador.buscar("u1", "alimentacion", tipos=["ingresos"]) == []
+    assert [r["id"] for r in buscador.buscar("u1", "SUELDO marz")] == ["i1"]
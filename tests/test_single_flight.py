@@ -0,0 +1,73 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from src.core.single_flight import SingleFlight
+from src.database.resilience import presupuesto
+
+
+def test_llamadas_concurrentes_comparten_una_ejecucion():
+    sf = SingleFlight()
+    llamadas = []
+    soltar = threading.Event()
+
+    def consulta():
+        llamadas.append(1)
+        soltar.wait(2)
+        return {"filas": 3}
+
+    with ThreadPoolExecutor(8) as pool:
+        futuros = [pool.submit(sf.ejecutar, "listar", "u1", consulta) for _ in range(8)]
+        time.sleep(0.1)
+        soltar.set()
+        resultados = [f.result() for f in futuros]
+    assert len(llamadas) == 1
+    assert all(r is resultados[0] for r in resultados)
+
+
+def test_claves_distintas_no_se_comparten():
+    sf = SingleFlight()
+    assert sf.ejecutar("listar", "u1", lambda: 1) == 1
+    assert sf.ejecutar("listar", "u2", lambda: 2) == 2
+    assert sf.ejecutar("listar", "u1", lambda: 3) == 3  # la anterior ya terminó
+
+
+def test_la_excepcion_del_lider_llega_a_todos():
+    sf = SingleFlight()
+    soltar = threading.Event()
+
+    def falla():
+        soltar.wait(2)
+        raise ValueError("sin datos")
+
+    with ThreadPoolExecutor(4) as pool:
+        futuros = [pool.submit(sf.ejecutar, "listar", "u1", falla) for _ in range(4)]
+        time.sleep(0.1)
+        soltar.set()
+        for futuro in futuros:
+            with pytest.raises(ValueError):
+                futuro.result()
+
+
+def test_seguidor_respeta_su_presupuesto():
+    sf = SingleFlight()
+    lider_en_curso = threading.Event()
+
+    def lenta():
+        lider_en_curso.set()
+        time.sleep(0.5)
+        return "ok"
+
+    with ThreadPoolExecutor(1) as pool:
+        lider = pool.submit(sf.ejecutar, "reporte", "u1", lenta)
+        lider_en_curso.wait(2)
+        inicio = time.monotonic()
+        with presupuesto(0.05):
+            with pytest.raises(HTTPException) as info:
+                sf.ejecutar("reporte", "u1", lenta)
+        assert info.value.status_code == 504
+        assert time.monotonic() - inicio < 0.3
+        assert lider.result() == "ok"  # el líder sigue y termina con su propio presupuesto
@@ -0,0 +1,96 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.config import settings
+from src.services.sync_service import (
+    CursorInvalido, codificar_cursor, decodificar_cursor, registrar_eliminacion, sincronizar,
+)
+
+
+def marca(segundos_atras: float = 0) -> str:
+    return (datetime.utcnow() - timedelta(seconds=segundos_atras)).isoformat()
+
+
+@pytest.fixture
+def datos(db):
+    db.tablas["gastos"] = [
+        {"id": "g1", "usuario_id": "u1", "monto": 10, "fecha": "2025-01-01", "actualizado_en": marca(3600)},
+        {"id": "g2", "usuario_id": "u1", "monto": 20, "fecha": "2025-01-02", "actualizado_en": marca(1)},
+        {"id": "g3", "usuario_id": "otro", "monto": 30, "fecha": "2025-01-03", "actualizado_en": marca(1)},
+    ]
+    db.tablas["ingresos"] = []
+    db.tablas["planes_ahorro"] = []
+    db.tablas["plan_gestion"] = []
+    db.tablas["eliminaciones"] = []
+    return db
+
+
+def ids(respuesta, tabla="gastos"):
+    return sorted(f["id"] for f in respuesta["cambios"][tabla])
+
+
+def test_sin_cursor_devuelve_todo(datos):
+    respuesta = sincronizar("u1", None)
+    assert respuesta["completo"] is True
+    assert ids(respuesta) == ["g1", "g2"]
+    assert respuesta["eliminados"] == []
+
+
+def test_con_cursor_solo_cambios_y_lapidas_sin_repetir(datos):
+    cursor = sincronizar("u1", None)["cursor"]
+
+    # Sin cambios: g2 está dentro del margen de desfase pero ya se entregó
+    respuesta = sincronizar("u1", cursor)
+    assert respuesta["completo"] is False
+    assert ids(respuesta) == []
+
+    with datos.lock:
+        datos.tablas["gastos"][0].update(monto=11, actualizado_en=marca())
+        datos.tablas["gastos"].append({"id": "g4", "usuario_id": "u1", "monto": 5, "fecha": "2025-01-04",
+                                       "actualizado_en": marca()})
+        datos.tablas["gastos"] = [g for g in datos.tablas["gastos"] if g["id"] != "g2"]
+    registrar_eliminacion("u1", "gastos", "g2")
+    registrar_eliminacion("otro", "gastos", "g3")
+
+    respuesta = sincronizar("u1", respuesta["cursor"])
+    assert ids(respuesta) == ["g1", "g4"]
+    assert [(e["tabla"], e["id"]) for e in respuesta["eliminados"]] == [("gastos", "g2")]
+
+    respuesta = sincronizar("u1", respuesta["cursor"])
+    assert ids(respuesta) == [] and respuesta["eliminados"] == []
+
+
+def test_cursor_de_otro_usuario_o_corrupto_es_invalido(datos):
+    cursor = sincronizar("u1", None)["cursor"]
+    with pytest.raises(CursorInvalido):
+        sincronizar("u2", cursor)
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor("no-es-base64!!", "u1")
+    with pytest.raises(CursorInvalido):
+        decodificar_cursor(codificar_cursor({"v": 99, "u": "u1"}), "u1")
+
+
+def test_cursor_mas_viejo_que_la_retencion_pide_sincronizacion_completa(datos):
+    viejo = codificar_cursor({"v": 1, "u": "u1", "ts": 0, "e": 0, "t": {}, "r": {}})
+    assert sincronizar("u1", viejo)["completo"] is True
+
+
+def test_fila_que_confirma_tarde_con_marca_anterior_no_se_pierde(datos, monkeypatch):
+    monkeypatch.setattr(settings, "SYNC_OVERLAP_SECONDS", 0.2)
+    entregada = datetime.utcnow() - timedelta(seconds=0.05)
+    with datos.lock:
+        datos.tablas["gastos"][1]["actualizado_en"] = entregada.isoformat()
+    cursor = sincronizar("u1", None)["cursor"]
+
+    # Transacción que empezó antes de la lectura y confirma después: su marca
+    # queda por debajo de la más reciente ya entregada
+    with datos.lock:
+        datos.tablas["gastos"].append({"id": "g5", "usuario_id": "u1", "monto": 7, "fecha": "2025-01-05",
+                                       "actualizado_en": (entregada - timedelta(seconds=0.05)).isoformat()})
+    time.sleep(0.5)  # más de dos márgenes después
+
+    respuesta = sincronizar("u1", cursor)
+    assert ids(respuesta) == ["g5"]
+    assert ids(sincronizar("u1", respuesta["cursor"])) == []
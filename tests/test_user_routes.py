@@ -0,0 +1,79 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.models.user_model import Usuario, UsuarioUpdate
+from src.routes import user_routes
+from src.services.email_index_service import IndiceCorreos
+
+
+@pytest.fixture
+def indice(db, monkeypatch):
+    nuevo = IndiceCorreos()
+    nuevo.listo = True  # precargado con la tabla vacía
+    monkeypatch.setattr(user_routes, "indice_correos", nuevo)
+    monkeypatch.setattr(user_routes.pwd_context, "hash", lambda password: "hash")
+    return nuevo
+
+
+def test_registro_nuevo_omite_la_consulta_y_agrega_el_correo(db, indice):
+    user_routes.crear_usuario(Usuario(nombre="Ana", correo="ana@fintrack.io", password="secreto"))
+    assert indice.puede_existir("ana@fintrack.io")
+    assert [u["correo"] for u in db.tablas["usuarios"]] == ["ana@fintrack.io"]
+
+
+def test_registro_concurrente_que_el_filtro_no_vio_responde_400(db, indice):
+    # Otro worker registró el correo después de la precarga: el filtro dice "seguro no existe"
+    db.tablas["usuarios"] = [{"id": "u1", "nombre": "Ana", "correo": "ana@fintrack.io", "password": "x"}]
+    assert not indice.puede_existir("ana@fintrack.io")
+    with pytest.raises(HTTPException) as info:
+        user_routes.crear_usuario(Usuario(nombre="Ana", correo="ana@fintrack.io", password="secreto"))
+    assert info.value.status_code == 400
+    assert info.value.detail == "El correo ingresado ya está registrado"
+
+
+def test_registro_con_correo_en_el_filtro_consulta_la_base(db, indice):
+    db.tablas["usuarios"] = [{"id": "u1", "nombre": "Ana", "correo": "ana@fintrack.io", "password": "x"}]
+    indice.agregar("ana@fintrack.io")
+    with pytest.raises(HTTPException) as info:
+        user_routes.crear_usuario(Usuario(nombre="Ana", correo="ana@fintrack.io", password="secreto"))
+    assert info.value.status_code == 400
+
+
+def test_cambio_de_correo_libera_el_anterior_en_el_filtro(db, indice):
+    db.tablas["usuarios"] = [{"id": "u1", "nombre": "Ana", "correo": "ana@fintrack.io", "password": "x"}]
+    indice.agregar("ana@fintrack.io")
+    user_routes.actualizar_usuario("u1", UsuarioUpdate(correo="ana.nueva@fintrack.io"))
+    assert indice.puede_existir("ana.nueva@fintrack.io")
+    assert not indice.puede_existir("ana@fintrack.io")
+    assert indice.filtro.elementos == 1
+
+
+def test_precarga_recorre_todos_los_usuarios(db, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_INDEX_PAGE_SIZE", 4)
+    db.tablas["usuarios"] = [{"id": f"u{i:02d}", "correo": f"Usuario{i}@FinTrack.io"} for i in range(10)]
+    indice = IndiceCorreos()
+    indice.precargar()
+    assert indice.listo and indice.filtro.elementos == 10
+    assert all(indice.puede_existir(f"usuario{i}@fintrack.io") for i in range(10))
+
+
+def test_solo_el_propio_usuario_puede_eliminar_su_cuenta(db, monkeypatch):
+    db.tablas["usuarios"] = [{"id": "u1", "correo": "ana@fintrack.io"}, {"id": "u2", "correo": "beto@fintrack.io"}]
+    encolados = []
+    monkeypatch.setattr(user_routes.purgas, "encolar",
+                        lambda usuario_id: encolados.append(usuario_id) or {"job_id": "j1"})
+    with pytest.raises(HTTPException) as info:
+        user_routes.eliminar_usuario("u1", usuario_id="u2")
+    assert info.value.status_code == 403
+    assert encolados == []
+
+    assert user_routes.eliminar_usuario("u1", usuario_id="u1")["job_id"] == "j1"
+    assert encolados == ["u1"]
+
+
+def test_eliminar_usuario_exige_token():
+    app = FastAPI()
+    app.include_router(user_routes.router)
+    assert TestClient(app).delete("/usuarios/u1").status_code in (401, 403)